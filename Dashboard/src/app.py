@@ -1,14 +1,29 @@
 # Import required libraries 
 import dash
 import dash_bootstrap_components as dbc
-from dash import html
+import os
+import diskcache
+from dash import html, DiskcacheManager
+from utils.figure_cache import figure_cache, WARM_UP
+from utils.paths import DATA_DIRECTORY
 
 
+# Background callbacks (e.g. the live experiments) run in worker processes, queued through a local disk cache.
+# Every job is a separate process: the API clients (utils.client_registry) and the connection of the response cache are
+# created per process, the rate limits, the response cache, the live results and the result store are shared on disk.
+# The queue has data/Jobs to itself, each of the shared stores has its own directory in data.
+background_callback_manager = DiskcacheManager(diskcache.Cache(os.path.join(DATA_DIRECTORY, "Jobs")))
+
 # Initialize the app
 app = dash.Dash(external_stylesheets=[dbc.themes.BOOTSTRAP],
-                use_pages=True)
+                use_pages=True,
+                background_callback_manager=background_callback_manager)
 server = app.server
 
+# Render the figures of the static experiment pages in the background, the pages registered them on import
+if WARM_UP:
+    figure_cache.start_warm_up()
+
 # Optics of sidebar
 SIDEBAR_STYLE = {
     "position": "fixed", # remains in place when scrolling
@@ -0,0 +1,70 @@
+# Microbenchmark of the parser of the numeric answers on a million synthetic answers.
+# Compares utils.answer_parser against the per-item startswith/replace/isdigit checks that were used before. The
+# answers of the experiments repeat a lot, so the realistic case draws from a few hundred distinct answers, the worst
+# case draws the million answers from a million distinct ones.
+#
+# Run from Dashboard/src:
+#   python benchmarks/answer_parser.py
+
+# Import required libraries
+import statistics
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.answer_parser import parse_numeric_answers
+
+
+REPEATS = 3
+N_ANSWERS = 1_000_000
+
+
+def parse_before(answers):
+    # Checks of extract_dollar_amounts and parse_prices before the shared parser
+    prices = []
+    for answer in answers:
+        if not answer.startswith("$"):
+            continue
+        answer = answer[1:].replace(",", "")
+        if answer.replace(".", "").isdigit():
+            try:
+                prices.append(float(answer))
+            except ValueError:
+                continue
+    return np.array(prices, dtype=float)
+
+
+def parse_after(answers):
+    values, valid = parse_numeric_answers(answers)
+    return values[valid]
+
+
+def make_answers(n_distinct, seed=0):
+    # Mix of the answer formats of the models, about a tenth of the answers is not a price
+    rng = np.random.default_rng(seed)
+    amounts = rng.integers(1, 100_000, n_distinct) / rng.choice([1, 100], n_distinct)
+    formats = ["${:,}", "${}", "${}.", "USD {}", "{} dollars", "I would not sell it for {}"]
+    weights = [0.4, 0.2, 0.1, 0.1, 0.1, 0.1]
+    distinct = np.array([formats[i].format(amount) for i, amount in
+                         zip(rng.choice(len(formats), n_distinct, p=weights), amounts)], dtype=object)
+    return list(distinct[rng.integers(0, n_distinct, N_ANSWERS)])
+
+
+def time_parser(parser, answers):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        parser(answers)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+if __name__ == '__main__':
+    print(f"{'distinct answers':<18} {'before':>10} {'after':>10}")
+    for n_distinct in [300, N_ANSWERS]:
+        answers = make_answers(n_distinct)
+        before = time_parser(parse_before, answers)
+        after = time_parser(parse_after, answers)
+        print(f"{len(set(answers)):<18,} {before * 1000:7.0f} ms {after * 1000:7.0f} ms")
@@ -0,0 +1,100 @@
+# Benchmark of the plot callbacks of the transaction utility and prospect theory pages.
+# Compares the plot functions as they were before the answers were parsed at load time, on the results as read from
+# the CSVs, against the current plot functions on the tables the pages load (the aggregates of the TU experiments and
+# the preparsed PT probabilities). The plot functions of the baseline are taken from git, so both sides run the code
+# that was actually shipped. The answers are timed on their own as well, most of a callback is building the figure.
+#
+# Run from Dashboard/src:
+#   python benchmarks/plot_callbacks.py
+
+# Import required libraries
+import os
+import statistics
+import subprocess
+import sys
+import time
+import types
+from ast import literal_eval
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.aggregates import OUTPUT_DIRECTORY, load_aggregates
+from utils.answer_arrays import load_results
+from utils import plotting_functions
+from utils.plotting_functions import get_price_aggregates
+
+
+REPEATS = 5
+# Number of cells of every results file, one callback per cell
+CELLS = 40
+# Commit before the answers were parsed at load time
+BASELINE_COMMIT = 'd65ecf9'
+
+# Results file, loader of the pages, plot function and answer column of every callback
+CASES = {
+    'TU': ('TU_results.csv', lambda path: load_aggregates('TU'), 'TU_plot_results', "Answers"),
+    'TU2': ('TU2_results.csv', lambda path: load_aggregates('TU2'), 'TU2_plot_results', "Answers"),
+    'TU3': ('TU3_results.csv', lambda path: load_aggregates('TU3'), 'TU3_plot_results', "Answers"),
+    'PT': ('PT_probs.csv', load_results, 'PT_plot_results', "Original"),
+}
+
+
+def load_baseline():
+    # Plot functions of the baseline commit as a module
+    source = subprocess.run(['git', 'show', f'{BASELINE_COMMIT}:Dashboard/src/utils/plotting_functions.py'],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True,
+                            check=True).stdout
+    module = types.ModuleType('baseline_plotting_functions')
+    exec(compile(source, module.__name__, 'exec'), module.__dict__)
+    return module
+
+
+def baseline_answers(baseline, df, column):
+    # The step of the baseline plot functions that used literal_eval, on the transposed row
+    answers = df.loc[column].apply(literal_eval).iloc[0]
+    return answers if column == "Original" else baseline.extract_dollar_amounts(answers)
+
+
+def current_answers(df, column):
+    # The step of the current plot functions that replaced it
+    if column == "Original":
+        return df.loc[column].iloc[0]
+    return get_price_aggregates(df)
+
+
+def get_cells(results, transpose=False):
+    # Rows of the first cells, the pages select one row per dropdown change
+    cells = [results.iloc[[i]] for i in range(min(CELLS, len(results)))]
+    return [cell.transpose() for cell in cells] if transpose else cells
+
+
+def time_per_cell(cells, function):
+    # Median time per cell over the given cells
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for cell in cells:
+            function(cell)
+        timings.append((time.perf_counter() - start) / len(cells))
+    return statistics.median(timings)
+
+
+if __name__ == '__main__':
+    baseline = load_baseline()
+    print(f"{'callback':<10} {'step':<9} {'baseline':>11} {'current':>11}")
+    for name, (filename, load, plot_function, column) in CASES.items():
+        path = os.path.join(OUTPUT_DIRECTORY, filename)
+        start = time.perf_counter()
+        current = load(path)
+        load_time = time.perf_counter() - start
+        raw = pd.read_csv(path)
+        # The plot functions transpose the row before they read the answers
+        steps = {
+            'answers': (lambda df: baseline_answers(baseline, df, column), lambda df: current_answers(df, column), True),
+            'callback': (getattr(baseline, plot_function), getattr(plotting_functions, plot_function), False),
+        }
+        for step, (before_function, after_function, transpose) in steps.items():
+            before = time_per_cell(get_cells(raw, transpose), before_function)
+            after = time_per_cell(get_cells(current, transpose), after_function)
+            print(f"{name:<10} {step:<9} {before * 1000:8.3f} ms {after * 1000:8.3f} ms")
+        print(f"{name:<10} {'load':<9} {'':>11} {load_time * 1000:8.1f} ms (once at startup)")
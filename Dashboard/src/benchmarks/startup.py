@@ -0,0 +1,61 @@
+# Benchmark of the startup cost of the prompt inputs.
+# Compares importing utils.experiment_functions with the lazy, memory-mapped prompt store against unpickling the
+# 14 input files at import time, as it was done before the prompt store. Every measurement runs in a fresh interpreter.
+#
+# Run from Dashboard/src:
+#   python benchmarks/startup.py
+
+# Import required libraries
+import os
+import statistics
+import subprocess
+import sys
+
+
+REPEATS = 7
+# Dashboard/src, so the cases can be run from any working directory
+SOURCE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The libraries are imported before the timer starts, so only the cost of the prompt inputs is measured
+SETUP = (
+    f"import sys, time; sys.path.insert(0, {SOURCE_DIRECTORY!r})\n"
+    "import openai, replicate, pandas, numpy, pyarrow, pickle, os, matplotlib.pyplot, plotly.graph_objects, tqdm\n"
+    "start = time.perf_counter()\n"
+)
+CASES = {
+    'lazy (import only, e.g. chatbot worker)': "import utils.experiment_functions\n",
+    'lazy + first access of one family': (
+        "import utils.experiment_functions\n"
+        "from utils.prompt_store import prompt_store\n"
+        "prompt_store.get('TU3', 'experiment_prompts')\n"
+    ),
+    'all families from the store': (
+        "import utils.experiment_functions\n"
+        "from utils.prompt_store import prompt_store, DICTIONARY_NAMES\n"
+        "for experiment in DICTIONARY_NAMES:\n"
+        "    prompt_store.get_dictionaries(experiment)\n"
+        "    prompt_store.get_prompts(experiment)\n"
+    ),
+    'all 14 pickles at import (before)': (
+        "import utils.experiment_functions\n"
+        "from utils.prompt_store import DICTIONARY_NAMES, INPUT_DIRECTORY, PROMPT_FILES\n"
+        "for experiment in DICTIONARY_NAMES:\n"
+        "    for filename in (f'{experiment}_dictionaries.pkl',) + PROMPT_FILES[experiment]:\n"
+        "        with open(os.path.join(INPUT_DIRECTORY, filename), 'rb') as f:\n"
+        "            pickle.load(f)\n"
+    ),
+}
+
+
+def time_case(code):
+    timings = []
+    for _ in range(REPEATS):
+        output = subprocess.run([sys.executable, '-c', SETUP + code + "print(time.perf_counter() - start)"],
+                                capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+
+if __name__ == '__main__':
+    for name, code in CASES.items():
+        print(f"{name:<45} {time_case(code) * 1000:8.1f} ms (median of {REPEATS})")
@@ -1,13 +1,16 @@
 # Import required libraries 
 import dash
 import dash_bootstrap_components as dbc
-from dash import Input, Output, ALL, dcc, html, State, dash_table
+from dash import Input, Output, ALL, dcc, html, State, dash_table, Patch
 from dash.exceptions import PreventUpdate
 import pandas as pd
+import uuid
 
 # Local imports
 from utils.experiment import Experiment
-from utils.plotting import plot_results
+from utils.answer_tally import DEFAULT_NORMALIZATION
+from utils.live_results import publish_partial_results, get_partial_results
+from utils.plotting import plot_results, plot_partial_results, get_cell_labels
 
 
 # Constants
@@ -169,6 +172,22 @@ def answer_option_layout():
                                             "This is how often the LLMs will answer the questions. The more iterations, the more accurate the answer distribution will be. However, the experiment will also be more expensive. The maximum is 500.",
                                             target="individual-iterations",
                                         ),
+                                        html.H6("Early stopping (confidence interval width)"),
+                                        dbc.Input(
+                                            id="ci-width",
+                                            type="number",
+                                            placeholder="Off",
+                                            min=0.01,
+                                            max=1,
+                                            step=0.01,
+                                            style=input_style,
+                                            persistence=True,
+                                            persistence_type='session',
+                                        ),
+                                        dbc.Tooltip(
+                                            f"Optional. Stops requesting answers for a scenario once the 95% confidence interval of every answer share is narrower than this width (e.g. 0.2), or once {Experiment.MIN_SAMPLES} valid answers all have the same label. Leave empty to always use all requests.",
+                                            target="ci-width",
+                                        ),
                                         dbc.Checklist(
                                             id="instruction-checklist",
                                             options=[
@@ -186,6 +205,41 @@ def answer_option_layout():
                                             "The instruction role is to guide the LLMs to answer the questions in a specific way. For example, to answer only with the letter of the answer options.",
                                             target="instruction-checklist",
                                         ),
+                                        dbc.Checklist(
+                                            id="normalization-checklist",
+                                            options=[
+                                                {"label": "Extract answer labels", "value": "extract"},
+                                                {"label": "Use token probabilities (GPT)", "value": "logprobs"}
+                                            ],
+                                            value=[],
+                                            switch=True,
+                                            inline=False,
+                                            style={'marginBottom': '25px'},
+                                            inputStyle={'margin-right': '10px'},
+                                            persistence=True,
+                                            persistence_type='session',
+                                        ),
+                                        dbc.Tooltip(
+                                            "Answers like \"A.\", \"(A)\" or \"a\" are always counted as \"A\". Extracting answer labels also counts the first answer option label in longer answers, e.g. \"I would choose B\". With token probabilities, answers of the GPT models that are not an answer option label are replaced by the most likely label of the first token. Both count answers that would be discarded otherwise, so fewer iterations are needed.",
+                                            target="normalization-checklist",
+                                        ),
+                                        dbc.Checklist(
+                                            id="reuse-checklist",
+                                            options=[
+                                                {"label": "Reuse my earlier answers", "value": "reuse"}
+                                            ],
+                                            value=[],
+                                            switch=True,
+                                            inline=False,
+                                            style={'marginBottom': '25px'},
+                                            inputStyle={'margin-right': '10px'},
+                                            persistence=True,
+                                            persistence_type='session',
+                                        ),
+                                        dbc.Tooltip(
+                                            "By default, every run draws new answers from the models, only an interrupted run continues with the answers it already got. Switch on to replay the answers of your earlier runs with the same prompts, models and temperature, which saves API calls but does not sample the models again.",
+                                            target="reuse-checklist",
+                                        ),
                                         html.Div(id='shuffle-checklist-container'),
                                         html.H6("Select language models"),
                                         dbc.Checklist(
@@ -225,6 +279,10 @@ def answer_option_layout():
                                         ),
                                         dbc.Button('Run the experiment', id='individual-update-button', 
                                                     n_clicks=None, style={'marginBottom': '25px', 'width': '100%'}),
+                                        dbc.Button('Cancel', id='cancel-button', color='secondary', outline=True, disabled=True,
+                                                    n_clicks=None, style={'marginBottom': '15px', 'width': '100%'}),
+                                        dbc.Progress(id='experiment-progress', value=0, label='', striped=True,
+                                                     style={'marginBottom': '25px', 'height': '20px'}),
                                         html.Div(id='cost-estimate-container'),
                                         dbc.Spinner(
                                             html.Div(id="loading-output", 
@@ -243,6 +301,19 @@ def answer_option_layout():
             style={'display': 'flex', 'flexWrap': 'wrap'}
         ),  
         html.Hr(),
+        # Partial results, only shown while the experiment is running
+        html.Div(
+            id='partial-results',
+            style={'display': 'none'},
+            children=[
+                html.H4("Results so far:", style={'margin-top': '30px'}),
+                dash_table.DataTable(id='partial-output-table', data=[], style_table={'margin-top': '10px', 'margin-bottom': '30px'}),
+                dcc.Graph(id='partial-graph'),
+            ],
+        ),
+        dcc.Interval(id='partial-results-interval', interval=1000, disabled=True),
+        dcc.Store(id='live-job-id'),
+        dcc.Store(id='partial-results-shown'),
         # Results
         html.Div(id='experiment_results'),
         html.Div(
@@ -494,13 +565,27 @@ def update_shuffle_checklist(num_scenarios):
         State("instruction-checklist", "value"),
         State({"type": "instruction-text", "index": ALL}, "value"),
         State("shuffle-checklist", "value"),
+        State("ci-width", "value"),
+        State("normalization-checklist", "value"),
+        State("reuse-checklist", "value"),
         State("user-api-keys", "data")
     ],
+    # The experiment runs as a background job, the browser polls its progress until the results are attached
+    background=True,
+    running=[
+        (Output("individual-update-button", "disabled"), True, False),
+        (Output("cancel-button", "disabled"), False, True),
+        (Output("partial-results-interval", "disabled"), False, True),
+        (Output("partial-results", "style"), {}, {'display': 'none'}),
+    ],
+    cancel=[Input("cancel-button", "n_clicks")],
+    progress=[Output("experiment-progress", "value"), Output("experiment-progress", "label"), Output("live-job-id", "data")],
+    progress_default=[0, "", None],
     prevent_initial_call=True
 )
-def update_individual_experiment(n_clicks, prompts, models, iterations, temperature, 
+def update_individual_experiment(set_progress, n_clicks, prompts, models, iterations, temperature, 
                                  num_options, answer_values, instruction_checklist, 
-                                 instruction_text, shuffle_checklist, api_keys):
+                                 instruction_text, shuffle_checklist, ci_width, normalization_checklist, reuse_checklist, api_keys):
     # Check if button was clicked
     if n_clicks is not None:  
         
@@ -526,13 +611,33 @@ def update_individual_experiment(n_clicks, prompts, models, iterations, temperat
             instruction_checklist=instruction_checklist,
             instructions=instruction_text,
             shuffle_option=shuffle_option,
+            concurrency=Experiment.DEFAULT_CONCURRENCY,
+            samples_per_request=Experiment.SAMPLES_PER_REQUEST,
+            ci_width=ci_width,
+            normalization='extract' if normalization_checklist and 'extract' in normalization_checklist else DEFAULT_NORMALIZATION,
+            logprobs=bool(normalization_checklist) and 'logprobs' in normalization_checklist,
+            reuse_responses=bool(reuse_checklist) and 'reuse' in reuse_checklist,
         )
         
+        # Report the progress of the background job and publish the results after every finished cell,
+        # and the shares so far of the running cells after their batches
+        job_id = uuid.uuid4().hex
+        def publish_results():
+            running_rows, _ = experiment.get_running_results()
+            publish_partial_results(job_id, experiment.results_list, running=running_rows)
+        def report_progress(finished, total):
+            publish_results()
+            set_progress((round(100 * finished / total), f"Job {experiment.run_id}: {finished}/{total}", job_id))
+        experiment.progress_callback = report_progress
+        experiment.batch_callback = publish_results
+        # Send the job id right away, so the browser polls the results of the running cells from the first batch on
+        set_progress((0, "Starting the experiment", job_id))
+        
         # Run the experiment and catch errors
         try:
             experiment.run()
         except Exception as e:
-            error_message = dbc.Alert(f'An error occurred: "{str(e)}". Please try again.', color="danger")
+            error_message = dbc.Alert(f'An error occurred: "{str(e)}". The answers collected so far were saved, run the experiment again with the same settings to continue where it stopped.', color="danger")
             return error_message, None, None, None
         
         n_clicks = None
@@ -556,6 +661,14 @@ def update_individual_experiment(n_clicks, prompts, models, iterations, temperat
                 "The share of correct answers (correct answers / iterations) is below 50% for at least one experiment. This might indicate that the models were not able to answer the questions correctly. Scroll down to see the raw answers of the models. It is helpful to guide the model to answer in the required format by using the instruction role or by writing it in the scenario text.",
                 color="warning"
             ) if experiment.low_answers_share_warning else None,
+            dbc.Alert(
+                f"Early stopping saved {experiment.calls_saved} API calls ({experiment.samples_saved} answers). The column 'Iterations' shows the number of answers that were used per scenario.",
+                color="info"
+            ) if experiment.early_stopping else None,
+            dbc.Alert(
+                f"The answer normalization counted {experiment.rescued_answers + experiment.logprob_rescues} answers that would have been discarded, e.g. \"A.\" instead of \"A\" ({experiment.logprob_rescues} of them from the token probabilities). The column 'Invalid Answers' shows why the other answers were not counted.",
+                color="info"
+            ) if experiment.rescued_answers + experiment.logprob_rescues > 0 else None,
             output_table
         ]
         
@@ -610,6 +723,64 @@ def update_individual_experiment(n_clicks, prompts, models, iterations, temperat
         return loading, results, graph_settings, raw_model_answers
     
 
+# Callback to stream the results of the finished and the running cells while the experiment is running
+@dash.callback(
+    [
+        Output("partial-output-table", "data"),
+        Output("partial-output-table", "columns"),
+        Output("partial-graph", "figure"),
+        Output("partial-results-shown", "data"),
+    ],
+    [
+        Input("partial-results-interval", "n_intervals"),
+    ],
+    [
+        State("live-job-id", "data"),
+        State("partial-results-shown", "data"),
+    ],
+    prevent_initial_call=True
+)
+def stream_partial_results(n_intervals, job_id, shown):
+    partial_results = get_partial_results(job_id)
+    
+    # Only update if the job has published new results since the last poll
+    if partial_results is None:
+        raise PreventUpdate
+    is_shown = shown is not None and shown['job_id'] == job_id
+    if is_shown and partial_results['published'] == shown['published']:
+        raise PreventUpdate
+    rows = partial_results['rows']
+    running = partial_results['running']
+    
+    # The running cells are shown after the finished cells
+    df = pd.DataFrame(rows + running)
+    answer_options = [col for col in df.columns if col.startswith('Share of ')]
+    new_shown = {'job_id': job_id, 'rows': len(rows), 'running': len(running), 'columns': answer_options,
+                 'published': partial_results['published']}
+    
+    # Build the table and the figure for the first cells of a job and whenever shuffled scenarios add new answer options
+    if not is_shown or answer_options != shown['columns']:
+        columns = [{'name': col, 'id': col} for col in df.columns]
+        return df.to_dict('records'), columns, plot_partial_results(df), new_shown
+    
+    # Afterwards, the rows of the running cells that were shown are replaced by the new finished and running cells
+    new_df = df.iloc[shown['rows']:]
+    table_patch = Patch()
+    for _ in range(shown['running']):
+        del table_patch[shown['rows']]
+    table_patch.extend(new_df.to_dict('records'))
+    
+    figure_patch = Patch()
+    for k, option in enumerate(answer_options):
+        for _ in range(shown['running']):
+            del figure_patch['data'][k]['x'][shown['rows']]
+            del figure_patch['data'][k]['y'][shown['rows']]
+        figure_patch['data'][k]['x'].extend(get_cell_labels(new_df))
+        figure_patch['data'][k]['y'].extend(new_df[option].tolist())
+    
+    return table_patch, dash.no_update, figure_patch, new_shown
+
+
 # Callback to display graph settings
 @dash.callback(
     [
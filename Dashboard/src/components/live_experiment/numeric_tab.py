@@ -2,12 +2,17 @@
 import pandas as pd
 import dash
 import dash_bootstrap_components as dbc
-from dash import Input, Output, ALL, dcc, html, State, dash_table
+from dash import Input, Output, ALL, dcc, html, State, dash_table, Patch
+from dash.exceptions import PreventUpdate
+import plotly.graph_objects as go
 import json
+import uuid
 
 # Local imports
 from utils.experiment import Experiment
-from utils.plotting import plot_results_numeric
+from utils.live_results import publish_partial_results, get_partial_results
+from utils.result_store import put_result, get_result
+from utils.plotting import plot_results_numeric, get_cell_boxes
 
 
 # Constants
@@ -90,6 +95,40 @@ def numeric_layout():
                                             "The instruction role is to guide the LLMs to answer the questions in a specific way. For example, to answer with a dollar amount only.",
                                             target="instruction-checklist-numeric",
                                         ),
+                                        dbc.Checklist(
+                                            id="early-stopping-checklist-numeric",
+                                            options=[
+                                                {"label": "Stop early on identical prices", "value": "early_stopping"}
+                                            ],
+                                            value=[],
+                                            switch=True,
+                                            inline=False,
+                                            style={'marginBottom': '25px'},
+                                            inputStyle={'margin-right': '10px'},
+                                            persistence=True,
+                                            persistence_type='session',
+                                        ),
+                                        dbc.Tooltip(
+                                            f"Stops requesting answers for a scenario once {Experiment.MIN_SAMPLES} valid prices are all identical, e.g. for low temperatures.",
+                                            target="early-stopping-checklist-numeric",
+                                        ),
+                                        dbc.Checklist(
+                                            id="reuse-checklist-numeric",
+                                            options=[
+                                                {"label": "Reuse my earlier answers", "value": "reuse"}
+                                            ],
+                                            value=[],
+                                            switch=True,
+                                            inline=False,
+                                            style={'marginBottom': '25px'},
+                                            inputStyle={'margin-right': '10px'},
+                                            persistence=True,
+                                            persistence_type='session',
+                                        ),
+                                        dbc.Tooltip(
+                                            "By default, every run draws new answers from the models, only an interrupted run continues with the answers it already got. Switch on to replay the answers of your earlier runs with the same prompts, models and temperature, which saves API calls but does not sample the models again.",
+                                            target="reuse-checklist-numeric",
+                                        ),
                                         html.H6("Select language models"),
                                         dbc.Checklist(
                                             id="individual-model-checklist-numeric",
@@ -128,6 +167,10 @@ def numeric_layout():
                                         ),
                                         dbc.Button('Run the experiment', id='individual-update-button-numeric', 
                                                         n_clicks=None, style={'marginBottom': '25px', 'width': '100%'}),
+                                        dbc.Button('Cancel', id='cancel-button-numeric', color='secondary', outline=True, disabled=True,
+                                                    n_clicks=None, style={'marginBottom': '15px', 'width': '100%'}),
+                                        dbc.Progress(id='experiment-progress-numeric', value=0, label='', striped=True,
+                                                     style={'marginBottom': '25px', 'height': '20px'}),
                                         html.Div(id='cost-estimate-numeric-container'),
                                         dbc.Spinner(
                                             html.Div(id="loading-output-numeric", 
@@ -146,6 +189,19 @@ def numeric_layout():
             style={'display': 'flex', 'flexWrap': 'wrap'}
         ),  
         html.Hr(),
+        # Partial results, only shown while the experiment is running
+        html.Div(
+            id='partial-results-numeric',
+            style={'display': 'none'},
+            children=[
+                html.H4("Results so far:", style={'margin-top': '30px'}),
+                dash_table.DataTable(id='partial-output-table-numeric', data=[], style_table={'margin-top': '10px', 'margin-bottom': '30px'}),
+                dcc.Graph(id='partial-graph-numeric'),
+            ],
+        ),
+        dcc.Interval(id='partial-results-interval-numeric', interval=1000, disabled=True),
+        dcc.Store(id='live-job-id-numeric'),
+        dcc.Store(id='partial-results-shown-numeric'),
         # Results
         html.Div(id='experiment-prompt-numeric'),
         html.Div(dcc.Graph(id="graph_1-numeric")),
@@ -269,12 +325,25 @@ def update_cost_estimate(prompts, iterations, models):
         State("individual-temperature-numeric", "value"),
         State("instruction-checklist-numeric", "value"),
         State({"type": "instruction-text-numeric", "index": ALL}, "value"),
+        State("early-stopping-checklist-numeric", "value"),
+        State("reuse-checklist-numeric", "value"),
         State("user-api-keys", "data")
     ],
+    # The experiment runs as a background job, the browser polls its progress until the results are attached
+    background=True,
+    running=[
+        (Output("individual-update-button-numeric", "disabled"), True, False),
+        (Output("cancel-button-numeric", "disabled"), False, True),
+        (Output("partial-results-interval-numeric", "disabled"), False, True),
+        (Output("partial-results-numeric", "style"), {}, {'display': 'none'}),
+    ],
+    cancel=[Input("cancel-button-numeric", "n_clicks")],
+    progress=[Output("experiment-progress-numeric", "value"), Output("experiment-progress-numeric", "label"), Output("live-job-id-numeric", "data")],
+    progress_default=[0, "", None],
     prevent_initial_call=True
 )
-def update_individual_experiment(n_clicks, prompts, models, iterations, temperature, 
-                                 instruction_checklist, instruction_text, api_keys):
+def update_individual_experiment(set_progress, n_clicks, prompts, models, iterations, temperature, 
+                                 instruction_checklist, instruction_text, early_stopping_checklist, reuse_checklist, api_keys):
     # Check if button was clicked
     if n_clicks is not None:  
         
@@ -290,13 +359,34 @@ def update_individual_experiment(n_clicks, prompts, models, iterations, temperat
             num_options=None,
             instruction_checklist=instruction_checklist,
             instructions=instruction_text,
+            concurrency=Experiment.DEFAULT_CONCURRENCY,
+            samples_per_request=Experiment.SAMPLES_PER_REQUEST,
+            # Numeric answers have no shares, so early stopping only stops on identical prices
+            early_stopping=bool(early_stopping_checklist) and "early_stopping" in early_stopping_checklist,
+            reuse_responses=bool(reuse_checklist) and "reuse" in reuse_checklist,
         )
             
+        # Report the progress of the background job and publish the results after every finished cell,
+        # and the prices so far of the running cells after their batches
+        job_id = uuid.uuid4().hex
+        def publish_results():
+            running_rows, running_prices = experiment.get_running_results()
+            prices = {model: {**experiment.model_answers_dict.get(model, {}), **running_prices.get(model, {})}
+                      for model in {**experiment.model_answers_dict, **running_prices}}
+            publish_partial_results(job_id, experiment.results_list, prices, running=running_rows)
+        def report_progress(finished, total):
+            publish_results()
+            set_progress((round(100 * finished / total), f"Job {experiment.run_id}: {finished}/{total}", job_id))
+        experiment.progress_callback = report_progress
+        experiment.batch_callback = publish_results
+        # Send the job id right away, so the browser polls the results of the running cells from the first batch on
+        set_progress((0, "Starting the experiment", job_id))
+        
         # Run the experiment and catch errors
         try:
             experiment.run()
         except Exception as e:
-            error_message = dbc.Alert(f'An error occurred: "{str(e)}". Please try again.', color="danger")
+            error_message = dbc.Alert(f'An error occurred: "{str(e)}". The answers collected so far were saved, run the experiment again with the same settings to continue where it stopped.', color="danger")
             return error_message, None, None, None
         
         n_clicks = None
@@ -320,6 +410,10 @@ def update_individual_experiment(n_clicks, prompts, models, iterations, temperat
                 "The share of correct answers (correct answers / iterations) is below 50% for at least one experiment. This might indicate that the models were not able to answer the questions correctly. Scroll down to see the raw answers of the models. It is helpful to guide the model to answer in the required format by using the instruction role or by writing it in the scenario text.",
                 color="warning"
             ) if experiment.low_answers_share_warning else None,
+            dbc.Alert(
+                f"Early stopping saved {experiment.calls_saved} API calls ({experiment.samples_saved} answers). The column 'Iterations' shows the number of answers that were used per scenario.",
+                color="info"
+            ) if experiment.early_stopping else None,
             output_table,
         ]
         
@@ -345,9 +439,65 @@ def update_individual_experiment(n_clicks, prompts, models, iterations, temperat
             html.Ul(items)
         ]
 
-        return [loading, results, experiment.model_answers_dict, raw_model_answers]
+        # The answers are kept on the server, the session store only holds their handle
+        return [loading, results, put_result(experiment.model_answers_dict), raw_model_answers]
     
 
+# Callback to stream the results of the finished cells while the experiment is running
+@dash.callback(
+    [
+        Output("partial-output-table-numeric", "data"),
+        Output("partial-output-table-numeric", "columns"),
+        Output("partial-graph-numeric", "figure"),
+        Output("partial-results-shown-numeric", "data"),
+    ],
+    [
+        Input("partial-results-interval-numeric", "n_intervals"),
+    ],
+    [
+        State("live-job-id-numeric", "data"),
+        State("partial-results-shown-numeric", "data"),
+    ],
+    prevent_initial_call=True
+)
+def stream_partial_results(n_intervals, job_id, shown):
+    partial_results = get_partial_results(job_id)
+    
+    # Only update if the job has published new results since the last poll
+    if partial_results is None:
+        raise PreventUpdate
+    is_shown = shown is not None and shown['job_id'] == job_id
+    if is_shown and partial_results['published'] == shown['published']:
+        raise PreventUpdate
+    
+    # The running cells are shown after the finished cells
+    rows = partial_results['rows'] + partial_results['running']
+    df = pd.DataFrame(rows)
+    new_shown = {'job_id': job_id, 'rows': len(partial_results['rows']), 'running': len(partial_results['running']),
+                 'published': partial_results['published']}
+    
+    # Build the table and the figure for the first cells of a job
+    if not is_shown:
+        columns = [{'name': col, 'id': col} for col in df.columns]
+        figure = go.Figure(get_cell_boxes(rows, partial_results['answers']))
+        figure.update_layout(yaxis=dict(title='Answer'), title=dict(text="Answers so far (the experiment is still running)"))
+        return df.to_dict('records'), columns, figure, new_shown
+    
+    # Afterwards, the rows and boxes of the running cells that were shown are replaced by the new finished and running cells
+    table_patch = Patch()
+    figure_patch = Patch()
+    for _ in range(shown['running']):
+        del table_patch[shown['rows']]
+        del figure_patch['data'][shown['rows']]
+    table_patch.extend(df.iloc[shown['rows']:].to_dict('records'))
+    figure_patch['data'].extend([box.to_plotly_json() for box in get_cell_boxes(rows[shown['rows']:], partial_results['answers'])])
+    
+    # Columns of later cells (e.g. percentiles) may be missing in the first rows
+    columns = [{'name': col, 'id': col} for col in df.columns]
+    
+    return table_patch, columns, figure_patch, new_shown
+
+
 # Callback to plot results
 @dash.callback(
     [
@@ -357,8 +507,8 @@ def update_individual_experiment(n_clicks, prompts, models, iterations, temperat
         Input("experiment-data-numeric", "data"),
     ]
 )
-def plot_results(data):
-    df = pd.DataFrame(data)
+def plot_results(handle):
+    df = pd.DataFrame(get_result(handle))
     
     figure = plot_results_numeric(df)
     
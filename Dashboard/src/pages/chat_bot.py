@@ -2,9 +2,10 @@
 import dash
 import dash_bootstrap_components as dbc
 from dash import Input, Output, dcc, html, State
-from openai import OpenAI
-from replicate.client import Client
 
+# Local imports
+from utils.client_registry import client_registry
+from utils.rate_limiter import rate_limiter, estimate_tokens
 
 
 dash.register_page(__name__, path='/chat-bot', name='Chatbot', location='below-experiments')
@@ -208,32 +209,37 @@ def update_chatbot_output(n_clicks, text_input, instruction_input, selected_mode
 
     output = ""
     if n_clicks is not None:
+        # Wait until the rate limit of the model and API key allows the API call
+        rate_limiter.acquire(selected_model, estimate_tokens(text_input, instruction_input, max_tokens=selected_max_tokens or 0),
+                             api_key=replicate_key if selected_model == "llama-2-70b" else openai_key)
+        
         if selected_model == "llama-2-70b":
             
-            replicate = Client(api_token=replicate_key)
-            response = replicate.run(
-                'meta/llama-2-70b-chat:02e509c789964a7ea8736978a43525956ef40397be9033abf9fd2badfe68c9e3',
-                input = {
-                        "system_prompt": f"{instruction_input}",
-                        "temperature": selected_temperature,
-                        "max_new_tokens": selected_max_tokens, 
-                        "prompt": f"{text_input}"
-                            })
-            answer = ""
-            for item in response:
-                answer += item
+            # The pooled client is held until the streamed output is read, so the registry does not close it in between
+            with client_registry.hold("replicate", replicate_key) as replicate:
+                response = replicate.run(
+                    'meta/llama-2-70b-chat:02e509c789964a7ea8736978a43525956ef40397be9033abf9fd2badfe68c9e3',
+                    input = {
+                            "system_prompt": f"{instruction_input}",
+                            "temperature": selected_temperature,
+                            "max_new_tokens": selected_max_tokens, 
+                            "prompt": f"{text_input}"
+                                })
+                answer = ""
+                for item in response:
+                    answer += item
             output = answer
             
         else: 
-            client = OpenAI(api_key=openai_key)
-            response = client.chat.completions.create(
-                    model = "gpt-3.5-turbo", 
-                    max_tokens = selected_max_tokens,
-                    temperature = selected_temperature,
-                    messages = [
-                    {"role": "system", "content": f"{instruction_input}"},        
-                    {"role": "user", "content": f"{text_input}"},
-                        ])
+            with client_registry.hold("openai", openai_key) as client:
+                response = client.chat.completions.create(
+                        model = selected_model, 
+                        max_tokens = selected_max_tokens,
+                        temperature = selected_temperature,
+                        messages = [
+                        {"role": "system", "content": f"{instruction_input}"},        
+                        {"role": "user", "content": f"{text_input}"},
+                            ])
             output = response.choices[0].message.content
         
     return output
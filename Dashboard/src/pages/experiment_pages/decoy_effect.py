@@ -5,9 +5,12 @@ import pandas as pd
 import dash
 from dash import Input, Output, dcc, html
 import plotly.graph_objects as go
-import pickle
 from ast import literal_eval
 from utils.plotting_functions import DE_plot_results
+from utils.prompt_store import prompt_store
+from utils.answer_arrays import load_results
+from utils.result_tables import ResultTable
+from utils.figure_cache import figure_cache
 import dash_bootstrap_components as dbc
 
 
@@ -16,16 +19,11 @@ dash.register_page(__name__, path='/decoy-effect', name='Decoy Effect', location
 
 
 # Load Decoy Effect experiment results
-DE_probs = pd.read_csv("data/Output/DE_probs.csv")
+DE_probs = load_results("data/Output/DE_probs.csv")
+# Index the results by the parameters of the dropdowns
+DE_table = ResultTable(DE_probs, ["Scenario", "Priming", "Reorder", "Model", "Temp"])
 
-# Load Decoy Effect prompts
-with open ("data/Input/DE_prompts.pkl", "rb") as file:
-    DE_prompts = pickle.load(file)
-
-# Load Decoy Effect prompt dictionary
-with open ("data/Input/DE_dictionaries.pkl", "rb") as file:
-    DE_dictionaries = pickle.load(file)
-DE_experiment_prompts_dict = DE_dictionaries[0]
+# The Decoy Effect prompts are loaded from the prompt store when they are displayed for the first time
 
 
 
@@ -176,6 +174,13 @@ layout = [
     )]
 
 
+# The figures of the dropdown combinations are cached, see utils.figure_cache
+def plot_decoy(scenario, priming, reordering, model, temperature):
+    return DE_plot_results(DE_table.get(scenario, priming, reordering, model, temperature))
+
+figure_cache.register_warm_up(plot_decoy, DE_table.keys())
+
+
 # Callback for decoy page
 @dash.callback(
     [Output("decoy-plot-output", "figure"),
@@ -188,10 +193,9 @@ layout = [
      )
 def update_decoy_plot(selected_scenario, selected_priming, selected_reordering, selected_model, selected_temperature):
     # Filter dataframe
-    df = DE_probs[(DE_probs["Scenario"] == selected_scenario) & (DE_probs["Priming"] == selected_priming) &
-                   (DE_probs["Reorder"] == selected_reordering) & (DE_probs["Model"] == selected_model) & (DE_probs["Temp"] == selected_temperature)] 
     # Grab experiment id to look up prompt
-    experiment_id = df["Experiment_id"].iloc[0]
-    prompt = DE_experiment_prompts_dict[experiment_id]
+    experiment_id = DE_table.get_value("Experiment_id", selected_scenario, selected_priming, selected_reordering, selected_model, selected_temperature)
+    prompt = prompt_store.get("DE", "experiment_prompts")[experiment_id]
     prompt = html.P(f"The prompt used in this experiment is: {prompt}")
-    return DE_plot_results(df), prompt 
\ No newline at end of file
+    figure = figure_cache.get(plot_decoy, selected_scenario, selected_priming, selected_reordering, selected_model, selected_temperature)
+    return figure, prompt 
\ No newline at end of file
@@ -4,14 +4,17 @@ import dash
 from dash import Input, Output, dcc, html
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
+from utils.data_cache import data_cache
+from utils.figure_cache import figure_cache
 
 
 dash.register_page(__name__, path='/loss-aversion', name='Loss Aversion', location='experiments')
 
+LOSS_AVERSION_PATH = 'data/Output/Loss_aversion_experiment_with_llama.csv'
 
 # Function for getting data
 def get_loss_aversion_data(selected_temperature):
-    df = pd.read_csv('data/Output/Loss_aversion_experiment_with_llama.csv', index_col=0)
+    df = data_cache.read_csv(LOSS_AVERSION_PATH, index_col=0)
     # Filter data based on selected temperature and results from real experiment
     df = df[(df['Temperature'] == selected_temperature)|
             (df['Model'] == 'Real Experiment')] 
@@ -74,6 +77,10 @@ def plot_loss_aversion(selected_temperature):
     return fig
 
 
+# Figures of the slider values, rendered at startup if the figure cache is warmed up
+figure_cache.register_warm_up(plot_loss_aversion, [(temperature,) for temperature in (0.5, 1, 1.5)],
+                              files=(LOSS_AVERSION_PATH,))
+
 
 # Loss Aversion Page
 layout = [
@@ -164,4 +171,4 @@ layout = [
     [Input("Temperature", "value")]
 )
 def update_loss_averion_plot(selected_temperature):
-    return plot_loss_aversion(selected_temperature)
\ No newline at end of file
+    return figure_cache.get(plot_loss_aversion, selected_temperature, files=(LOSS_AVERSION_PATH,))
\ No newline at end of file
@@ -6,60 +6,31 @@ import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
 from PIL import Image
 from ast import literal_eval
-import pickle
 import os 
 from utils.plotting_functions import PT_plot_results
 from utils.plotting_functions import PT2_plot_results
 from utils.plotting_functions import PT_plot_og_results
+from utils.prompt_store import prompt_store
+from utils.answer_arrays import load_results
+from utils.result_tables import ResultTable
+from utils.figure_cache import figure_cache
 
 
 dash.register_page(__name__, path='/prospect-theory', name='Prospect Theory', location='experiments')
 
 
 # Load in results and graphs of Prospect Theory experiments
-PT_probs = pd.read_csv("data/Output/PT_probs.csv")
+PT_probs = load_results("data/Output/PT_probs.csv")
+# Index the results by the parameters of the dropdowns
+PT_table = ResultTable(PT_probs, ["Scenario", "Priming", "Model", "Temp"])
 
 # Second Prospect Theory experiment
 PT2_probs = pd.read_csv("data/Output/PT2_probs.csv")
+PT2_table = ResultTable(PT2_probs, ["Scenario", "Configuration", "Model", "Temp"])
 PT_og_results = pd.read_csv("data/Input/PT_og_results.csv")
 
 
-
-### Prospect Theory 1 ###
-
-# Prompts for PT experiments
-with open ("data/Input/PT_prompts.pkl", "rb") as file:
-    PT_prompts = pickle.load(file)
-
-
-# Load PT prompt dictionary
-with open ("data/Input/PT_dictionaries.pkl", "rb") as file:
-    PT_dictionaries = pickle.load(file)
-PT_experiment_prompts_dict = PT_dictionaries[0]
-
-
-### Prospect Theory 2 ###
-
-# Scenario 1
-with open("data/Input/PT2_prompts_1.pkl", "rb") as file:
-    PT2_prompts_1 = pickle.load(file)
-
-# Scenario 2
-with open("data/Input/PT2_prompts_2.pkl", "rb") as file:
-    PT2_prompts_2 = pickle.load(file)
-
-# Scenario 3
-with open("data/Input/PT2_prompts_3.pkl", "rb") as file:
-    PT2_prompts_3 = pickle.load(file)
-
-# Scenario 4
-with open("data/Input/PT2_prompts_4.pkl", "rb") as file:
-    PT2_prompts_4 = pickle.load(file)
-
-# Load PT2 prompt dictionary
-with open("data/Input/PT2_dictionaries.pkl", "rb") as file:
-    PT2_dictionaries = pickle.load(file)
-PT2_experiment_prompts_dict = PT2_dictionaries[0]
+# The prompts of the experiments are loaded from the prompt store when they are displayed for the first time
 
 
 # Prospect Page
@@ -645,6 +616,21 @@ html.Div(
 ]
 
 
+### Figures
+# The figures of the dropdown combinations are cached, see utils.figure_cache
+def plot_prospect(scenario, priming, model, temperature):
+    return PT_plot_results(PT_table.get(scenario, priming, model, temperature))
+
+def plot_prospect_two(scenario, configuration, model, temperature):
+    return PT2_plot_results(PT2_table.get(scenario, configuration, model, temperature))
+
+def plot_prospect_two_og():
+    return PT_plot_og_results(PT_og_results)
+
+figure_cache.register_warm_up(plot_prospect, PT_table.keys())
+figure_cache.register_warm_up(plot_prospect_two, PT2_table.keys())
+figure_cache.register_warm_up(plot_prospect_two_og, [()])
+
 
 ### Callback for prospect page
 
@@ -659,14 +645,13 @@ html.Div(
 
 )
 def update_prospect1(selected_priming, selected_model, selected_temperature):
-    df = PT_probs[(PT_probs["Priming"] == selected_priming) & (PT_probs["Model"] == selected_model) &
-                   (PT_probs["Temp"] == selected_temperature) & (PT_probs["Scenario"] == 1)] # select scenario manually!!! 
-    # Grab experiment id to look up prompt
-    experiment_id = df["Experiment_id"].iloc[0]
-    prompt = PT_experiment_prompts_dict[experiment_id]
+    # Grab experiment id to look up prompt (select scenario manually!!!)
+    experiment_id = PT_table.get_value("Experiment_id", 1, selected_priming, selected_model, selected_temperature)
+    prompt = prompt_store.get("PT", "experiment_prompts")[experiment_id]
     prompt = html.P(f"The prompt used in this experiment is: {prompt}")
     print(os.getcwd())
-    return PT_plot_results(df), prompt 
+    figure = figure_cache.get(plot_prospect, 1, selected_priming, selected_model, selected_temperature)
+    return figure, prompt 
 
 # Scenario 2
 @dash.callback(
@@ -678,13 +663,12 @@ def update_prospect1(selected_priming, selected_model, selected_temperature):
 
 )
 def update_prospect2(selected_priming, selected_model, selected_temperature):
-    df = PT_probs[(PT_probs["Priming"] == selected_priming) & (PT_probs["Model"] == selected_model) &
-                   (PT_probs["Temp"] == selected_temperature) & (PT_probs["Scenario"] == 2)] # select scenario manually!!! 
-    # Grab experiment id to look up prompt
-    experiment_id = df["Experiment_id"].iloc[0]
-    prompt = PT_experiment_prompts_dict[experiment_id]
+    # Grab experiment id to look up prompt (select scenario manually!!!)
+    experiment_id = PT_table.get_value("Experiment_id", 2, selected_priming, selected_model, selected_temperature)
+    prompt = prompt_store.get("PT", "experiment_prompts")[experiment_id]
     prompt = html.P(f"The prompt used in this experiment is: {prompt}")
-    return PT_plot_results(df), prompt 
+    figure = figure_cache.get(plot_prospect, 2, selected_priming, selected_model, selected_temperature)
+    return figure, prompt 
 
 # Scenario 3
 @dash.callback(
@@ -696,13 +680,12 @@ def update_prospect2(selected_priming, selected_model, selected_temperature):
 
 )
 def update_prospect3(selected_priming, selected_model, selected_temperature):
-    df = PT_probs[(PT_probs["Priming"] == selected_priming) & (PT_probs["Model"] == selected_model) &
-                   (PT_probs["Temp"] == selected_temperature) & (PT_probs["Scenario"] == 3)] # select scenario manually!!! 
-    # Grab experiment id to look up prompt
-    experiment_id = df["Experiment_id"].iloc[0]
-    prompt = PT_experiment_prompts_dict[experiment_id]
+    # Grab experiment id to look up prompt (select scenario manually!!!)
+    experiment_id = PT_table.get_value("Experiment_id", 3, selected_priming, selected_model, selected_temperature)
+    prompt = prompt_store.get("PT", "experiment_prompts")[experiment_id]
     prompt = html.P(f"The prompt used in this experiment is: {prompt}")
-    return PT_plot_results(df), prompt 
+    figure = figure_cache.get(plot_prospect, 3, selected_priming, selected_model, selected_temperature)
+    return figure, prompt 
 
 # Scenario 4
 @dash.callback(
@@ -714,13 +697,12 @@ def update_prospect3(selected_priming, selected_model, selected_temperature):
 
 )
 def update_prospect4(selected_priming, selected_model, selected_temperature):
-    df = PT_probs[(PT_probs["Priming"] == selected_priming) & (PT_probs["Model"] == selected_model) &
-                   (PT_probs["Temp"] == selected_temperature) & (PT_probs["Scenario"] == 4)] # select scenario manually!!! 
-    # Grab experiment id to look up prompt
-    experiment_id = df["Experiment_id"].iloc[0]
-    prompt = PT_experiment_prompts_dict[experiment_id]
+    # Grab experiment id to look up prompt (select scenario manually!!!)
+    experiment_id = PT_table.get_value("Experiment_id", 4, selected_priming, selected_model, selected_temperature)
+    prompt = prompt_store.get("PT", "experiment_prompts")[experiment_id]
     prompt = html.P(f"The prompt used in this experiment is: {prompt}")
-    return PT_plot_results(df), prompt 
+    figure = figure_cache.get(plot_prospect, 4, selected_priming, selected_model, selected_temperature)
+    return figure, prompt 
 
 ## Experiment 2
 @dash.callback(
@@ -734,11 +716,10 @@ def update_prospect4(selected_priming, selected_model, selected_temperature):
 
 )
 def update_prospect_two(selected_scenario, selected_configuration, selected_model, selected_temperature):
-    df = PT2_probs[(PT2_probs["Scenario"] == selected_scenario) & (PT2_probs["Configuration"] == selected_configuration) &
-                   (PT2_probs["Model"] == selected_model) & (PT2_probs["Temp"] == selected_temperature)] # select scenario manually!!! 
     # Grab experiment id to look up prompt
-    experiment_id = df["Experiment_id"].iloc[0]
-    prompt = PT2_experiment_prompts_dict[experiment_id]
+    experiment_id = PT2_table.get_value("Experiment_id", selected_scenario, selected_configuration, selected_model, selected_temperature)
+    prompt = prompt_store.get("PT2", "experiment_prompts")[experiment_id]
     prompt = html.P(f"The prompt used in this experiment is: {prompt}")
-    og_plot = PT_plot_og_results(PT_og_results) # Also being replotted for every new input right now. Not optimal, but no big issue. 
-    return PT2_plot_results(df), prompt, og_plot 
\ No newline at end of file
+    og_plot = figure_cache.get(plot_prospect_two_og) # Built once and served from the figure cache afterwards
+    figure = figure_cache.get(plot_prospect_two, selected_scenario, selected_configuration, selected_model, selected_temperature)
+    return figure, prompt, og_plot 
\ No newline at end of file
@@ -5,14 +5,18 @@ import dash
 from dash import Input, Output, dcc, html
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
+from utils.data_cache import data_cache
+from utils.figure_cache import figure_cache
 
 
 dash.register_page(__name__, path='/sunk-cost-fallacy', name='Sunk Cost Fallacy', location='experiments')
 
+SUNK_COST_1_PATH = 'data/Output/Sunk_cost_experiment_1_with_llama.csv'
+SUNK_COST_2_PATH = 'data/Output/Sunk_cost_experiment_2_with_llama.csv'
 
 # Function for getting data of Sunk Cost Experiment 1
 def get_sunk_cost_data_1(selected_temperature, selected_sunk_cost):
-    sunk_cost_1 = pd.read_csv('data/Output/Sunk_cost_experiment_1_with_llama.csv', index_col=0)
+    sunk_cost_1 = data_cache.read_csv(SUNK_COST_1_PATH, index_col=0)
     df = sunk_cost_1[(sunk_cost_1['Temperature'] == selected_temperature) & 
                      (sunk_cost_1['Sunk Cost ($)'] == selected_sunk_cost)]
     
@@ -20,7 +24,7 @@ def get_sunk_cost_data_1(selected_temperature, selected_sunk_cost):
 
 # Function for getting data of Sunk Cost Experiment 2
 def get_sunk_cost_data_2(selected_temperature, selected_model):
-    df = pd.read_csv('data/Output/Sunk_cost_experiment_2_with_llama.csv', index_col=0)
+    df = data_cache.read_csv(SUNK_COST_2_PATH, index_col=0)
     # Filter data based on selected temperature and model 
     df = df[(df['Temperature'] == selected_temperature) & 
             (df['Model'] == selected_model) |
@@ -151,6 +155,13 @@ def plot_sunk_cost_2(selected_temperature, selected_model):
     return fig
 
 
+# Figures of the slider and dropdown values, rendered at startup if the figure cache is warmed up
+figure_cache.register_warm_up(plot_sunk_cost_1, [(temperature, sunk_cost) for temperature in (0.5, 1, 1.5)
+                                                 for sunk_cost in (90, 250, 10_000)], files=(SUNK_COST_1_PATH,))
+figure_cache.register_warm_up(plot_sunk_cost_2, [(temperature, model) for temperature in (0.5, 1, 1.5)
+                                                 for model in ('gpt-3.5-turbo-1106', 'gpt-4-1106-preview', 'llama-2-70b')],
+                              files=(SUNK_COST_2_PATH,))
+
 
 # Sunk Cost Fallacy Page
 layout = [
@@ -364,7 +375,7 @@ layout = [
      Input("Sunk-Cost", "value")]
 )
 def update_sunk_cost_plot_1(selected_temperature, selected_sunk_cost):
-    figure = plot_sunk_cost_1(selected_temperature, selected_sunk_cost)
+    figure = figure_cache.get(plot_sunk_cost_1, selected_temperature, selected_sunk_cost, files=(SUNK_COST_1_PATH,))
     
     # Update the description of Experiment 1
     experiment_description = [
@@ -392,4 +403,4 @@ def update_sunk_cost_plot_1(selected_temperature, selected_sunk_cost):
      Input("Model", "value")]
 )
 def update_sunk_cost_plot_2(selected_temperature, selected_model):
-    return plot_sunk_cost_2(selected_temperature, selected_model)
\ No newline at end of file
+    return figure_cache.get(plot_sunk_cost_2, selected_temperature, selected_model, files=(SUNK_COST_2_PATH,))
\ No newline at end of file
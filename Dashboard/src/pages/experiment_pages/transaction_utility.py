@@ -4,12 +4,15 @@ import dash
 from dash import Input, Output, dcc, html
 import plotly.graph_objects as go
 from PIL import Image
-import pickle
 from ast import literal_eval
 import pandas as pd
 import numpy as np
 from collections import Counter
 from utils.plotting_functions import TU_plot_results, TU2_plot_results, TU3_plot_results, extract_dollar_amounts
+from utils.prompt_store import prompt_store
+from utils.aggregates import load_aggregates
+from utils.result_tables import ResultTable
+from utils.figure_cache import figure_cache
 import dash_bootstrap_components as dbc
 
 # TU3 will actually be second, since it is a continuation of TU1
@@ -18,54 +21,27 @@ dash.register_page(__name__, path='/transaction-utility', name='Transaction Util
 
 ##### Transaction Utility #####
 
-# Load experiment results 
-TU_results = pd.read_csv('data/Output/TU_results.csv')
+# Load precomputed aggregates of the experiment results (see utils.aggregates)
+TU_results = load_aggregates('TU')
+# Index the results by the parameters of the dropdowns
+TU_table = ResultTable(TU_results, ["Initial_cost", "Orientation_price", "Buyer", "Model", "Temperature"])
 
-# Load prompts
-with open("data/Input/TU_prompts.pkl", "rb") as file:
-    TU_prompts = pickle.load(file)
-
-# Load TU prompt dictionary
-with open("data/Input/TU_dictionaries.pkl", "rb") as file:
-    TU_dictionaries = pickle.load(file)
-TU_experiment_prompts_dict = TU_dictionaries[0]
+# The prompts are loaded from the prompt store when they are displayed for the first time
 
 
 ##### Transaction Utility 2 #####
 
-# Load experiment results
-TU2_results = pd.read_csv('data/Output/TU2_results.csv')
-
-# Load prompts
-with open("data/Input/TU2_prompts.pkl", "rb") as file:
-    TU2_prompts = pickle.load(file)
-
-# Load TU2 prompt dictionary
-with open("data/Input/TU2_dictionaries.pkl", "rb") as file:
-    TU2_dictionaries = pickle.load(file)
-TU2_experiment_prompts_dict = TU2_dictionaries[0]
-
-
-def extract_dollar_amounts(answers):
-    # Only return values that start with "$"
-    valid_prices = [item for item in answers if item.startswith("$") and item[1:].replace(',', '').replace('.', '').isdigit()] # check if everything after $ is a digit, exlcuding commas
-    # Delete the "$" from the beginning of each price
-    prices = [item.replace('$', '') for item in valid_prices]
-    return prices
+# Load precomputed aggregates of the experiment results (see utils.aggregates)
+TU2_results = load_aggregates('TU2')
+# Index the results by the parameters of the dropdowns
+TU2_table = ResultTable(TU2_results, ["Place", "Income", "Model", "Temperature"])
 
 ##### Transaction Utility 3 #####
 
-# Load experiment results
-TU3_results = pd.read_csv('data/Output/TU3_results.csv')
-
-# Load prompts
-with open("data/Input/TU3_prompts.pkl", "rb") as file:
-    TU3_prompts = pickle.load(file)
-
-# Load TU3 prompt dictionary
-with open("data/Input/TU3_dictionaries.pkl", "rb") as file:
-    TU3_dictionaries = pickle.load(file)
-TU3_experiment_prompts_dict = TU3_dictionaries[0]
+# Load precomputed aggregates of the experiment results (see utils.aggregates)
+TU3_results = load_aggregates('TU3')
+# Index the results by the parameters of the dropdowns, both scenarios share the table
+TU3_table = ResultTable(TU3_results, ["Actual_price", "Initial_cost", "Orientation_price", "Buyer", "Model", "Temperature"])
 
 configurations1 = pd.DataFrame(
     {
@@ -331,6 +307,16 @@ html.Hr(),
                             ),
                         ],
                     ),
+                    # Every answer is only sent to the browser if requested, otherwise the binned prices are shown
+                    dbc.Checklist(
+                        id="tu3-raw-points",
+                        options=[
+                            {"label": "Show raw answers", "value": "raw_points"}
+                        ],
+                        value=[],
+                        switch=True,
+                        inputStyle={'margin-right': '10px'},
+                    ),
                 ],
                 style={'display': 'flex', 'flexDirection': 'column', 'align-items': 'center', 'width': '50%', 'align-self': 'center'},
             ),
@@ -408,6 +394,16 @@ html.Hr(),
                             ),
                         ],
                     ),
+                    # Every answer is only sent to the browser if requested, otherwise the binned prices are shown
+                    dbc.Checklist(
+                        id="tu3-raw-points2",
+                        options=[
+                            {"label": "Show raw answers", "value": "raw_points"}
+                        ],
+                        value=[],
+                        switch=True,
+                        inputStyle={'margin-right': '10px'},
+                    ),
                 ],
                 style={'display': 'flex', 'flexDirection': 'column', 'align-items': 'center', 'width': '50%', 'align-self': 'center'},
             ),
@@ -537,6 +533,16 @@ html.Hr(),
                             ),
                         ],
                     ),
+                    # Every answer is only sent to the browser if requested, otherwise the binned prices are shown
+                    dbc.Checklist(
+                        id="tu2-raw-points",
+                        options=[
+                            {"label": "Show raw answers", "value": "raw_points"}
+                        ],
+                        value=[],
+                        switch=True,
+                        inputStyle={'margin-right': '10px'},
+                    ),
                 ],
                 style={'display': 'flex', 'flexDirection': 'column', 'align-items': 'center', 'width': '50%', 'align-self': 'center'},
             ),
@@ -553,6 +559,23 @@ html.Hr(),
 
 
 
+### Figures ###
+# The figures of the dropdown combinations are cached, see utils.figure_cache
+def plot_tu1(initial_costs, orientation_price, buyer, model, temperature):
+    return TU_plot_results(TU_table.get(initial_costs, orientation_price, buyer, model, temperature))
+
+def plot_tu2(place, income, model, temperature, raw_points=False):
+    return TU2_plot_results(TU2_table.get(place, income, model, temperature), raw_points=raw_points)
+
+def plot_tu3(actual_price, initial_costs, orientation_price, buyer, model, temperature, raw_points=False):
+    return TU3_plot_results(TU3_table.get(actual_price, initial_costs, orientation_price, buyer, model, temperature), raw_points=raw_points)
+
+figure_cache.register_warm_up(plot_tu1, TU_table.keys())
+# Only the binned figures are rendered ahead, the raw answers are built on request
+figure_cache.register_warm_up(plot_tu2, [key + (False,) for key in TU2_table.keys()])
+figure_cache.register_warm_up(plot_tu3, [key + (False,) for key in TU3_table.keys()])
+
+
 ### Callback ###
 
 ### Experiment 1
@@ -571,12 +594,11 @@ html.Hr(),
 
 def update_tu1(initial_costs, orientation_price, selected_buyer, selected_model, selected_temperature):
     # Get prompt
-    df = TU_results[(TU_results["Initial_cost"] == initial_costs) & (TU_results["Orientation_price"] == orientation_price) & (TU_results["Buyer"] == selected_buyer) &
-                    (TU_results["Model"] == selected_model) & (TU_results["Temperature"] == selected_temperature)]            
-    experiment_id = df["Experiment_id"].iloc[0]
-    prompt = TU_experiment_prompts_dict[experiment_id]
+    experiment_id = TU_table.get_value("Experiment_id", initial_costs, orientation_price, selected_buyer, selected_model, selected_temperature)
+    prompt = prompt_store.get("TU", "experiment_prompts")[experiment_id]
     prompt = html.P(f"The prompt used in this experiment is: {prompt}")
-    return TU_plot_results(df), prompt
+    figure = figure_cache.get(plot_tu1, initial_costs, orientation_price, selected_buyer, selected_model, selected_temperature)
+    return figure, prompt
 
 
 ### Experiment 3: Scenario 1
@@ -588,18 +610,18 @@ def update_tu1(initial_costs, orientation_price, selected_buyer, selected_model,
         Input("tu3-buyer-dropdown", "value"),
         Input("tu3-language-model-dropdown", "value"),
         Input("tu3-temperature-slider", "value"),
+        Input("tu3-raw-points", "value"),
     ],
 )
 
 
-def update_tu3(initial_costs, orientation_price, selected_buyer, selected_model, selected_temperature):
+def update_tu3(initial_costs, orientation_price, selected_buyer, selected_model, selected_temperature, raw_points):
     # Subset df (manually select actual price to be 5 * Pi)
-    df = TU3_results[(TU3_results["Actual_price"] == 15.71) & (TU3_results["Initial_cost"] == initial_costs) & (TU3_results["Orientation_price"] == orientation_price)
-                  & (TU3_results["Buyer"] == selected_buyer) & (TU3_results["Model"] == selected_model) & (TU3_results["Temperature"] == selected_temperature)]        
-    experiment_id = df["Experiment_id"].iloc[0]
-    prompt = TU3_experiment_prompts_dict[experiment_id]
+    experiment_id = TU3_table.get_value("Experiment_id", 15.71, initial_costs, orientation_price, selected_buyer, selected_model, selected_temperature)
+    prompt = prompt_store.get("TU3", "experiment_prompts")[experiment_id]
     prompt = html.P(f"The prompt used in this experiment is: {prompt}")
-    return TU3_plot_results(df), prompt
+    figure = figure_cache.get(plot_tu3, 15.71, initial_costs, orientation_price, selected_buyer, selected_model, selected_temperature, bool(raw_points))
+    return figure, prompt
 
 
 ### Experiment 3: Scenario 2
@@ -611,17 +633,17 @@ def update_tu3(initial_costs, orientation_price, selected_buyer, selected_model,
         Input("tu3-buyer-dropdown2", "value"),
         Input("tu3-language-model-dropdown2", "value"),
         Input("tu3-temperature-slider2", "value"),
+        Input("tu3-raw-points2", "value"),
     ],
 )
 
-def update_tu3_2(initial_costs, orientation_price, selected_buyer, selected_model, selected_temperature):
+def update_tu3_2(initial_costs, orientation_price, selected_buyer, selected_model, selected_temperature, raw_points):
     # Subset df (manually select actual price to be 50)
-    df = TU3_results[(TU3_results["Actual_price"] == 50) & (TU3_results["Initial_cost"] == initial_costs) & (TU3_results["Orientation_price"] == orientation_price)
-                  & (TU3_results["Buyer"] == selected_buyer) & (TU3_results["Model"] == selected_model) & (TU3_results["Temperature"] == selected_temperature)]        
-    experiment_id = df["Experiment_id"].iloc[0]
-    prompt = TU3_experiment_prompts_dict[experiment_id]
+    experiment_id = TU3_table.get_value("Experiment_id", 50, initial_costs, orientation_price, selected_buyer, selected_model, selected_temperature)
+    prompt = prompt_store.get("TU3", "experiment_prompts")[experiment_id]
     prompt = html.P(f"The prompt used in this experiment is: {prompt}")
-    return TU3_plot_results(df), prompt
+    figure = figure_cache.get(plot_tu3, 50, initial_costs, orientation_price, selected_buyer, selected_model, selected_temperature, bool(raw_points))
+    return figure, prompt
 
 
 
@@ -635,13 +657,13 @@ def update_tu3_2(initial_costs, orientation_price, selected_buyer, selected_mode
         Input("tu2-income-dropdown", "value"),
         Input("tu2-language-model-dropdown", "value"),
         Input("tu2-temperature-slider", "value"),
+        Input("tu2-raw-points", "value"),
     ],
 )
 
-def update_tu2(selected_place, selected_income, selected_model, selected_temperature):
-    df = TU2_results[(TU2_results["Place"] == selected_place) & (TU2_results["Income"] == selected_income) & 
-                     (TU2_results["Model"] == selected_model) & (TU2_results["Temperature"] == selected_temperature)]
-    experiment_id = df["Experiment_id"].iloc[0]
-    prompt = TU2_experiment_prompts_dict[experiment_id]
+def update_tu2(selected_place, selected_income, selected_model, selected_temperature, raw_points):
+    experiment_id = TU2_table.get_value("Experiment_id", selected_place, selected_income, selected_model, selected_temperature)
+    prompt = prompt_store.get("TU2", "experiment_prompts")[experiment_id]
     prompt = html.P(f"The prompt used in this experiment is: {prompt}")
-    return TU2_plot_results(df), prompt
\ No newline at end of file
+    figure = figure_cache.get(plot_tu2, selected_place, selected_income, selected_model, selected_temperature, bool(raw_points))
+    return figure, prompt
\ No newline at end of file
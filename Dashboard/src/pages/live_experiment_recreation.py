@@ -29,9 +29,12 @@ from utils.experiment_functions import *
 ## Import every plotting function in utils.plotting_functions
 from utils.plotting_functions import *
 
-dash.register_page(__name__, path='/experiment-recreation', name='Experiment Recreation', location='below-experiments')
+## Import the prompt store, it is only opened when an experiment is selected
+from utils.prompt_store import prompt_store
+from utils.experiment_index import experiment_index
+from utils.result_store import put_result, get_result
 
-configurations = pd.read_csv("data/Input/configurations.csv", index_col = False)
+dash.register_page(__name__, path='/experiment-recreation', name='Experiment Recreation', location='below-experiments')
 
 ### Layout ###
 layout = [
@@ -844,6 +847,14 @@ layout = [
 ]
 
 
+# Function to plot the result of a live run, an empty result (e.g. a run without iterations) gives an empty figure
+def plot_live_results(plot_function, results, experiment):
+    wide = to_wide(results, experiment)
+    if wide.empty:
+        return go.Figure()
+    return plot_function(wide)
+
+
 ##### Callback for download of configuration csv #####
 @dash.callback(
     Output("configuration-csv-download", "data"),
@@ -851,7 +862,8 @@ layout = [
 )
 def download_configuration_csv(n_clicks):
     if n_clicks:
-        return dcc.send_data_frame(configurations.to_csv, "Configurations.csv")
+        # The file is sent as it is, it does not need to be parsed at startup
+        return dcc.send_file("data/Input/configurations.csv", "Configurations.csv")
     else:
         return dash.no_update
 
@@ -866,60 +878,11 @@ def download_configuration_csv(n_clicks):
      Input("prospect1-iteration-input", "value")]
      )
 def update_prospect_prompt(selected_scenario, selected_model, selected_priming, selected_iterations):
-        if selected_scenario == 1 and selected_model == "gpt-3.5-turbo" and selected_priming == 0:
-            experiment_id = "PT_1_1"
-        elif selected_scenario == 2 and selected_model == "gpt-3.5-turbo" and selected_priming == 0:
-            experiment_id = "PT_1_2"
-        elif selected_scenario == 3 and selected_model == "gpt-3.5-turbo" and selected_priming == 0:
-            experiment_id = "PT_1_3"
-        elif selected_scenario == 4 and selected_model == "gpt-3.5-turbo" and selected_priming == 0:
-            experiment_id = "PT_1_4"
-        elif selected_scenario == 1 and selected_model == "gpt-3.5-turbo" and selected_priming == 1:
-            experiment_id = "PT_1_5"
-        elif selected_scenario == 2 and selected_model == "gpt-3.5-turbo" and selected_priming == 1:
-            experiment_id = "PT_1_6"
-        elif selected_scenario == 3 and selected_model == "gpt-3.5-turbo" and selected_priming == 1:
-            experiment_id = "PT_1_7"
-        elif selected_scenario == 4 and selected_model == "gpt-3.5-turbo" and selected_priming == 1:
-            experiment_id = "PT_1_8"
-        elif selected_scenario == 1 and selected_model == "gpt-4-1106-preview" and selected_priming == 0:
-            experiment_id = "PT_2_1"
-        elif selected_scenario == 2 and selected_model == "gpt-4-1106-preview" and selected_priming == 0:
-            experiment_id = "PT_2_2"
-        elif selected_scenario == 3 and selected_model == "gpt-4-1106-preview" and selected_priming == 0:
-             experiment_id = "PT_2_3"
-        elif selected_scenario == 4 and selected_model == "gpt-4-1106-preview" and selected_priming == 0:
-            experiment_id = "PT_2_4"
-        elif selected_scenario == 1 and selected_model == "gpt-4-1106-preview" and selected_priming == 1:
-            experiment_id = "PT_2_5"
-        elif selected_scenario == 2 and selected_model == "gpt-4-1106-preview" and selected_priming == 1:
-            experiment_id = "PT_2_6"
-        elif selected_scenario == 3 and selected_model == "gpt-4-1106-preview" and selected_priming == 1:
-            experiment_id = "PT_2_7"
-        elif selected_scenario == 4 and selected_model == "gpt-4-1106-preview" and selected_priming == 1:
-            experiment_id = "PT_2_8"
-        elif selected_scenario == 1 and selected_model == "llama-2-70b" and selected_priming == 0:
-            experiment_id = "PT_3_1"
-        elif selected_scenario == 2 and selected_model == "llama-2-70b" and selected_priming == 0:
-            experiment_id = "PT_3_2"
-        elif selected_scenario == 3 and selected_model == "llama-2-70b" and selected_priming == 0:
-            experiment_id = "PT_3_3"
-        elif selected_scenario == 4 and selected_model == "llama-2-70b" and selected_priming == 0:
-            experiment_id = "PT_3_4"
-        elif selected_scenario == 1 and selected_model == "llama-2-70b" and selected_priming == 1:
-            experiment_id = "PT_3_5"
-        elif selected_scenario == 2 and selected_model == "llama-2-70b" and selected_priming == 1:
-            experiment_id = "PT_3_6"
-        elif selected_scenario == 3 and selected_model == "llama-2-70b" and selected_priming == 1:
-            experiment_id = "PT_3_7"
-        elif selected_scenario == 4 and selected_model == "llama-2-70b" and selected_priming == 1:
-            experiment_id = "PT_3_8"
-        else:
-            experiment_id = None
-
-        text = PT_experiment_prompts_dict[experiment_id]
+        experiment_id = experiment_index.get_id("PT", selected_scenario, selected_model, selected_priming)
+
+        text = prompt_store.get("PT", "experiment_prompts")[experiment_id]
         costs = cost_estimate(text, selected_model, selected_iterations)
-        prompt = html.P([f"The prompt used in this experiment is: {PT_experiment_prompts_dict[experiment_id]}",
+        prompt = html.P([f"The prompt used in this experiment is: {text}",
                          html.Br(),
                         f"The total costs of running this experiment are estimated to be ${np.round(costs, 6)}."])
         return prompt, experiment_id
@@ -939,13 +902,10 @@ def update_prospect_prompt(selected_scenario, selected_model, selected_priming,
 
 def prospect_run_experiment(n_clicks, selected_model, selected_iterations, selected_temperature, openai_key, replicate_token, experiment_id):
     if n_clicks is not None:  
-        # Run Experiment for selected parameters
-        if selected_model == "llama-2-70b":
-            results, probs = PT_run_experiment_llama_dashboard(experiment_id, selected_iterations, selected_temperature, replicate_token)
-        else:
-            results, probs = PT_run_experiment_dashboard(experiment_id, selected_iterations, selected_temperature, openai_key)
+        # Run Experiment for selected parameters, the model is part of the experiment id
+        results = run_experiment_dashboard("PT", experiment_id, selected_iterations, selected_temperature, openai_key, replicate_token)
         n_clicks = None
-        return PT_plot_results(probs), results.to_json(date_format='iso', orient='split')
+        return plot_live_results(PT_plot_results, results, "PT"), put_result(results)
 
     
 # Callback for PT download
@@ -955,9 +915,9 @@ def prospect_run_experiment(n_clicks, selected_model, selected_iterations, selec
     [State('prospect1-data-store', 'data')]
 )
 def prospect_download_csv(n_clicks, stored_data):
-    if n_clicks:
-        # Convert stored data back to dataframe
-        stored_df = pd.read_json(StringIO(stored_data), orient='split')
+    # The store only holds the handle of the results, which are kept on the server
+    stored_df = get_result(stored_data) if n_clicks else None
+    if stored_df is not None:
         return dcc.send_data_frame(stored_df.to_csv, "PT_results.csv")
     else:
         return dash.no_update
@@ -974,156 +934,11 @@ def prospect_download_csv(n_clicks, stored_data):
 )
 
 def update_prospect2_prompt(selected_scenario, selected_configuration, selected_model, selected_iterations):
-        if selected_scenario == 1 and selected_model == "gpt-3.5-turbo" and selected_configuration == 1:
-            experiment_id = "PT2_1_1_1"
-        elif selected_scenario == 1 and selected_model == "gpt-3.5-turbo" and selected_configuration == 2:
-            experiment_id = "PT2_1_1_2"
-        elif selected_scenario == 1 and selected_model == "gpt-3.5-turbo" and selected_configuration == 3:
-            experiment_id = "PT2_1_1_3"
-        elif selected_scenario == 1 and selected_model == "gpt-3.5-turbo" and selected_configuration == 4:
-            experiment_id = "PT2_1_1_4"
-        elif selected_scenario == 1 and selected_model == "gpt-3.5-turbo" and selected_configuration == 5:
-            experiment_id = "PT2_1_1_5"
-        elif selected_scenario == 1 and selected_model == "gpt-3.5-turbo" and selected_configuration == 6:
-            experiment_id = "PT2_1_1_6"
-        elif selected_scenario == 2 and selected_model == "gpt-3.5-turbo" and selected_configuration == 1:
-            experiment_id = "PT2_2_1_1"
-        elif selected_scenario == 2 and selected_model == "gpt-3.5-turbo" and selected_configuration == 2:
-            experiment_id = "PT2_2_1_2"
-        elif selected_scenario == 2 and selected_model == "gpt-3.5-turbo" and selected_configuration == 3:
-            experiment_id = "PT2_2_1_3"
-        elif selected_scenario == 2 and selected_model == "gpt-3.5-turbo" and selected_configuration == 4:
-            experiment_id = "PT2_2_1_4"
-        elif selected_scenario == 2 and selected_model == "gpt-3.5-turbo" and selected_configuration == 5:
-            experiment_id = "PT2_2_1_5"
-        elif selected_scenario == 2 and selected_model == "gpt-3.5-turbo" and selected_configuration == 6:
-            experiment_id = "PT2_2_1_6"
-        elif selected_scenario == 3 and selected_model == "gpt-3.5-turbo" and selected_configuration == 1:
-            experiment_id = "PT2_3_1_1"
-        elif selected_scenario == 3 and selected_model == "gpt-3.5-turbo" and selected_configuration == 2:
-            experiment_id = "PT2_3_1_2"
-        elif selected_scenario == 3 and selected_model == "gpt-3.5-turbo" and selected_configuration == 3:
-            experiment_id = "PT2_3_1_3"
-        elif selected_scenario == 3 and selected_model == "gpt-3.5-turbo" and selected_configuration == 4:
-            experiment_id = "PT2_3_1_4"
-        elif selected_scenario == 3 and selected_model == "gpt-3.5-turbo" and selected_configuration == 5:
-            experiment_id = "PT2_3_1_5"
-        elif selected_scenario == 3 and selected_model == "gpt-3.5-turbo" and selected_configuration == 6:
-            experiment_id = "PT2_3_1_6"
-        elif selected_scenario == 4 and selected_model == "gpt-3.5-turbo" and selected_configuration == 1:
-            experiment_id = "PT2_4_1_1"
-        elif selected_scenario == 4 and selected_model == "gpt-3.5-turbo" and selected_configuration == 2:
-            experiment_id = "PT2_4_1_2"
-        elif selected_scenario == 4 and selected_model == "gpt-3.5-turbo" and selected_configuration == 3:
-            experiment_id = "PT2_4_1_3"
-        elif selected_scenario == 4 and selected_model == "gpt-3.5-turbo" and selected_configuration == 4:
-            experiment_id = "PT2_4_1_4"
-        elif selected_scenario == 4 and selected_model == "gpt-3.5-turbo" and selected_configuration == 5:
-            experiment_id = "PT2_4_1_5"
-        elif selected_scenario == 4 and selected_model == "gpt-3.5-turbo" and selected_configuration == 6:
-            experiment_id = "PT2_4_1_6"
-        elif selected_scenario == 1 and selected_model == "gpt-4-1106-preview" and selected_configuration == 1:
-            experiment_id = "PT2_1_2_1"
-        elif selected_scenario == 1 and selected_model == "gpt-4-1106-preview" and selected_configuration == 2:
-            experiment_id = "PT2_1_2_2"
-        elif selected_scenario == 1 and selected_model == "gpt-4-1106-preview" and selected_configuration == 3:
-            experiment_id = "PT2_1_2_3"
-        elif selected_scenario == 1 and selected_model == "gpt-4-1106-preview" and selected_configuration == 4:
-            experiment_id = "PT2_1_2_4"
-        elif selected_scenario == 1 and selected_model == "gpt-4-1106-preview" and selected_configuration == 5:
-            experiment_id = "PT2_1_2_5"
-        elif selected_scenario == 1 and selected_model == "gpt-4-1106-preview" and selected_configuration == 6:
-            experiment_id = "PT2_1_2_6"
-        elif selected_scenario == 2 and selected_model == "gpt-4-1106-preview" and selected_configuration == 1:
-            experiment_id = "PT2_2_2_1"
-        elif selected_scenario == 2 and selected_model == "gpt-4-1106-preview" and selected_configuration == 2:
-            experiment_id = "PT2_2_2_2"
-        elif selected_scenario == 2 and selected_model == "gpt-4-1106-preview" and selected_configuration == 3:
-            experiment_id = "PT2_2_2_3"
-        elif selected_scenario == 2 and selected_model == "gpt-4-1106-preview" and selected_configuration == 4:
-            experiment_id = "PT2_2_2_4"
-        elif selected_scenario == 2 and selected_model == "gpt-4-1106-preview" and selected_configuration == 5:
-            experiment_id = "PT2_2_2_5"
-        elif selected_scenario == 2 and selected_model == "gpt-4-1106-preview" and selected_configuration == 6:
-            experiment_id = "PT2_2_2_6"
-        elif selected_scenario == 3 and selected_model == "gpt-4-1106-preview" and selected_configuration == 1:
-            experiment_id = "PT2_3_2_1"
-        elif selected_scenario == 3 and selected_model == "gpt-4-1106-preview" and selected_configuration == 2:
-            experiment_id = "PT2_3_2_2"
-        elif selected_scenario == 3 and selected_model == "gpt-4-1106-preview" and selected_configuration == 3:
-            experiment_id = "PT2_3_2_3"
-        elif selected_scenario == 3 and selected_model == "gpt-4-1106-preview" and selected_configuration == 4:
-            experiment_id = "PT2_3_2_4"
-        elif selected_scenario == 3 and selected_model == "gpt-4-1106-preview" and selected_configuration == 5:
-            experiment_id = "PT2_3_2_5"
-        elif selected_scenario == 3 and selected_model == "gpt-4-1106-preview" and selected_configuration == 6:
-            experiment_id = "PT2_3_2_6"
-        elif selected_scenario == 4 and selected_model == "gpt-4-1106-preview" and selected_configuration == 1:
-            experiment_id = "PT2_4_2_1"
-        elif selected_scenario == 4 and selected_model == "gpt-4-1106-preview" and selected_configuration == 2:
-            experiment_id = "PT2_4_2_2"
-        elif selected_scenario == 4 and selected_model == "gpt-4-1106-preview" and selected_configuration == 3:
-            experiment_id = "PT2_4_2_3"
-        elif selected_scenario == 4 and selected_model == "gpt-4-1106-preview" and selected_configuration == 4:
-            experiment_id = "PT2_4_2_4"
-        elif selected_scenario == 4 and selected_model == "gpt-4-1106-preview" and selected_configuration == 5:
-            experiment_id = "PT2_4_2_5"
-        elif selected_scenario == 4 and selected_model == "gpt-4-1106-preview" and selected_configuration == 6:
-            experiment_id = "PT2_4_2_6"
-        elif selected_scenario == 1 and selected_model == "llama-2-70b" and selected_configuration == 1:
-            experiment_id = "PT2_1_3_1"
-        elif selected_scenario == 1 and selected_model == "llama-2-70b" and selected_configuration == 2:
-            experiment_id = "PT2_1_3_2"
-        elif selected_scenario == 1 and selected_model == "llama-2-70b" and selected_configuration == 3:
-            experiment_id = "PT2_1_3_3"
-        elif selected_scenario == 1 and selected_model == "llama-2-70b" and selected_configuration == 4:    
-            experiment_id = "PT2_1_3_4"
-        elif selected_scenario == 1 and selected_model == "llama-2-70b" and selected_configuration == 5:
-            experiment_id = "PT2_1_3_5"
-        elif selected_scenario == 1 and selected_model == "llama-2-70b" and selected_configuration == 6:
-            experiment_id = "PT2_1_3_6"
-        elif selected_scenario == 2 and selected_model == "llama-2-70b" and selected_configuration == 1:
-            experiment_id = "PT2_2_3_1"
-        elif selected_scenario == 2 and selected_model == "llama-2-70b" and selected_configuration == 2:
-            experiment_id = "PT2_2_3_2"
-        elif selected_scenario == 2 and selected_model == "llama-2-70b" and selected_configuration == 3:
-            experiment_id = "PT2_2_3_3"
-        elif selected_scenario == 2 and selected_model == "llama-2-70b" and selected_configuration == 4:
-            experiment_id = "PT2_2_3_4"
-        elif selected_scenario == 2 and selected_model == "llama-2-70b" and selected_configuration == 5:
-            experiment_id = "PT2_2_3_5"
-        elif selected_scenario == 2 and selected_model == "llama-2-70b" and selected_configuration == 6:
-            experiment_id = "PT2_2_3_6"
-        elif selected_scenario == 3 and selected_model == "llama-2-70b" and selected_configuration == 1:
-            experiment_id = "PT2_3_3_1"
-        elif selected_scenario == 3 and selected_model == "llama-2-70b" and selected_configuration == 2:
-            experiment_id = "PT2_3_3_2"
-        elif selected_scenario == 3 and selected_model == "llama-2-70b" and selected_configuration == 3:
-            experiment_id = "PT2_3_3_3"
-        elif selected_scenario == 3 and selected_model == "llama-2-70b" and selected_configuration == 4:
-            experiment_id = "PT2_3_3_4"
-        elif selected_scenario == 3 and selected_model == "llama-2-70b" and selected_configuration == 5:
-            experiment_id = "PT2_3_3_5"
-        elif selected_scenario == 3 and selected_model == "llama-2-70b" and selected_configuration == 6:
-            experiment_id = "PT2_3_3_6"
-        elif selected_scenario == 4 and selected_model == "llama-2-70b" and selected_configuration == 1:
-            experiment_id = "PT2_4_3_1"
-        elif selected_scenario == 4 and selected_model == "llama-2-70b" and selected_configuration == 2:
-            experiment_id = "PT2_4_3_2"
-        elif selected_scenario == 4 and selected_model == "llama-2-70b" and selected_configuration == 3:
-            experiment_id = "PT2_4_3_3"
-        elif selected_scenario == 4 and selected_model == "llama-2-70b" and selected_configuration == 4:
-            experiment_id = "PT2_4_3_4"
-        elif selected_scenario == 4 and selected_model == "llama-2-70b" and selected_configuration == 5:
-            experiment_id = "PT2_4_3_5"
-        elif selected_scenario == 4 and selected_model == "llama-2-70b" and selected_configuration == 6:
-            experiment_id = "PT2_4_3_6"
-        else:
-            experiment_id = None
-
-        text = PT2_experiment_prompts_dict[experiment_id]
+        experiment_id = experiment_index.get_id("PT2", selected_scenario, selected_configuration, selected_model)
+
+        text = prompt_store.get("PT2", "experiment_prompts")[experiment_id]
         costs = cost_estimate(text, selected_model, selected_iterations)
-        prompt = html.P([f"The prompt used in this experiment is: {PT2_experiment_prompts_dict[experiment_id]}",
+        prompt = html.P([f"The prompt used in this experiment is: {text}",
                          html.Br(),
                         f"The total costs of running this experiment are estimated to be ${np.round(costs, 6)}."])
         return prompt, experiment_id
@@ -1142,13 +957,10 @@ def update_prospect2_prompt(selected_scenario, selected_configuration, selected_
 )
 def prospect2_run_experiment(n_clicks, selected_model, selected_iterations, selected_temperature, openai_key, replicate_token, experiment_id):
     if n_clicks is not None:  
-        # Run Experiment for selected parameters
-        if selected_model == "llama-2-70b":
-            results, probs = PT2_run_experiment_llama_dashboard(experiment_id, selected_iterations, selected_temperature, replicate_token)
-        else:
-            results, probs = PT2_run_experiment_dashboard(experiment_id, selected_iterations, selected_temperature, openai_key)
+        # Run Experiment for selected parameters, the model is part of the experiment id
+        results = run_experiment_dashboard("PT2", experiment_id, selected_iterations, selected_temperature, openai_key, replicate_token)
         n_clicks = None
-        return PT2_plot_results(probs), results.to_json(date_format='iso', orient='split')
+        return plot_live_results(PT2_plot_results, results, "PT2"), put_result(results)
     
 # Callback for PT2 download
 @dash.callback(
@@ -1157,9 +969,9 @@ def prospect2_run_experiment(n_clicks, selected_model, selected_iterations, sele
     [State('prospect2-data-store', 'data')]
 )
 def download_csv(n_clicks, stored_data):
-    if n_clicks:
-        # Convert stored data back to dataframe
-        stored_df = pd.read_json(StringIO(stored_data), orient='split')
+    # The store only holds the handle of the results, which are kept on the server
+    stored_df = get_result(stored_data) if n_clicks else None
+    if stored_df is not None:
         return dcc.send_data_frame(stored_df.to_csv, "PT2_results.csv")
     else:
         return dash.no_update
@@ -1178,58 +990,11 @@ def download_csv(n_clicks, stored_data):
      )
 
 def update_decoy_prompt(selected_scenario, selected_priming, selected_reordering, selected_model, selected_iterations):
-    if selected_scenario == 1 and selected_model == "gpt-3.5-turbo" and selected_priming == 0 and selected_reordering == 0:
-        experiment_id = "DE_1_1"
-    elif selected_scenario == 2 and selected_model == "gpt-3.5-turbo" and selected_priming == 0 and selected_reordering == 0:
-        experiment_id = "DE_1_2"
-    elif selected_scenario == 1 and selected_model == "gpt-3.5-turbo" and selected_priming == 1 and selected_reordering == 0:
-        experiment_id = "DE_1_3"
-    elif selected_scenario == 2 and selected_model == "gpt-3.5-turbo" and selected_priming == 1 and selected_reordering == 0:
-        experiment_id = "DE_1_4"
-    elif selected_scenario == 1 and selected_model == "gpt-3.5-turbo" and selected_priming == 0 and selected_reordering == 1:
-        experiment_id = "DE_1_5"
-    elif selected_scenario == 2 and selected_model == "gpt-3.5-turbo" and selected_priming == 0 and selected_reordering == 1:
-        experiment_id = "DE_1_6"
-    elif selected_scenario == 1 and selected_model == "gpt-3.5-turbo" and selected_priming == 1 and selected_reordering == 1:
-        experiment_id = "DE_1_7"
-    elif selected_scenario == 2 and selected_model == "gpt-3.5-turbo" and selected_priming == 1 and selected_reordering == 1:
-        experiment_id = "DE_1_8"
-    elif selected_scenario == 1 and selected_model == "gpt-4-1106-preview" and selected_priming == 0 and selected_reordering == 0:
-        experiment_id = "DE_2_1"
-    elif selected_scenario == 2 and selected_model == "gpt-4-1106-preview" and selected_priming == 0 and selected_reordering == 0:
-        experiment_id = "DE_2_2"
-    elif selected_scenario == 1 and selected_model == "gpt-4-1106-preview" and selected_priming == 1 and selected_reordering == 0:
-        experiment_id = "DE_2_3"
-    elif selected_scenario == 2 and selected_model == "gpt-4-1106-preview" and selected_priming == 1 and selected_reordering == 0:
-        experiment_id = "DE_2_4"
-    elif selected_scenario == 1 and selected_model == "gpt-4-1106-preview" and selected_priming == 0 and selected_reordering == 1:
-        experiment_id = "DE_2_5"
-    elif selected_scenario == 2 and selected_model == "gpt-4-1106-preview" and selected_priming == 0 and selected_reordering == 1:
-        experiment_id = "DE_2_6"
-    elif selected_scenario == 1 and selected_model == "gpt-4-1106-preview" and selected_priming == 1 and selected_reordering == 1:
-        experiment_id = "DE_2_7"
-    elif selected_scenario == 2 and selected_model == "gpt-4-1106-preview" and selected_priming == 1 and selected_reordering == 1:
-        experiment_id = "DE_2_8"
-    elif selected_scenario == 1 and selected_model == "llama-2-70b" and selected_priming == 0 and selected_reordering == 0:
-        experiment_id = "DE_3_1"
-    elif selected_scenario == 2 and selected_model == "llama-2-70b" and selected_priming == 0 and selected_reordering == 0:
-        experiment_id = "DE_3_2"
-    elif selected_scenario == 1 and selected_model == "llama-2-70b" and selected_priming == 1 and selected_reordering == 0:
-        experiment_id = "DE_3_3"
-    elif selected_scenario == 2 and selected_model == "llama-2-70b" and selected_priming == 1 and selected_reordering == 0:
-        experiment_id = "DE_3_4"
-    elif selected_scenario == 1 and selected_model == "llama-2-70b" and selected_priming == 0 and selected_reordering == 1:
-        experiment_id = "DE_3_5"
-    elif selected_scenario == 2 and selected_model == "llama-2-70b" and selected_priming == 0 and selected_reordering == 1:
-        experiment_id = "DE_3_6"
-    elif selected_scenario == 1 and selected_model == "llama-2-70b" and selected_priming == 1 and selected_reordering == 1:
-        experiment_id = "DE_3_7"
-    elif selected_scenario == 2 and selected_model == "llama-2-70b" and selected_priming == 1 and selected_reordering == 1:
-        experiment_id = "DE_3_8"
-
-    text = DE_experiment_prompts_dict[experiment_id]
+    experiment_id = experiment_index.get_id("DE", selected_scenario, selected_priming, selected_reordering, selected_model)
+
+    text = prompt_store.get("DE", "experiment_prompts")[experiment_id]
     costs = cost_estimate(text, selected_model, selected_iterations)
-    prompt = html.P([f"The prompt used in this experiment is: {DE_experiment_prompts_dict[experiment_id]}",
+    prompt = html.P([f"The prompt used in this experiment is: {text}",
                          html.Br(),
                         f"The total costs of running this experiment are estimated to be ${np.round(costs, 6)}."])
     return prompt, experiment_id
@@ -1248,14 +1013,11 @@ def update_decoy_prompt(selected_scenario, selected_priming, selected_reordering
 )
 def decoy_run_experiment(n_clicks, selected_model, selected_iterations, selected_temperature, openai_key, replicate_token, experiment_id):
     if n_clicks is not None:      
-        # Run Experiment for selected parameters
-        if selected_model == "llama-2-70b":
-            results, probs = DE_run_experiment_llama_dashboard(experiment_id, selected_iterations, selected_temperature, replicate_token)
-        else:
-            results, probs = DE_run_experiment_dashboard(experiment_id, selected_iterations, selected_temperature, openai_key)
+        # Run Experiment for selected parameters, the model is part of the experiment id
+        results = run_experiment_dashboard("DE", experiment_id, selected_iterations, selected_temperature, openai_key, replicate_token)
         n_clicks = None
 
-        return DE_plot_results(probs), results.to_json(orient='split')
+        return plot_live_results(DE_plot_results, results, "DE"), put_result(results)
     
 # Callback for DE download
 @dash.callback(
@@ -1264,9 +1026,9 @@ def decoy_run_experiment(n_clicks, selected_model, selected_iterations, selected
     [State('decoy-data-store', 'data')]
 )
 def download_csv(n_clicks, stored_data):
-    if n_clicks:
-        # Convert stored data back to dataframe
-        stored_df = pd.read_json(StringIO(stored_data), orient='split')
+    # The store only holds the handle of the results, which are kept on the server
+    stored_df = get_result(stored_data) if n_clicks else None
+    if stored_df is not None:
         return dcc.send_data_frame(stored_df.to_csv, "DE_results.csv")
     else:
         return dash.no_update
@@ -1285,82 +1047,11 @@ def download_csv(n_clicks, stored_data):
 
 def update_tu1_prompt(selected_initial_cost, selected_current_cost, selected_buyer, selected_model, selected_iterations):
 
-    if selected_initial_cost == 0 and selected_current_cost == 5 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU_1_1_1_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 5 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU_1_1_1_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 10 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU_1_1_2_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 10 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU_1_1_2_2"
-    elif selected_initial_cost == 5 and selected_current_cost == 5 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU_1_2_1_1"
-    elif selected_initial_cost == 5 and selected_current_cost == 5 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU_1_2_1_2"
-    elif selected_initial_cost == 5 and selected_current_cost == 10 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU_1_2_2_1"
-    elif selected_initial_cost == 5 and selected_current_cost == 10 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU_1_2_2_2"
-    elif selected_initial_cost == 10 and selected_current_cost == 5 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU_1_3_1_1"
-    elif selected_initial_cost == 10 and selected_current_cost == 5 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU_1_3_1_2"
-    elif selected_initial_cost == 10 and selected_current_cost == 10 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU_1_3_2_1"
-    elif selected_initial_cost == 10 and selected_current_cost == 10 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU_1_3_2_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 5 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU_2_1_1_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 5 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU_2_1_1_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 10 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU_2_1_2_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 10 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU_2_1_2_2"
-    elif selected_initial_cost == 5 and selected_current_cost == 5 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU_2_2_1_1"
-    elif selected_initial_cost == 5 and selected_current_cost == 5 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU_2_2_1_2"
-    elif selected_initial_cost == 5 and selected_current_cost == 10 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU_2_2_2_1"
-    elif selected_initial_cost == 5 and selected_current_cost == 10 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU_2_2_2_2"
-    elif selected_initial_cost == 10 and selected_current_cost == 5 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU_2_3_1_1"
-    elif selected_initial_cost == 10 and selected_current_cost == 5 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU_2_3_1_2"
-    elif selected_initial_cost == 10 and selected_current_cost == 10 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU_2_3_2_1"
-    elif selected_initial_cost == 10 and selected_current_cost == 10 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU_2_3_2_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 5 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU_3_1_1_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 5 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU_3_1_1_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 10 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU_3_1_2_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 10 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU_3_1_2_2"
-    elif selected_initial_cost == 5 and selected_current_cost == 5 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU_3_2_1_1"
-    elif selected_initial_cost == 5 and selected_current_cost == 5 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU_3_2_1_2"
-    elif selected_initial_cost == 5 and selected_current_cost == 10 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU_3_2_2_1"
-    elif selected_initial_cost == 5 and selected_current_cost == 10 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU_3_2_2_2"
-    elif selected_initial_cost == 10 and selected_current_cost == 5 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU_3_3_1_1"
-    elif selected_initial_cost == 10 and selected_current_cost == 5 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU_3_3_1_2"
-    elif selected_initial_cost == 10 and selected_current_cost == 10 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU_3_3_2_1"
-    elif selected_initial_cost == 10 and selected_current_cost == 10 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU_3_3_2_2"
-
-    text = TU_experiment_prompts_dict[experiment_id]
+    experiment_id = experiment_index.get_id("TU", selected_initial_cost, selected_current_cost, selected_buyer, selected_model)
+
+    text = prompt_store.get("TU", "experiment_prompts")[experiment_id]
     costs = cost_estimate(text, selected_model, selected_iterations)
-    prompt = html.P([f"The prompt used in this experiment is: {TU_experiment_prompts_dict[experiment_id]}",
+    prompt = html.P([f"The prompt used in this experiment is: {text}",
                     html.Br(),
                     f"The total costs of running this experiment are estimated to be ${np.round(costs, 6)}."])
     return prompt, experiment_id
@@ -1379,13 +1070,10 @@ def update_tu1_prompt(selected_initial_cost, selected_current_cost, selected_buy
      )
 def tu1_run_experiment(n_clicks, selected_model, selected_iterations, selected_temperature, openai_key, replicate_token, experiment_id):
     if n_clicks is not None:
-        # Run Experiment for selected parameters
-        if selected_model == "llama-2-70b":
-            results = TU_run_experiment_llama_dashboard(experiment_id, selected_iterations, selected_temperature, replicate_token)
-        else:
-            results= TU_run_experiment_dashboard(experiment_id, selected_iterations, selected_temperature, openai_key)
+        # Run Experiment for selected parameters, the model is part of the experiment id
+        results = run_experiment_dashboard("TU", experiment_id, selected_iterations, selected_temperature, openai_key, replicate_token)
         n_clicks = None
-        return TU_plot_results(results), results.to_json(orient='split') 
+        return plot_live_results(TU_plot_results, results, "TU"), put_result(results) 
     
 # Callback for TU1 download
 @dash.callback(
@@ -1394,9 +1082,9 @@ def tu1_run_experiment(n_clicks, selected_model, selected_iterations, selected_t
     [State('tu1-data-store', 'data')]
 )
 def download_csv(n_clicks, stored_data):
-    if n_clicks:
-        # Convert stored data back to dataframe
-        stored_df = pd.read_json(StringIO(stored_data), orient='split')
+    # The store only holds the handle of the results, which are kept on the server
+    stored_df = get_result(stored_data) if n_clicks else None
+    if stored_df is not None:
         return dcc.send_data_frame(stored_df.to_csv, "TU_results.csv")
     else:
         return dash.no_update
@@ -1413,82 +1101,11 @@ def download_csv(n_clicks, stored_data):
      Input("tu3-iteration-input", "value")]
      )
 def update_tu3_prompt(selected_initial_cost, selected_current_cost, selected_buyer, selected_model, selected_iterations):
-    if selected_initial_cost == 0 and selected_current_cost == 15.71 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_1_1_1_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 15.71 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_1_1_1_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 31.42 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_1_1_2_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 31.42 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_1_1_2_2"
-    elif selected_initial_cost == 15.71 and selected_current_cost == 15.71 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_1_2_1_1"
-    elif selected_initial_cost == 15.71 and selected_current_cost == 15.71 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_1_2_1_2"
-    elif selected_initial_cost == 15.71 and selected_current_cost == 31.42 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_1_2_2_1"
-    elif selected_initial_cost == 15.71 and selected_current_cost == 31.42 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_1_2_2_2"
-    elif selected_initial_cost == 31.42 and selected_current_cost == 15.71 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_1_3_1_1"
-    elif selected_initial_cost == 31.42 and selected_current_cost == 15.71 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_1_3_1_2"
-    elif selected_initial_cost == 31.42 and selected_current_cost == 31.42 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_1_3_2_1"
-    elif selected_initial_cost == 31.42 and selected_current_cost == 31.42 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_1_3_2_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 15.71 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_1_1_1_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 15.71 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_1_1_1_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 31.42 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_1_1_2_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 31.42 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_1_1_2_2"
-    elif selected_initial_cost == 15.71 and selected_current_cost == 15.71 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_1_2_1_1"
-    elif selected_initial_cost == 15.71 and selected_current_cost == 15.71 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_1_2_1_2"
-    elif selected_initial_cost == 15.71 and selected_current_cost == 31.42 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_1_2_2_1"
-    elif selected_initial_cost == 15.71 and selected_current_cost == 31.42 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_1_2_2_2"
-    elif selected_initial_cost == 31.42 and selected_current_cost == 15.71 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_1_3_1_1"
-    elif selected_initial_cost == 31.42 and selected_current_cost == 15.71 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_1_3_1_2"
-    elif selected_initial_cost == 31.42 and selected_current_cost == 31.42 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_1_3_2_1"
-    elif selected_initial_cost == 31.42 and selected_current_cost == 31.42 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_1_3_2_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 15.71 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_1_1_1_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 15.71 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_1_1_1_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 31.42 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_1_1_2_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 31.42 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_1_1_2_2"
-    elif selected_initial_cost == 15.71 and selected_current_cost == 15.71 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_1_2_1_1"
-    elif selected_initial_cost == 15.71 and selected_current_cost == 15.71 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_1_2_1_2"
-    elif selected_initial_cost == 15.71 and selected_current_cost == 31.42 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_1_2_2_1"
-    elif selected_initial_cost == 15.71 and selected_current_cost == 31.42 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_1_2_2_2"
-    elif selected_initial_cost == 31.42 and selected_current_cost == 15.71 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_1_3_1_1"
-    elif selected_initial_cost == 31.42 and selected_current_cost == 15.71 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_1_3_1_2"
-    elif selected_initial_cost == 31.42 and selected_current_cost == 31.42 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_1_3_2_1"
-    elif selected_initial_cost == 31.42 and selected_current_cost == 31.42 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_1_3_2_2"
-
-    text = TU3_experiment_prompts_dict[experiment_id]
+    experiment_id = experiment_index.get_id("TU3", selected_initial_cost, selected_current_cost, selected_buyer, selected_model)
+
+    text = prompt_store.get("TU3", "experiment_prompts")[experiment_id]
     costs = cost_estimate(text, selected_model, selected_iterations)
-    prompt = html.P([f"The prompt used in this experiment is: {TU3_experiment_prompts_dict[experiment_id]}",
+    prompt = html.P([f"The prompt used in this experiment is: {text}",
                      html.Br(),
                     f"The total costs of running this experiment are estimated to be ${np.round(costs, 6)}."])
     return prompt, experiment_id
@@ -1507,13 +1124,10 @@ def update_tu3_prompt(selected_initial_cost, selected_current_cost, selected_buy
         )
 def tu3_run_experiment(n_clicks, selected_model, selected_iterations, selected_temperature, openai_key, replicate_token, experiment_id):
     if n_clicks is not None:        
-        # Run Experiment for selected parameters
-        if selected_model == "llama-2-70b":
-            results = TU3_run_experiment_llama_dashboard(experiment_id, selected_iterations, selected_temperature, replicate_token)
-        else:
-            results = TU3_run_experiment_dashboard(experiment_id, selected_iterations, selected_temperature, openai_key)
+        # Run Experiment for selected parameters, the model is part of the experiment id
+        results = run_experiment_dashboard("TU3", experiment_id, selected_iterations, selected_temperature, openai_key, replicate_token)
         n_clicks = None
-        return TU3_plot_results(results), results.to_json(orient='split')
+        return plot_live_results(TU3_plot_results, results, "TU3"), put_result(results)
     
 # Callback for TU3 Scenario 1 download
 @dash.callback(
@@ -1522,9 +1136,9 @@ def tu3_run_experiment(n_clicks, selected_model, selected_iterations, selected_t
     [State('tu3-data-store', 'data')]
 )
 def download_csv(n_clicks, stored_data):
-    if n_clicks:
-        # Convert stored data back to dataframe
-        stored_df = pd.read_json(StringIO(stored_data), orient='split')
+    # The store only holds the handle of the results, which are kept on the server
+    stored_df = get_result(stored_data) if n_clicks else None
+    if stored_df is not None:
         return dcc.send_data_frame(stored_df.to_csv, "TU2_scenario_1_results.csv")
     else:
         return dash.no_update
@@ -1543,82 +1157,11 @@ def download_csv(n_clicks, stored_data):
 )   
 def update_tu3_2_live(selected_initial_cost, selected_current_cost, selected_buyer, selected_model, selected_iterations):
     # Get experiment id based on selected parameters
-    if selected_initial_cost == 0 and selected_current_cost == 50 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_2_1_1_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 50 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_2_1_1_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 100 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_2_1_2_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 100 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_2_1_2_2"
-    elif selected_initial_cost == 50 and selected_current_cost == 50 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_2_2_1_1"
-    elif selected_initial_cost == 50 and selected_current_cost == 50 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_2_2_1_2"
-    elif selected_initial_cost == 50 and selected_current_cost == 100 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_2_2_2_1"
-    elif selected_initial_cost == 50 and selected_current_cost == 100 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_2_2_2_2"
-    elif selected_initial_cost == 100 and selected_current_cost == 50 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_2_3_1_1"
-    elif selected_initial_cost == 100 and selected_current_cost == 50 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_2_3_1_2"
-    elif selected_initial_cost == 100 and selected_current_cost == 100 and selected_buyer == "friend" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_2_3_2_1"
-    elif selected_initial_cost == 100 and selected_current_cost == 100 and selected_buyer == "stranger" and selected_model == "gpt-3.5-turbo":
-        experiment_id = "TU3_1_2_3_2_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 50 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_2_1_1_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 50 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_2_1_1_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 100 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_2_1_2_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 100 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_2_1_2_2"
-    elif selected_initial_cost == 50 and selected_current_cost == 50 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_2_2_1_1"
-    elif selected_initial_cost == 50 and selected_current_cost == 50 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_2_2_1_2"
-    elif selected_initial_cost == 50 and selected_current_cost == 100 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_2_2_2_1"
-    elif selected_initial_cost == 50 and selected_current_cost == 100 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_2_2_2_2"
-    elif selected_initial_cost == 100 and selected_current_cost == 50 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_2_3_1_1"
-    elif selected_initial_cost == 100 and selected_current_cost == 50 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_2_3_1_2"
-    elif selected_initial_cost == 100 and selected_current_cost == 100 and selected_buyer == "friend" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_2_3_2_1"
-    elif selected_initial_cost == 100 and selected_current_cost == 100 and selected_buyer == "stranger" and selected_model == "gpt-4-1106-preview":
-        experiment_id = "TU3_2_2_3_2_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 50 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_2_1_1_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 50 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_2_1_1_2"
-    elif selected_initial_cost == 0 and selected_current_cost == 100 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_2_1_2_1"
-    elif selected_initial_cost == 0 and selected_current_cost == 100 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_2_1_2_2"
-    elif selected_initial_cost == 50 and selected_current_cost == 50 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_2_2_1_1"
-    elif selected_initial_cost == 50 and selected_current_cost == 50 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_2_2_1_2"
-    elif selected_initial_cost == 50 and selected_current_cost == 100 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_2_2_2_1"
-    elif selected_initial_cost == 50 and selected_current_cost == 100 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_2_2_2_2"
-    elif selected_initial_cost == 100 and selected_current_cost == 50 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_2_3_1_1"
-    elif selected_initial_cost == 100 and selected_current_cost == 50 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_2_3_1_2"
-    elif selected_initial_cost == 100 and selected_current_cost == 100 and selected_buyer == "friend" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_2_3_2_1"
-    elif selected_initial_cost == 100 and selected_current_cost == 100 and selected_buyer == "stranger" and selected_model == "llama-2-70b":
-        experiment_id = "TU3_3_2_3_2_2"
-
-    text = TU3_experiment_prompts_dict[experiment_id]
+    experiment_id = experiment_index.get_id("TU3", selected_initial_cost, selected_current_cost, selected_buyer, selected_model)
+
+    text = prompt_store.get("TU3", "experiment_prompts")[experiment_id]
     costs = cost_estimate(text, selected_model, selected_iterations)
-    prompt = html.P([f"The prompt used in this experiment is: {TU3_experiment_prompts_dict[experiment_id]}",
+    prompt = html.P([f"The prompt used in this experiment is: {text}",
                     html.Br(),
                     f"The total costs of running this experiment are estimated to be ${np.round(costs, 6)}."])
     return prompt, experiment_id
@@ -1638,13 +1181,10 @@ def update_tu3_2_live(selected_initial_cost, selected_current_cost, selected_buy
 
 def tu3_run_experiment2(n_clicks, selected_model, selected_iterations, selected_temperature, openai_key, replicate_token, experiment_id):
     if n_clicks is not None:        
-        # Run Experiment for selected parameters
-        if selected_model == "llama-2-70b":
-            results = TU3_run_experiment_llama_dashboard(experiment_id, selected_iterations, selected_temperature, replicate_token)
-        else:
-            results = TU3_run_experiment_dashboard(experiment_id, selected_iterations, selected_temperature, openai_key)
+        # Run Experiment for selected parameters, the model is part of the experiment id
+        results = run_experiment_dashboard("TU3", experiment_id, selected_iterations, selected_temperature, openai_key, replicate_token)
         n_clicks = None
-        return TU3_plot_results(results), results.to_json(orient='split')
+        return plot_live_results(TU3_plot_results, results, "TU3"), put_result(results)
     
     
 # Callback for TU3 Scenario 2 download
@@ -1654,9 +1194,9 @@ def tu3_run_experiment2(n_clicks, selected_model, selected_iterations, selected_
     [State('tu3-data-store2', 'data')]
 )
 def download_csv(n_clicks, stored_data):
-    if n_clicks:
-        # Convert stored data back to dataframe
-        stored_df = pd.read_json(StringIO(stored_data), orient='split')
+    # The store only holds the handle of the results, which are kept on the server
+    stored_df = get_result(stored_data) if n_clicks else None
+    if stored_df is not None:
         return dcc.send_data_frame(stored_df.to_csv, "TU2_scenario_2_results.csv")
     else:
         return dash.no_update
@@ -1672,59 +1212,12 @@ def download_csv(n_clicks, stored_data):
      Input("tu2-iteration-input", "value")]
 )
 def update_tu2_prompt(selected_place, selected_income, selected_model, selected_iterations):
-    if selected_model == "gpt-3.5-turbo" and selected_place == "hotel" and selected_income == "0":
-        experiment_id = "TU2_1_1_1"
-    elif selected_model == "gpt-3.5-turbo" and selected_place == "hotel" and selected_income == "$50k":
-        experiment_id = "TU2_1_1_2"
-    elif selected_model == "gpt-3.5-turbo" and selected_place == "hotel" and selected_income == "$70k":
-        experiment_id = "TU2_1_1_3"
-    elif selected_model == "gpt-3.5-turbo" and selected_place == "hotel" and selected_income == "$120k":
-        experiment_id = "TU2_1_1_4"
-    elif selected_model == "gpt-3.5-turbo" and selected_place == "grocery" and selected_income == "0":
-        experiment_id = "TU2_1_2_1"
-    elif selected_model == "gpt-3.5-turbo" and selected_place == "grocery" and selected_income == "$50k":
-        experiment_id = "TU2_1_2_2"
-    elif selected_model == "gpt-3.5-turbo" and selected_place == "grocery" and selected_income == "$70k":
-        experiment_id = "TU2_1_2_3"
-    elif selected_model == "gpt-3.5-turbo" and selected_place == "grocery" and selected_income == "$120k":
-        experiment_id = "TU2_1_2_4"
-    elif selected_model == "gpt-4-1106-preview" and selected_place == "hotel" and selected_income == "0":
-        experiment_id = "TU2_2_1_1"
-    elif selected_model == "gpt-4-1106-preview" and selected_place == "hotel" and selected_income == "$50k":
-        experiment_id = "TU2_2_1_2"
-    elif selected_model == "gpt-4-1106-preview" and selected_place == "hotel" and selected_income == "$70k":
-        experiment_id = "TU2_2_1_3"
-    elif selected_model == "gpt-4-1106-preview" and selected_place == "hotel" and selected_income == "$120k":
-        experiment_id = "TU2_2_1_4"
-    elif selected_model == "gpt-4-1106-preview" and selected_place == "grocery" and selected_income == "0":
-        experiment_id = "TU2_2_2_1"
-    elif selected_model == "gpt-4-1106-preview" and selected_place == "grocery" and selected_income == "$50k":
-        experiment_id = "TU2_2_2_2"
-    elif selected_model == "gpt-4-1106-preview" and selected_place == "grocery" and selected_income == "$70k":
-        experiment_id = "TU2_2_2_3"
-    elif selected_model == "gpt-4-1106-preview" and selected_place == "grocery" and selected_income == "$120k":
-        experiment_id = "TU2_2_2_4"
-    elif selected_model == "llama-2-70b" and selected_place == "hotel" and selected_income == "0":
-        experiment_id = "TU2_3_1_1"
-    elif selected_model == "llama-2-70b" and selected_place == "hotel" and selected_income == "$50k":
-        experiment_id = "TU2_3_1_2"
-    elif selected_model == "llama-2-70b" and selected_place == "hotel" and selected_income == "$70k":
-        experiment_id = "TU2_3_1_3"
-    elif selected_model == "llama-2-70b" and selected_place == "hotel" and selected_income == "$120k":
-        experiment_id = "TU2_3_1_4"
-    elif selected_model == "llama-2-70b" and selected_place == "grocery" and selected_income == "0":
-        experiment_id = "TU2_3_2_1"
-    elif selected_model == "llama-2-70b" and selected_place == "grocery" and selected_income == "$50k":
-        experiment_id = "TU2_3_2_2"
-    elif selected_model == "llama-2-70b" and selected_place == "grocery" and selected_income == "$70k":
-        experiment_id = "TU2_3_2_3"
-    elif selected_model == "llama-2-70b" and selected_place == "grocery" and selected_income == "$120k":
-        experiment_id = "TU2_3_2_4"
-
-
-    text = TU2_experiment_prompts_dict[experiment_id]
+    experiment_id = experiment_index.get_id("TU2", selected_place, selected_income, selected_model)
+
+
+    text = prompt_store.get("TU2", "experiment_prompts")[experiment_id]
     costs = cost_estimate(text, selected_model, selected_iterations)
-    prompt = html.P([f"The prompt used in this experiment is: {TU2_experiment_prompts_dict[experiment_id]}",
+    prompt = html.P([f"The prompt used in this experiment is: {text}",
                     html.Br(),
                     f"The total costs of running this experiment are estimated to be ${np.round(costs, 6)}."])
     return prompt, experiment_id
@@ -1743,13 +1236,10 @@ def update_tu2_prompt(selected_place, selected_income, selected_model, selected_
         )
 def tu2_run_experiment(n_clicks, selected_model, selected_iterations, selected_temperature, openai_key, replicate_token, experiment_id):
     if n_clicks is not None:
-        # Run Experiment for selected parameters
-        if selected_model == "llama-2-70b":
-            results = TU2_run_experiment_llama_dashboard(experiment_id, selected_iterations, selected_temperature, replicate_token)
-        else:
-            results= TU2_run_experiment_dashboard(experiment_id, selected_iterations, selected_temperature, openai_key)
+        # Run Experiment for selected parameters, the model is part of the experiment id
+        results = run_experiment_dashboard("TU2", experiment_id, selected_iterations, selected_temperature, openai_key, replicate_token)
         n_clicks = None
-        return TU2_plot_results(results), results.to_json(orient='split')
+        return plot_live_results(TU2_plot_results, results, "TU2"), put_result(results)
 
     
 # Callback for TU2 download
@@ -1759,9 +1249,9 @@ def tu2_run_experiment(n_clicks, selected_model, selected_iterations, selected_t
     [State('tu2-data-store', 'data')]
 )
 def download_csv(n_clicks, stored_data):
-    if n_clicks:
-        # Convert stored data back to dataframe
-        stored_df = pd.read_json(StringIO(stored_data), orient='split')
+    # The store only holds the handle of the results, which are kept on the server
+    stored_df = get_result(stored_data) if n_clicks else None
+    if stored_df is not None:
         return dcc.send_data_frame(stored_df.to_csv, "TU3_results.csv")
     else:
         return dash.no_update
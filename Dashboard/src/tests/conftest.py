@@ -0,0 +1,25 @@
+# Shared fixtures of the tests.
+# The experiments use the process-wide rate limiter and response cache, which are stored in data/RateLimits and
+# data/Cache. Every test gets its own instances in its temporary directory, so the tests neither write to the data
+# of the dashboard nor depend on the buckets and answers left by other tests.
+
+# Import required libraries
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.experiment
+import utils.experiment_functions
+from utils.rate_limiter import RateLimiter
+from utils.response_cache import ResponseCache
+
+
+@pytest.fixture(autouse=True)
+def isolated_stores(tmp_path, monkeypatch):
+    rate_limiter = RateLimiter(directory=str(tmp_path / 'rate_limits'))
+    response_cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    for module in (utils.experiment, utils.experiment_functions):
+        monkeypatch.setattr(module, 'rate_limiter', rate_limiter)
+        monkeypatch.setattr(module, 'response_cache', response_cache)
+    return rate_limiter, response_cache
@@ -0,0 +1,65 @@
+# Precomputed aggregates of the transaction utility results against the raw results CSVs.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import shutil
+import sys
+from ast import literal_eval
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.aggregates import AGGREGATE_SOURCES, OUTPUT_DIRECTORY, SOURCE_COLUMN, get_aggregate_path, load_aggregates
+from utils.answer_arrays import parse_prices
+
+
+@pytest.mark.parametrize('experiment', list(AGGREGATE_SOURCES))
+def test_aggregates_match_the_raw_results(experiment):
+    filename, dollar_sign = AGGREGATE_SOURCES[experiment]
+    raw = pd.read_csv(os.path.join(OUTPUT_DIRECTORY, filename))
+    aggregates = load_aggregates(experiment)
+    assert len(aggregates) == len(raw)
+    # The parameters of the cells are kept as they are
+    for column in ["Experiment_id", "Model", "Temperature"]:
+        assert aggregates[column].tolist() == raw[column].tolist()
+
+    for answers, observations, row, stored_observations in zip(raw["Answers"], raw["Obs."], aggregates.itertuples(),
+                                                              aggregates["Obs."]):
+        prices = parse_prices(literal_eval(answers), dollar_sign)
+        values, counts = np.unique(prices, return_counts=True)
+        assert row.Valid == len(prices)
+        np.testing.assert_array_equal(row.Values, values)
+        np.testing.assert_array_equal(row.Counts, counts)
+        if len(prices):
+            assert row.Mean == np.mean(prices)
+            assert row.Median == np.median(prices)
+            assert (row.Q1, row.Q3) == tuple(np.percentile(prices, [25, 75]))
+        # TU and TU2 count the valid prices, TU3 keeps the stored number of observations
+        n_observations = len(prices) if dollar_sign else observations
+        assert stored_observations == n_observations
+        np.testing.assert_allclose(row.Shares, counts / n_observations * 100)
+
+
+def test_aggregates_of_changed_results_are_rebuilt(tmp_path):
+    filename, dollar_sign = AGGREGATE_SOURCES['TU2']
+    shutil.copy(os.path.join(OUTPUT_DIRECTORY, filename), tmp_path)
+    shutil.copy(get_aggregate_path('TU2'), tmp_path)
+    # The results change after the aggregates were built
+    raw = pd.read_csv(tmp_path / filename).iloc[:5]
+    raw.to_csv(tmp_path / filename, index=False)
+
+    aggregates = load_aggregates('TU2', str(tmp_path))
+    assert len(aggregates) == 5
+    assert SOURCE_COLUMN not in aggregates
+    # The rebuilt table is stored for the next start
+    assert len(pd.read_csv(get_aggregate_path('TU2', str(tmp_path)))) == 5
+
+
+def test_aggregates_without_results_are_used_as_they_are(tmp_path):
+    shutil.copy(get_aggregate_path('TU3'), tmp_path)
+    aggregates = load_aggregates('TU3', str(tmp_path))
+    assert aggregates.equals(load_aggregates('TU3'))
@@ -0,0 +1,65 @@
+# Parsing of the numeric answers of the willingness to pay experiments.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.answer_parser import parse_numeric_answer, parse_numeric_answers
+
+
+@pytest.mark.parametrize('answer, value', [
+    ('$5', 5),
+    ('$1,299.50', 1299.5),
+    ('$1,234.50.', 1234.5),
+    ('$.5', 0.5),
+    (' $12 ', 12),
+    ('USD 12', 12),
+    ('US$7', 7),
+    ('12 dollars', 12),
+    ('1 dollar', 1),
+    ('$10-$15', 12.5),
+    ('$10 to 20 dollars', 15),
+])
+def test_amounts_with_a_currency(answer, value):
+    assert parse_numeric_answer(answer) == value
+
+
+@pytest.mark.parametrize('answer', [
+    # Not read as $1.2 or $1,200, abbreviated amounts are not counted
+    '$1.2k',
+    '1.2k',
+    'I would not sell it',
+    '',
+    '$',
+    '$5 or $10',
+    'about $5',
+])
+def test_answers_without_a_single_amount_are_invalid(answer):
+    assert np.isnan(parse_numeric_answer(answer))
+
+
+def test_plain_numbers_are_only_valid_without_the_currency_check():
+    assert np.isnan(parse_numeric_answer('12'))
+    assert parse_numeric_answer('12', currency=False) == 12
+    assert parse_numeric_answer('12.50.', currency=False) == 12.5
+
+
+def test_answers_are_parsed_in_their_order():
+    answers = ['$5', 'no', None, '$5', '10 dollars', np.nan]
+    values, valid = parse_numeric_answers(answers)
+    np.testing.assert_array_equal(values, [5, np.nan, np.nan, 5, 10, np.nan])
+    np.testing.assert_array_equal(valid, [True, False, False, True, True, False])
+
+
+def test_series_and_empty_answers():
+    values, valid = parse_numeric_answers(pd.Series(['$1', '$2']))
+    np.testing.assert_array_equal(values, [1, 2])
+    values, valid = parse_numeric_answers([])
+    assert len(values) == len(valid) == 0
@@ -0,0 +1,59 @@
+# Tally of the answer option labels with the three normalizations.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import math
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.answer_tally import format_failures, normalize_answer, tally_answers
+
+
+LABELS = ['A', 'B', 'C']
+ANSWERS = ['A', 'A', 'B.', '(c)', ' A:', 'I would choose B', 'I choose a house', 'D', '', None]
+
+
+def test_exact_only_counts_the_bare_labels():
+    tally = tally_answers(ANSWERS, LABELS, 'exact')
+    assert tally["Counts"] == {'A': 2, 'B': 0, 'C': 0}
+    assert tally["Valid"] == 2 and tally["Rescued"] == 0
+    assert tally["Failures"] == {'no label': 5, 'unknown label': 1, 'empty': 2}
+
+
+def test_strip_ignores_punctuation_and_case():
+    tally = tally_answers(ANSWERS, LABELS, 'strip')
+    assert tally["Counts"] == {'A': 3, 'B': 1, 'C': 1}
+    assert tally["Rescued"] == 3
+    assert tally["Shares"] == {'A': 0.6, 'B': 0.2, 'C': 0.2}
+    assert tally["Failures"] == {'no label': 2, 'unknown label': 1, 'empty': 2}
+
+
+def test_extract_finds_a_label_that_stands_on_its_own():
+    tally = tally_answers(ANSWERS, LABELS, 'extract')
+    # The article "a" is not taken for the label "A"
+    assert tally["Counts"] == {'A': 3, 'B': 2, 'C': 1}
+    assert tally["Rescued"] == 4
+    assert tally["Failures"] == {'no label': 1, 'unknown label': 1, 'empty': 2}
+
+
+def test_shares_are_nan_without_valid_answers():
+    tally = tally_answers(['no idea'], LABELS)
+    assert tally["Valid"] == 0
+    assert all(math.isnan(share) for share in tally["Shares"].values())
+
+
+def test_single_answers_are_normalized_like_the_tally():
+    assert normalize_answer('**B**', LABELS) == 'B'
+    assert normalize_answer('Because of C', LABELS, 'extract') == 'C'
+    assert normalize_answer(' A', LABELS, 'exact') == ' A'
+    with pytest.raises(ValueError):
+        normalize_answer('A', LABELS, 'fuzzy')
+
+
+def test_failures_are_listed_by_count():
+    assert format_failures({'empty': 1, 'no label': 3}) == 'no label: 3, empty: 1'
+    assert format_failures({}) == ''
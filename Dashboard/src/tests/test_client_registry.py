@@ -0,0 +1,92 @@
+# Reuse and eviction of the pooled API clients.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.client_registry
+from utils.client_registry import ClientRegistry
+
+
+class StubClient:
+
+    def __init__(self, provider, api_key):
+        self.provider = provider
+        self.api_key = api_key
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class StubRegistry(ClientRegistry):
+
+    """Registry of stub clients, no HTTP clients are built."""
+
+    @staticmethod
+    def create_client(provider, api_key):
+        return StubClient(provider, api_key)
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_clients_are_reused_per_provider_and_api_key():
+    registry = StubRegistry()
+    with registry.hold('openai', 'key') as client:
+        pass
+    assert registry.acquire('openai', 'key') is client
+    assert registry.acquire('openai', 'other key') is not client
+    assert registry.acquire('replicate', 'key') is not client
+
+
+def test_evicted_clients_are_only_closed_once_they_are_released():
+    registry = StubRegistry(max_clients=1)
+    held = registry.acquire('openai', 'key')
+    with registry.hold('openai', 'other key') as other:
+        # The held client was evicted by the size cap, but it is still in use
+        assert not held.closed
+        # The evicted client is not handed out again
+        assert registry.acquire('openai', 'key') is not held
+    registry.release(held)
+    assert held.closed
+    # The other client was evicted while it was held, it is closed with its last release
+    assert other.closed
+
+
+def test_idle_clients_are_evicted(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(utils.client_registry.time, 'monotonic', clock)
+    registry = StubRegistry(idle_timeout=60)
+    with registry.hold('openai', 'key') as idle:
+        pass
+    with registry.hold('openai', 'other key') as used:
+        pass
+    clock.now += 30
+    registry.release(registry.acquire('openai', 'other key'))
+    clock.now += 40
+    registry.release(registry.acquire('replicate', 'key'))
+    # Only the client that was not used for 60 seconds is closed
+    assert idle.closed and not used.closed
+    assert registry.acquire('openai', 'other key') is used
+
+
+def test_forked_processes_build_their_own_clients(monkeypatch):
+    registry = StubRegistry()
+    parent = registry.acquire('openai', 'key')
+    monkeypatch.setattr(utils.client_registry.os, 'getpid', lambda: registry.pid + 1)
+    child = registry.acquire('openai', 'key')
+    assert child is not parent
+    # The connections of the parent are left alone
+    registry.release(parent)
+    assert not parent.closed
@@ -0,0 +1,68 @@
+# Caching of the CSV files of the experiment pages.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import sys
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.data_cache
+from utils.data_cache import DataCache
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    # Paths of the files that were read from disk
+    reads = []
+    read_csv = pd.read_csv
+
+    def counting_read_csv(path, **kwargs):
+        reads.append(path)
+        return read_csv(path, **kwargs)
+    monkeypatch.setattr(utils.data_cache.pd, 'read_csv', counting_read_csv)
+    return reads
+
+
+def write_results(path, values):
+    pd.DataFrame({'Model': ['gpt-3.5-turbo'] * len(values), 'Value': values}).to_csv(path, index=False)
+
+
+def test_files_are_read_once(tmp_path, reads):
+    path = str(tmp_path / 'results.csv')
+    write_results(path, [1, 2])
+    cache = DataCache()
+    first = cache.read_csv(path)
+    second = cache.read_csv(path)
+    assert reads == [path]
+    assert first.equals(second)
+    # Different arguments of read_csv are cached separately
+    cache.read_csv(path, index_col=0)
+    assert len(reads) == 2
+
+
+def test_changed_files_are_read_again(tmp_path, reads):
+    path = str(tmp_path / 'results.csv')
+    write_results(path, [1, 2])
+    cache = DataCache()
+    cache.read_csv(path)
+    write_results(path, [1, 2, 3])
+    assert list(cache.read_csv(path)['Value']) == [1, 2, 3]
+    assert len(reads) == 2
+
+
+def test_callers_can_not_change_the_cached_frame(tmp_path):
+    path = str(tmp_path / 'results.csv')
+    write_results(path, [1, 2])
+    cache = DataCache()
+    df = cache.read_csv(path)
+    with pytest.raises(ValueError):
+        df['Value'].values[0] = 5
+    # New or replaced columns only change the copy of the caller
+    df['Value'] = df['Value'] * 2
+    df['Share'] = 0.5
+    assert list(cache.read_csv(path).columns) == ['Model', 'Value']
+    assert list(cache.read_csv(path)['Value']) == [1, 2]
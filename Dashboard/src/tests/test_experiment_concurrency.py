@@ -0,0 +1,137 @@
+# Concurrent and sequential runs of an experiment give the same results.
+# The OpenAI and Replicate clients are replaced by stubs that answer with a label derived from the model and the
+# prompt after a random delay, so the cells finish in a different order than they were started.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.experiment
+from utils.experiment import Experiment
+from utils.response_cache import ResponseCache
+from utils.run_journal import RunJournal
+
+
+LABELS = ['A', 'B', 'C']
+
+
+def get_label(model, prompt):
+    # Same answer for the same model and prompt, independent of the order of the calls
+    return LABELS[sum(map(ord, model + prompt)) % len(LABELS)]
+
+
+def wait():
+    time.sleep(random.uniform(0, 0.01))
+
+
+class StubCompletions:
+
+    def create(self, model, messages, max_tokens, temperature, n, **kwargs):
+        wait()
+        answer = get_label(model, messages[1]['content'])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer), logprobs=None)
+                                        for _ in range(n)])
+
+
+class StubReplicate:
+
+    def run(self, model, input):
+        wait()
+        # The output is streamed in pieces
+        return iter([' ', get_label('llama-2-70b', input['prompt']), '.'])
+
+
+def run_experiment(concurrency, tmp_path, monkeypatch, response_cache=None, **options):
+    # The journal of the run is written to the temporary directory of the test
+    monkeypatch.setattr(utils.experiment, 'RunJournal', lambda run_id: RunJournal(run_id, str(tmp_path)))
+    experiment = Experiment(
+        api_keys={'openai': 'test', 'replicate': 'test'},
+        experiment_type='answer_options',
+        prompts=['Which option do you choose?', 'Which option would you take?', 'Pick one option.'],
+        models=['gpt-3.5-turbo', 'gpt-4-1106-preview', 'llama-2-70b'],
+        iterations=6,
+        temperature=1,
+        num_options=3,
+        answers=['a', 'b', 'c'] * 3,
+        instruction_checklist=[],
+        instructions=['', '', ''],
+        concurrency=concurrency,
+        samples_per_request=2,
+        **options,
+    )
+    experiment.client = SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions()))
+    experiment.replicate = StubReplicate()
+    experiment.response_cache = response_cache
+    experiment.run()
+    return experiment
+
+
+def test_concurrent_run_matches_sequential_run(tmp_path, monkeypatch):
+    sequential = run_experiment(0, tmp_path, monkeypatch)
+    concurrent = run_experiment(Experiment.DEFAULT_CONCURRENCY, tmp_path, monkeypatch)
+
+    # Same rows in the same order (models, then scenarios)
+    assert concurrent.results_df.equals(sequential.results_df)
+    assert list(concurrent.results_df['Model']) == ['gpt-3.5-turbo'] * 3 + ['gpt-4-1106-preview'] * 3 + ['llama-2-70b'] * 3
+    assert list(concurrent.results_df['Scenario']) == [1, 2, 3] * 3
+    # Same answers per model and scenario, in the same order
+    assert concurrent.raw_model_answers_dict == sequential.raw_model_answers_dict
+    assert list(concurrent.raw_model_answers_dict) == ['gpt-3.5-turbo', 'gpt-4-1106-preview', 'llama-2-70b']
+    assert all(len(answers) == 6 for cells in concurrent.raw_model_answers_dict.values() for answers in cells.values())
+
+
+def test_running_cells_are_reported_after_every_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(Experiment, 'BATCH_CALLBACK_INTERVAL', 0)
+    reports = []
+    run = Experiment.run
+    
+    def run_with_reports(experiment):
+        experiment.batch_callback = lambda: reports.append(experiment.get_running_results()[0])
+        run(experiment)
+    monkeypatch.setattr(Experiment, 'run', run_with_reports)
+    experiment = run_experiment(Experiment.DEFAULT_CONCURRENCY, tmp_path / 'run', monkeypatch)
+    
+    # Running cells are reported with the shares of the answers so far, before they are finished
+    running_rows = [row for rows in reports for row in rows]
+    assert any(row['Iterations'] < 6 for row in running_rows)
+    assert all(row['Iterations'] == row['Correct Answers'] for row in running_rows)
+    assert all(row.keys() == experiment.results_list[0].keys() for row in running_rows)
+    # Finished cells are no longer running
+    assert experiment.running_cells == {}
+
+
+class StubLogprobsCompletions:
+
+    def create(self, model, messages, max_tokens, temperature, n, **kwargs):
+        # No label in the answer, the label is only among the most likely first tokens
+        top_logprobs = [SimpleNamespace(token=' I', logprob=-0.1), SimpleNamespace(token='B', logprob=-0.5)]
+        logprobs = SimpleNamespace(content=[SimpleNamespace(top_logprobs=top_logprobs)])
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='I choose'), logprobs=logprobs)
+                                        for _ in range(n)])
+
+
+def test_logprob_rescues_are_counted_for_cached_answers(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    
+    def run_with_logprobs(experiment):
+        experiment.client = SimpleNamespace(chat=SimpleNamespace(completions=StubLogprobsCompletions()))
+        run(experiment)
+    run = Experiment.run
+    monkeypatch.setattr(Experiment, 'run', run_with_logprobs)
+    
+    # The second run replays the answers of the first run from the cache
+    requested = run_experiment(0, tmp_path / 'requested', monkeypatch, logprobs=True, reuse_responses=True, response_cache=cache)
+    cached = run_experiment(0, tmp_path / 'cached', monkeypatch, logprobs=True, reuse_responses=True, response_cache=cache)
+    
+    # 2 GPT models with 3 scenarios and 6 iterations each
+    assert requested.logprob_rescues == cached.logprob_rescues == 36
+    assert list(cached.results_df['Share of B'][:6]) == [1.0] * 6
+    # The rescued answers are the labels themselves, the flags are kept next to them
+    assert set(cached.raw_model_answers_dict['gpt-3.5-turbo'][0]) == {'B'}
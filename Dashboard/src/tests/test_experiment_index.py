@@ -0,0 +1,54 @@
+# Lookup of the experiment ids of the live recreation page.
+# data/baseline_experiment_ids.jsonl holds every mapping of the if/elif chains that the index replaced, as
+# [family, dropdown values in the order of INDEX_PARAMETERS, experiment id].
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import json
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.experiment_index import ExperimentIndex, INDEX_PARAMETERS, normalize_model
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'baseline_experiment_ids.jsonl')
+
+with open(BASELINE_PATH, encoding='utf-8') as f:
+    BASELINE_MAPPINGS = [json.loads(line) for line in f]
+
+
+@pytest.fixture(scope='module')
+def index():
+    return ExperimentIndex()
+
+
+def test_index_matches_the_replaced_if_elif_chains(index):
+    assert len(BASELINE_MAPPINGS) == 252
+    for experiment, values, experiment_id in BASELINE_MAPPINGS:
+        assert index.get_id(experiment, *values) == experiment_id
+
+
+def test_configurations_round_trip(index):
+    for experiment, values, experiment_id in BASELINE_MAPPINGS:
+        configuration = index.get_configuration(experiment_id)
+        assert list(configuration) == list(INDEX_PARAMETERS[experiment])
+        assert index.get_id(experiment, *configuration.values()) == experiment_id
+
+
+def test_every_stored_experiment_is_indexed(index):
+    indexed = {experiment_id for experiment in INDEX_PARAMETERS for experiment_id in index.build(experiment).values()}
+    assert indexed == {experiment_id for experiment, values, experiment_id in BASELINE_MAPPINGS}
+
+
+def test_unknown_parameters_have_no_id(index):
+    assert index.get_id('PT', 5, 'gpt-3.5-turbo', 0) is None
+    assert index.get_id('PT', 1, 'gpt-3.5-turbo') is None
+
+
+def test_llama_versions_are_shown_by_their_short_name():
+    assert normalize_model('meta/llama-2-70b-chat:02e509c789964a7ea8736978a43525956ef40397be9033abf9fd2badfe68c9e3') == 'llama-2-70b'
+    assert normalize_model('gpt-4-1106-preview') == 'gpt-4-1106-preview'
@@ -0,0 +1,122 @@
+# Sampling of the experiment cells: several samples per OpenAI request and early stopping.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.experiment
+from utils.experiment import Experiment
+from utils.run_journal import RunJournal
+
+
+class CyclingCompletions:
+
+    """Answers with the given answers in turn and records the n of every request."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.requests = []
+
+    def create(self, model, messages, max_tokens, temperature, n, **kwargs):
+        start = sum(self.requests)
+        self.requests.append(n)
+        answers = [self.answers[(start + k) % len(self.answers)] for k in range(n)]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer), logprobs=None)
+                                        for answer in answers])
+
+
+class CountingReplicate:
+
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, model, input):
+        self.calls += 1
+        return iter(['A'])
+
+
+def run_experiment(tmp_path, monkeypatch, completions, experiment_type='answer_options', models=('gpt-3.5-turbo',),
+                   concurrency=None, **options):
+    monkeypatch.setattr(utils.experiment, 'RunJournal', lambda run_id: RunJournal(run_id, str(tmp_path / 'runs')))
+    experiment = Experiment(
+        api_keys={'openai': 'test', 'replicate': 'test'},
+        experiment_type=experiment_type,
+        prompts=['Which option do you choose?'],
+        models=list(models),
+        iterations=50,
+        temperature=1,
+        num_options=3,
+        answers=['a', 'b', 'c'],
+        instruction_checklist=[],
+        instructions=[''],
+        concurrency=concurrency,
+        **options,
+    )
+    experiment.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    experiment.replicate = CountingReplicate()
+    experiment.run()
+    return experiment
+
+
+def test_samples_are_requested_with_the_n_parameter(tmp_path, monkeypatch):
+    completions = CyclingCompletions(['A'])
+    experiment = run_experiment(tmp_path, monkeypatch, completions, models=('gpt-3.5-turbo', 'llama-2-70b'),
+                                samples_per_request=20)
+    # 50 iterations in requests of at most 20 samples, Replicate has no n parameter
+    assert completions.requests == [20, 20, 10]
+    assert experiment.replicate.calls == 50
+    assert list(experiment.results_df['Iterations']) == [50, 50]
+
+
+@pytest.mark.parametrize('concurrency', [None, True])
+def test_cells_with_identical_answers_stop_early(tmp_path, monkeypatch, concurrency):
+    completions = CyclingCompletions(['A'])
+    experiment = run_experiment(tmp_path, monkeypatch, completions, samples_per_request=5, early_stopping=True,
+                                concurrency=concurrency)
+    # The stopping rule is checked once min_samples answers are there
+    assert sum(completions.requests) == Experiment.MIN_SAMPLES
+    assert experiment.results_df['Iterations'][0] == Experiment.MIN_SAMPLES
+    assert experiment.samples_saved == 50 - Experiment.MIN_SAMPLES
+    assert experiment.calls_saved == 8
+
+
+def test_all_iterations_are_sampled_without_early_stopping(tmp_path, monkeypatch):
+    completions = CyclingCompletions(['A'])
+    experiment = run_experiment(tmp_path, monkeypatch, completions, samples_per_request=5)
+    assert sum(completions.requests) == 50
+    assert experiment.samples_saved == experiment.calls_saved == 0
+
+
+def test_mixed_answers_only_stop_with_a_confidence_interval(tmp_path, monkeypatch):
+    # Without a ci_width, early stopping only stops cells without variance
+    completions = CyclingCompletions(['A', 'B'])
+    run_experiment(tmp_path, monkeypatch, completions, samples_per_request=5, early_stopping=True)
+    assert sum(completions.requests) == 50
+
+    # Shares of 0.5 have a 95% interval narrower than 0.4 after about 20 answers
+    completions = CyclingCompletions(['A', 'B'])
+    experiment = run_experiment(tmp_path, monkeypatch, completions, samples_per_request=5, ci_width=0.4)
+    assert experiment.early_stopping
+    assert sum(completions.requests) == 25
+    assert experiment.results_df['Share of A'][0] == pytest.approx(13 / 25)
+
+
+def test_invalid_answers_do_not_count_towards_the_minimum(tmp_path, monkeypatch):
+    completions = CyclingCompletions(['A', 'I do not know'])
+    run_experiment(tmp_path, monkeypatch, completions, samples_per_request=5, early_stopping=True)
+    # 10 valid answers are only there after 20 answers
+    assert sum(completions.requests) == 20
+
+
+def test_numeric_cells_stop_once_the_prices_are_identical(tmp_path, monkeypatch):
+    completions = CyclingCompletions(['$5', '$5.'])
+    experiment = run_experiment(tmp_path, monkeypatch, completions, experiment_type='numeric', samples_per_request=5,
+                                early_stopping=True)
+    assert sum(completions.requests) == Experiment.MIN_SAMPLES
+    assert experiment.results_df['Median'][0] == 5
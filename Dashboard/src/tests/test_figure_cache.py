@@ -0,0 +1,77 @@
+# Memoized figures of the static experiment pages.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import sys
+import plotly.graph_objects as go
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.figure_cache import FigureCache
+
+
+class CountingPlot:
+
+    """Bar plot of its parameters that counts how often it was built."""
+
+    def __init__(self):
+        self.calls = []
+        self.__module__ = __name__
+        self.__qualname__ = 'CountingPlot'
+
+    def __call__(self, *params):
+        self.calls.append(params)
+        return go.Figure(go.Bar(x=list(map(str, params)), y=[1] * len(params)))
+
+
+def test_figures_are_built_once_per_parameters():
+    cache = FigureCache()
+    plot = CountingPlot()
+    first = cache.get(plot, 'A', 1)
+    second = cache.get(plot, 'A', 1)
+    cache.get(plot, 'B', 1)
+    assert plot.calls == [('A', 1), ('B', 1)]
+    assert first == second
+    assert first['data'][0]['x'] == ['A', '1']
+    # Every caller gets its own copy
+    first['data'][0]['x'] = []
+    assert cache.get(plot, 'A', 1) == second
+
+
+def test_least_recently_used_figures_are_dropped():
+    cache = FigureCache(max_figures=2)
+    plot = CountingPlot()
+    cache.get(plot, 1)
+    cache.get(plot, 2)
+    cache.get(plot, 1)
+    cache.get(plot, 3)
+    cache.get(plot, 1)
+    cache.get(plot, 2)
+    assert plot.calls == [(1,), (2,), (3,), (2,)]
+
+
+def test_figures_of_changed_input_files_are_built_again(tmp_path):
+    path = tmp_path / 'results.csv'
+    path.write_text('Value\n1\n')
+    cache = FigureCache()
+    plot = CountingPlot()
+    cache.get(plot, 1, files=(str(path),))
+    cache.get(plot, 1, files=(str(path),))
+    path.write_text('Value\n1\n2\n')
+    cache.get(plot, 1, files=(str(path),))
+    assert plot.calls == [(1,), (1,)]
+
+
+def test_warm_up_renders_the_registered_combinations():
+    cache = FigureCache()
+    plot = CountingPlot()
+
+    def failing_plot(value):
+        raise ValueError(value)
+    cache.register_warm_up(plot, [(1,), (2,)])
+    cache.register_warm_up(failing_plot, [(3,)])
+    assert cache.warm_up() == 2
+    cache.get(plot, 2)
+    assert plot.calls == [(1,), (2,)]
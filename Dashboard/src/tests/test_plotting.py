@@ -0,0 +1,61 @@
+# Box plots of the numeric answers of the live experiments.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.plotting
+from utils.plotting import get_box_statistics, get_long_format, plot_results_numeric
+
+
+def get_results():
+    # {model: {scenario index: answers}} like the live experiments return them
+    return pd.DataFrame({
+        'gpt-3.5-turbo': [[1, 2, 3, 4, 100], [5, 5, 6]],
+        'gpt-4': [[2, 2], np.nan],
+    })
+
+
+def test_answers_are_flattened_with_their_model_and_scenario():
+    values, models, scenarios = get_long_format(get_results())
+    np.testing.assert_array_equal(values, [1, 2, 3, 4, 100, 5, 5, 6, 2, 2])
+    assert models.tolist() == ['gpt-3.5-turbo'] * 8 + ['gpt-4'] * 2
+    assert scenarios.tolist() == [1, 1, 1, 1, 1, 2, 2, 2, 1, 1]
+
+
+def test_box_statistics_match_the_percentiles():
+    values = np.array([1, 2, 3, 4, 100], dtype=float)
+    q1, median, q3, lowerfence, upperfence = get_box_statistics(values)
+    assert (q1, median, q3) == tuple(np.percentile(values, [25, 50, 75]))
+    # 100 is an outlier, the upper fence is the largest answer within 1.5 IQR
+    assert (lowerfence, upperfence) == (1, 4)
+
+
+def test_raw_boxes_hold_every_answer():
+    fig = plot_results_numeric(get_results(), quartiles=False)
+    assert [trace.name for trace in fig.data] == ['gpt-3.5-turbo', 'gpt-4']
+    assert list(fig.data[0].y) == [1, 2, 3, 4, 100, 5, 5, 6]
+    assert fig.data[0].q1 is None
+    assert fig.layout.boxmode == 'group'
+
+
+def test_quartile_boxes_hold_five_numbers_per_scenario():
+    fig = plot_results_numeric(get_results(), quartiles=True)
+    trace = fig.data[0]
+    assert trace.y is None
+    assert list(trace.x) == ['Scenario 1', 'Scenario 2']
+    assert list(trace.median) == [3, 5]
+    assert list(trace.upperfence) == [4, 6]
+
+
+def test_quartiles_are_used_for_large_experiments(monkeypatch):
+    monkeypatch.setattr(utils.plotting, 'MAX_RAW_POINTS', 9)
+    assert plot_results_numeric(get_results()).data[0].y is None
+    monkeypatch.setattr(utils.plotting, 'MAX_RAW_POINTS', 10)
+    assert plot_results_numeric(get_results()).data[0].y is not None
@@ -0,0 +1,62 @@
+# Server-side histograms of the stated prices of the transaction utility experiments.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.aggregates import aggregate_prices, load_aggregates
+from utils.plotting_functions import (MAX_BINS, TU2_plot_results, TU3_plot_results, get_histogram_bars,
+                                      get_price_histogram)
+
+
+def test_bins_hold_every_answer():
+    aggregates = aggregate_prices(np.array([0.99, 1.5, 2.25, 2.25, 7.8]), 5)
+    edges, frequencies = get_price_histogram(aggregates)
+    assert frequencies.sum() == 5
+    assert edges[0] == 0.99 and edges[-1] > 7.8
+    np.testing.assert_allclose(np.diff(edges), np.diff(edges)[0])
+
+
+def test_whole_dollar_bins_are_centered_on_the_amounts():
+    aggregates = aggregate_prices(np.array([5, 5, 10, 15]), 4)
+    centers, frequencies, widths, ranges = get_histogram_bars(aggregates, bins=1)
+    # Empty bins between the amounts are left out
+    np.testing.assert_array_equal(centers, [5, 10, 15])
+    np.testing.assert_array_equal(frequencies, [2, 1, 1])
+    np.testing.assert_array_equal(widths, [1, 1, 1])
+    np.testing.assert_array_equal(ranges[0], [4.5, 5.5])
+
+
+def test_number_of_bins_is_capped():
+    aggregates = aggregate_prices(np.array([0.5, 0.75, 1.25, 10_000.5]), 4)
+    edges, frequencies = get_price_histogram(aggregates, bins=0.01)
+    assert len(frequencies) <= MAX_BINS + 1
+    assert frequencies.sum() == 4
+
+
+def test_identical_and_missing_answers():
+    edges, frequencies = get_price_histogram(aggregate_prices(np.array([3, 3, 3]), 3))
+    assert frequencies.tolist() == [3]
+    np.testing.assert_array_equal(edges, [2.5, 3.5])
+    edges, frequencies = get_price_histogram(aggregate_prices(np.array([]), 3))
+    np.testing.assert_array_equal(edges, [0, 1])
+    np.testing.assert_array_equal(frequencies, [0])
+
+
+@pytest.mark.parametrize('experiment, plot', [('TU2', TU2_plot_results), ('TU3', TU3_plot_results)])
+def test_figures_send_bars_unless_every_answer_is_requested(experiment, plot):
+    results = load_aggregates(experiment)
+    row = results.iloc[[0]]
+    valid = results["Valid"].iloc[0]
+    bars = plot(row).data[0]
+    assert bars.type == 'bar'
+    assert sum(bars.y) == valid
+    histogram = plot(row, raw_points=True).data[0]
+    assert histogram.type == 'histogram'
+    assert len(histogram.x) == valid
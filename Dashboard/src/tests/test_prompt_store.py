@@ -0,0 +1,78 @@
+# Arrow prompt store against the pickles it was converted from.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import pickle
+import subprocess
+import sys
+import numpy as np
+import pytest
+
+SOURCE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SOURCE_DIRECTORY)
+from utils.prompt_store import DICTIONARY_NAMES, INPUT_DIRECTORY, PROMPT_FILES, STORE_PATH, PromptStore, convert_pickles
+
+
+def load_pickle(filename):
+    with open(os.path.join(INPUT_DIRECTORY, filename), 'rb') as f:
+        return pickle.load(f)
+
+
+def assert_same_value(stored, pickled):
+    if isinstance(pickled, np.ndarray):
+        assert isinstance(stored, np.ndarray)
+        np.testing.assert_array_equal(stored, pickled)
+    else:
+        assert type(stored) is type(pickled)
+        assert stored == pickled
+
+
+def assert_same_store(store):
+    for experiment, names in DICTIONARY_NAMES.items():
+        dictionaries = load_pickle(f'{experiment}_dictionaries.pkl')
+        for name, dictionary in zip(names, dictionaries):
+            view = store.get(experiment, name)
+            assert list(view) == list(dictionary)
+            for experiment_id, value in dictionary.items():
+                assert_same_value(view[experiment_id], value)
+        assert store.get_prompts(experiment) == [load_pickle(filename) for filename in PROMPT_FILES[experiment]]
+
+
+def test_store_matches_the_pickles():
+    assert_same_store(PromptStore())
+
+
+def test_converting_the_pickles_reproduces_the_store(tmp_path):
+    path = str(tmp_path / 'prompt_store.arrow')
+    convert_pickles(path=path)
+    assert_same_store(PromptStore(path))
+
+
+def test_store_is_opened_on_first_access():
+    store = PromptStore()
+    assert store.table is None
+    prompts = store.get('TU3', 'experiment_prompts')
+    assert store.table is not None
+    # The views are memoized, only the looked up values are converted
+    assert store.get('TU3', 'experiment_prompts') is prompts
+    assert len(prompts) == 72
+
+
+def test_importing_the_experiment_functions_loads_no_prompts():
+    # Fresh interpreter, the store of this process is already open
+    code = ("import utils.experiment_functions\n"
+            "from utils.prompt_store import prompt_store\n"
+            "print(prompt_store.table is None)")
+    output = subprocess.run([sys.executable, '-c', code], cwd=SOURCE_DIRECTORY, capture_output=True, text=True, check=True)
+    assert output.stdout.strip().splitlines()[-1] == 'True'
+
+
+def test_unknown_families_and_ids_raise():
+    store = PromptStore(STORE_PATH)
+    with pytest.raises(KeyError):
+        store.get('XY', 'experiment_prompts')
+    with pytest.raises(KeyError):
+        store.get('PT', 'experiment_prompts')['PT_9_9']
@@ -0,0 +1,95 @@
+# Behavior of the token buckets of the rate limiter.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.rate_limiter
+from utils.rate_limiter import RateLimiter, TokenBucket, estimate_tokens, get_provider_and_model
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(utils.rate_limiter.time, 'time', clock)
+    return clock
+
+
+def make_limiter(tmp_path, requests_per_minute, tokens_per_minute=None):
+    return RateLimiter(limits={('openai', 'gpt-3.5-turbo'): (requests_per_minute, tokens_per_minute)},
+                       directory=str(tmp_path / 'buckets'))
+
+
+def test_requests_wait_once_the_bucket_is_empty(tmp_path, clock):
+    limiter = make_limiter(tmp_path, 2)
+    assert limiter.reserve('gpt-3.5-turbo', 1, 'key') == 0
+    assert limiter.reserve('gpt-3.5-turbo', 1, 'key') == 0
+    # The bucket refills 2 requests per minute, so the next request has to wait 30 seconds
+    assert limiter.reserve('gpt-3.5-turbo', 1, 'key') == pytest.approx(30)
+    clock.now += 30
+    assert limiter.reserve('gpt-3.5-turbo', 1, 'key') == 0
+
+
+def test_tokens_are_only_taken_if_both_buckets_allow_the_request(tmp_path, clock):
+    limiter = make_limiter(tmp_path, 10, 100)
+    assert limiter.reserve('gpt-3.5-turbo', 80, 'key') == 0
+    # 80 of 100 tokens are used, 40 more tokens are 20 too many at 100 tokens per minute
+    assert limiter.reserve('gpt-3.5-turbo', 40, 'key') == pytest.approx(12)
+    # The waiting request did not take a request from the other bucket
+    for _ in range(9):
+        assert limiter.reserve('gpt-3.5-turbo', 1, 'key') == 0
+
+
+def test_every_api_key_and_model_has_its_own_buckets(tmp_path, clock):
+    limiter = make_limiter(tmp_path, 1)
+    assert limiter.reserve('gpt-3.5-turbo', 1, 'key') == 0
+    assert limiter.reserve('gpt-3.5-turbo', 1, 'key') > 0
+    assert limiter.reserve('gpt-3.5-turbo', 1, 'other key') == 0
+    # Models without their own quota use the quota of the provider
+    assert limiter.reserve('gpt-4', 1, 'key') == 0
+
+
+def test_buckets_are_shared_through_the_directory(tmp_path, clock):
+    make_limiter(tmp_path, 1).reserve('gpt-3.5-turbo', 1, 'key')
+    # Another process opens the same directory and sees the empty bucket
+    assert make_limiter(tmp_path, 1).reserve('gpt-3.5-turbo', 1, 'key') > 0
+
+
+def test_acquire_sleeps_until_the_request_may_be_sent(tmp_path, clock, monkeypatch):
+    limiter = make_limiter(tmp_path, 1)
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        clock.now += seconds
+    monkeypatch.setattr(utils.rate_limiter.time, 'sleep', sleep)
+    limiter.acquire('gpt-3.5-turbo', api_key='key')
+    limiter.acquire('gpt-3.5-turbo', api_key='key')
+    assert sleeps == [pytest.approx(60)]
+
+
+def test_requests_larger_than_the_bucket_wait_for_a_full_bucket():
+    bucket = TokenBucket(60, level=0, last_refill=0)
+    assert bucket.wait_time(120) == pytest.approx(60)
+    bucket.refill(60)
+    assert bucket.wait_time(120) == 0
+
+
+def test_llama_is_limited_under_its_short_name():
+    assert get_provider_and_model('meta/llama-2-70b-chat:02e509c7') == ('replicate', 'llama-2-70b')
+    assert get_provider_and_model('gpt-4-1106-preview') == ('openai', 'gpt-4-1106-preview')
+    assert estimate_tokens('one two', None, 'three', max_tokens=5) == 8
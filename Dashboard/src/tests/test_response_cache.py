@@ -0,0 +1,171 @@
+# Behavior of the response cache: expiry and eviction of the stored answers, and which runs replay them.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import sys
+from types import SimpleNamespace
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.experiment
+import utils.response_cache
+from utils.experiment import Experiment
+from utils.response_cache import ResponseCache
+from utils.run_journal import RunJournal
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(utils.response_cache.time, 'time', clock)
+    return clock
+
+
+def make_keys(count):
+    return [ResponseCache.make_key('gpt-3.5-turbo', 'prompt', '', 1, 1, i) for i in range(count)]
+
+
+def test_answers_expire_after_their_ttl(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'), ttl=60)
+    first, second = make_keys(2)
+    cache.set_many({first: ('A', False)})
+    cache.set_many({second: ('B', True)}, ttl=120)
+    clock.now += 61
+    assert cache.get_many([first, second]) == {second: ('B', True)}
+    clock.now += 60
+    assert cache.get_many([first, second]) == {}
+
+
+def test_least_recently_used_answers_are_evicted(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'), max_entries=2)
+    first, second, third = make_keys(3)
+    cache.set_many({first: ('A', False)})
+    clock.now += 1
+    cache.set_many({second: ('B', False)})
+    clock.now += 1
+    # Reading the first answer makes the second one the least recently used
+    cache.get_many([first])
+    clock.now += 1
+    cache.set_many({third: ('C', False)})
+    assert cache.get_many([first, second, third]) == {first: ('A', False), third: ('C', False)}
+
+
+def test_keys_depend_on_the_settings_and_the_scope():
+    key = ResponseCache.make_key('gpt-3.5-turbo', 'prompt', '', 1, 1, 0)
+    assert key != ResponseCache.make_key('gpt-3.5-turbo', 'prompt', '', 1, 1, 1)
+    assert key != ResponseCache.make_key('gpt-3.5-turbo', 'prompt', '', 1, 1, 0, scope='run')
+    assert key != ResponseCache.make_key('gpt-3.5-turbo', 'prompt', '', 1, 1, 0, logprobs=True)
+    # Temperature 0 shares one sample, Llama is keyed by its short name
+    assert ResponseCache.make_key('gpt-3.5-turbo', 'prompt', '', 0, 1, 3) == ResponseCache.make_key('gpt-3.5-turbo', 'prompt', '', 0, 1, 0)
+    assert (ResponseCache.make_key('meta/llama-2-70b-chat:02e509c7', 'prompt', '', 1, 1, 0)
+            == ResponseCache.make_key('llama-2-70b', 'prompt', '', 1, 1, 0))
+
+
+def test_only_missing_samples_are_fetched_in_batches(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    batches = []
+
+    def fetch(count):
+        batches.append(count)
+        return [f'answer {len(batches)}'] * count
+    first = cache.get_answers('gpt-3.5-turbo', 'prompt', '', 1, 1, fetch, 3)
+    answers = cache.get_answers('gpt-3.5-turbo', 'prompt', '', 1, 1, fetch, 5, batch_size=2)
+    assert first == ['answer 1', 'answer 2', 'answer 3']
+    assert answers == first + ['answer 4', 'answer 4']
+    assert batches == [1, 1, 1, 2]
+
+
+class CountingCompletions:
+
+    def __init__(self):
+        self.samples = 0
+
+    def create(self, model, messages, max_tokens, temperature, n, **kwargs):
+        self.samples += n
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='A'), logprobs=None)
+                                        for _ in range(n)])
+
+
+def run_experiment(tmp_path, monkeypatch, cache, completions, temperature=1, api_key='test', **options):
+    monkeypatch.setattr(utils.experiment, 'RunJournal', lambda run_id: RunJournal(run_id, str(tmp_path)))
+    experiment = Experiment(
+        api_keys={'openai': api_key, 'replicate': api_key},
+        experiment_type='answer_options',
+        prompts=['Which option do you choose?'],
+        models=['gpt-3.5-turbo'],
+        iterations=4,
+        temperature=temperature,
+        num_options=3,
+        answers=['a', 'b', 'c'],
+        instruction_checklist=[],
+        instructions=[''],
+        samples_per_request=2,
+        **options,
+    )
+    experiment.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    experiment.replicate = SimpleNamespace()
+    experiment.response_cache = cache
+    experiment.run()
+    return experiment
+
+
+def test_new_runs_draw_new_samples(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    completions = CountingCompletions()
+    run_experiment(tmp_path, monkeypatch, cache, completions)
+    run_experiment(tmp_path, monkeypatch, cache, completions)
+    assert completions.samples == 8
+
+
+def test_earlier_answers_are_only_reused_when_switched_on(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    completions = CountingCompletions()
+    run_experiment(tmp_path, monkeypatch, cache, completions, reuse_responses=True)
+    run_experiment(tmp_path, monkeypatch, cache, completions, reuse_responses=True)
+    assert completions.samples == 4
+    # The answers of other users are not replayed
+    run_experiment(tmp_path, monkeypatch, cache, completions, api_key='other', reuse_responses=True)
+    assert completions.samples == 8
+
+
+def test_temperature_0_replays_one_sample_per_user(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    completions = CountingCompletions()
+    run_experiment(tmp_path, monkeypatch, cache, completions, temperature=0)
+    run_experiment(tmp_path, monkeypatch, cache, completions, temperature=0)
+    assert completions.samples == 1
+    run_experiment(tmp_path, monkeypatch, cache, completions, temperature=0, api_key='other')
+    assert completions.samples == 2
+
+
+def test_resumed_run_replays_its_own_answers(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / 'responses.sqlite'))
+    completions = CountingCompletions()
+    
+    # The run fails after the first batch of the cell, the batch is cached but the cell is not finished
+    class FailingCompletions(CountingCompletions):
+        def create(self, *args, **kwargs):
+            if self.samples:
+                raise RuntimeError('API error')
+            return super().create(*args, **kwargs)
+    failing = FailingCompletions()
+    try:
+        run_experiment(tmp_path, monkeypatch, cache, failing)
+    except RuntimeError:
+        pass
+    
+    # The resumed run only requests the second batch
+    run_experiment(tmp_path, monkeypatch, cache, completions)
+    assert failing.samples == 2 and completions.samples == 2
@@ -0,0 +1,41 @@
+# Server-side store of the live experiment results behind the dcc.Store handles.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import sys
+import diskcache
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.result_store
+from utils.result_store import get_result, put_result
+
+
+@pytest.fixture(autouse=True)
+def result_store(tmp_path, monkeypatch):
+    # Keep the results of the tests out of the data directory
+    store = diskcache.Cache(str(tmp_path / 'results'))
+    monkeypatch.setattr(utils.result_store, 'result_store', store)
+    yield store
+    store.close()
+
+
+def test_results_are_returned_by_their_handle():
+    results = pd.DataFrame({'Model': ['gpt-3.5-turbo'], 'Answers': [['$5', '$10']]})
+    handle = put_result(results)
+    assert isinstance(handle, str)
+    assert get_result(handle).equals(results)
+    # Every result gets its own handle
+    assert put_result(results) != handle
+
+
+def test_missing_results_are_none(result_store):
+    assert get_result(None) is None
+    assert get_result('unknown') is None
+    handle = put_result([1, 2])
+    result_store.delete(handle)
+    assert get_result(handle) is None
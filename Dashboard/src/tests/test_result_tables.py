@@ -0,0 +1,39 @@
+# Lookup of the result rows by the values of the dropdowns.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.aggregates import load_aggregates
+from utils.result_tables import ResultTable
+
+
+TU_COLUMNS = ["Initial_cost", "Orientation_price", "Buyer", "Model", "Temperature"]
+
+
+def test_rows_match_the_boolean_mask_filter():
+    results = load_aggregates('TU')
+    table = ResultTable(results, TU_COLUMNS)
+    assert len(table) == len(results)
+    for values in table.keys():
+        mask = pd.Series(True, index=results.index)
+        for column, value in zip(TU_COLUMNS, values):
+            mask &= results[column] == value
+        assert table.get(*values).equals(results[mask])
+        assert table.get_value("Experiment_id", *values) == results[mask]["Experiment_id"].iloc[0]
+
+
+def test_first_row_of_a_repeated_combination_is_kept():
+    results = pd.DataFrame({"Model": ["a", "a", "b"], "Temp": [0.5, 0.5, 1.0], "Value": [1, 2, 3]})
+    table = ResultTable(results, ["Model", "Temp"])
+    assert len(table) == 2
+    assert table.get_value("Value", "a", 0.5) == 1
+    assert table.get("a", 0.5).index.tolist() == [0]
+    assert ("b", 1.0) in table
+    assert ("b", 0.5) not in table
+    assert list(table.keys()) == [("a", 0.5), ("b", 1.0)]
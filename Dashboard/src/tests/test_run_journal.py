@@ -0,0 +1,118 @@
+# Checkpoints of experiment runs: a failed run continues from its last finished cell.
+#
+# Run from Dashboard/src:
+#   python -m pytest tests
+
+# Import required libraries
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils.experiment
+from utils.experiment import Experiment
+from utils.run_journal import RunJournal, make_run_id
+
+
+PROMPTS = ['Which option do you choose?', 'Which option would you take?', 'Pick one option.']
+
+
+class PromptCompletions:
+
+    """Answers "A" and records the prompts, fails for the prompts in fail_on."""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = fail_on
+        self.prompts = []
+
+    def create(self, model, messages, max_tokens, temperature, n, **kwargs):
+        prompt = messages[1]['content']
+        if any(prompt.startswith(failing) for failing in self.fail_on):
+            raise RuntimeError('API error')
+        self.prompts.append(prompt)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='A'), logprobs=None)
+                                        for _ in range(n)])
+
+
+def load_journal(directory):
+    # Journal of the only unfinished run in the directory
+    filename, = os.listdir(directory)
+    return RunJournal(filename[:-len('.jsonl')], str(directory)).load()
+
+
+def run_experiment(directory, monkeypatch, completions, shuffle_option=False):
+    monkeypatch.setattr(utils.experiment, 'RunJournal', lambda run_id: RunJournal(run_id, str(directory)))
+    experiment = Experiment(
+        api_keys={'openai': 'test', 'replicate': 'test'},
+        experiment_type='answer_options',
+        prompts=PROMPTS,
+        models=['gpt-3.5-turbo'],
+        iterations=2,
+        temperature=1,
+        num_options=3,
+        answers=['a', 'b', 'c'] * 3,
+        instruction_checklist=[],
+        instructions=['', '', ''],
+        shuffle_option=shuffle_option,
+    )
+    experiment.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    experiment.replicate = SimpleNamespace()
+    experiment.run()
+    return experiment
+
+
+def test_failed_run_resumes_after_the_last_finished_cell(tmp_path, monkeypatch):
+    failing = PromptCompletions(fail_on=[PROMPTS[1]])
+    try:
+        run_experiment(tmp_path / 'runs', monkeypatch, failing)
+    except RuntimeError:
+        pass
+    # The first cell is checkpointed, the failed one is not
+    setup, cells = load_journal(tmp_path / 'runs')
+    assert list(cells) == [('gpt-3.5-turbo', 0)]
+
+    completions = PromptCompletions()
+    experiment = run_experiment(tmp_path / 'runs', monkeypatch, completions)
+    # Only the unfinished cells are requested, the finished one is replayed from the journal
+    assert [prompt.split('\n')[0] for prompt in completions.prompts] == [PROMPTS[1], PROMPTS[1], PROMPTS[2], PROMPTS[2]]
+    assert list(experiment.results_df['Scenario']) == [1, 2, 3]
+    assert list(experiment.results_df['Share of A']) == [1.0, 1.0, 1.0]
+    # A finished run removes its journal
+    assert os.listdir(tmp_path / 'runs') == []
+
+
+def test_resumed_run_keeps_the_shuffled_prompts(tmp_path, monkeypatch):
+    failing = PromptCompletions(fail_on=[PROMPTS[0]])
+    try:
+        run_experiment(tmp_path / 'runs', monkeypatch, failing, shuffle_option=True)
+    except RuntimeError:
+        pass
+    setup, cells = load_journal(tmp_path / 'runs')
+
+    completions = PromptCompletions()
+    experiment = run_experiment(tmp_path / 'runs', monkeypatch, completions, shuffle_option=True)
+    assert experiment.experiment_prompts == setup['experiment_prompts']
+    assert experiment.answer_label_mapping == setup['answer_label_mapping']
+
+
+def test_journal_ignores_an_incomplete_last_line(tmp_path):
+    journal = RunJournal('run', str(tmp_path))
+    journal.write_setup({'experiment_prompts': ['prompt']})
+    journal.record_cell('gpt-3.5-turbo', 0, ['A', 'B'], [False, True])
+    journal.record_cell('gpt-3.5-turbo', 1, ['C'])
+    with open(journal.path, 'a', encoding='utf-8') as f:
+        f.write('{"type": "cell", "model": "gpt-3.5-tu')
+
+    setup, cells = journal.load()
+    assert setup == {'experiment_prompts': ['prompt']}
+    # The flags are kept next to the answers, cells without rescued answers get False flags
+    assert cells == {('gpt-3.5-turbo', 0): (['A', 'B'], [False, True]), ('gpt-3.5-turbo', 1): (['C'], [False])}
+    journal.finish()
+    assert journal.load() == (None, {})
+
+
+def test_run_ids_differ_between_configurations_and_users():
+    run_id = make_run_id('answer_options', ['prompt'], 10, scope='user')
+    assert run_id == make_run_id('answer_options', ['prompt'], 10, scope='user')
+    assert run_id != make_run_id('answer_options', ['prompt'], 20, scope='user')
+    assert run_id != make_run_id('answer_options', ['prompt'], 10, scope='other user')
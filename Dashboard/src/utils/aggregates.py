@@ -0,0 +1,144 @@
+# Precomputed aggregates of the stored transaction utility results.
+# The plots of the TU experiments only need the distribution of the stated prices, i.e. how often every price was
+# given, and a few summary statistics. These are computed once per cell (experiment id, model, temperature and
+# configuration) by an offline build step and shipped as small tables, so the pages never touch the raw answers.
+#
+# The tables are built from the results in data/Output by running (from Dashboard/src):
+#   python -m utils.aggregates
+# Every table stores the hash of the results file it was built from. If the results change, the table is rebuilt from
+# them when it is loaded, so the pages never show aggregates of outdated results.
+
+# Import required libraries
+import hashlib
+import io
+import os
+import numpy as np
+import pandas as pd
+from utils.answer_arrays import load_results, parse_list, ragged
+from utils.paths import DATA_DIRECTORY
+
+
+OUTPUT_DIRECTORY = os.path.join(DATA_DIRECTORY, 'Output')
+
+# Results file and parsing of the answers of every experiment, see load_results
+AGGREGATE_SOURCES = {
+    'TU': ('TU_results.csv', True),
+    'TU2': ('TU2_results.csv', True),
+    'TU3': ('TU3_results.csv', False),
+}
+
+# Columns that hold one value per distinct price
+ARRAY_COLUMNS = ('Values', 'Counts', 'Shares')
+# Column with the hash of the results file the aggregates were built from
+SOURCE_COLUMN = 'Source_hash'
+
+
+def aggregate_prices(prices, n_observations):
+    """
+    Summarize the valid prices of one cell.
+
+    Args:
+        prices (np.ndarray): Valid prices stated by the model
+        n_observations (int): Number of answers, including the invalid ones
+
+    Returns:
+        aggregates (dict): Number of valid answers, mean, median, quartiles and the distinct prices with their counts
+                           and shares (%) of all answers, the distinct prices are the bins of the histograms
+    """
+    values, counts = np.unique(prices, return_counts=True)
+    if len(prices):
+        mean = np.mean(prices)
+        q1, median, q3 = np.percentile(prices, [25, 50, 75])
+    else:
+        mean = q1 = median = q3 = np.nan
+    return {
+        "Valid": len(prices),
+        "Mean": mean,
+        "Median": median,
+        "Q1": q1,
+        "Q3": q3,
+        "Values": values,
+        "Counts": counts,
+        "Shares": counts / n_observations * 100,
+    }
+
+
+def get_source_hash(experiment, directory=OUTPUT_DIRECTORY):
+    # Content hash of the results file, unlike the modification time it survives a checkout or copy of the data.
+    # None if only the aggregates are deployed, then they can not be checked
+    filename, _ = AGGREGATE_SOURCES[experiment]
+    try:
+        with open(f'{directory}/{filename}', 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def build_aggregates(experiment, directory=OUTPUT_DIRECTORY):
+    # One row per cell, the answers are replaced by their aggregates
+    filename, dollar_sign = AGGREGATE_SOURCES[experiment]
+    results = load_results(f'{directory}/{filename}', dollar_sign)
+    # TU and TU2 count the valid prices as observations. The stored counts come from stricter checks than
+    # utils.answer_parser, so they are recounted, otherwise the shares of the prices add up to more than 100%
+    if dollar_sign:
+        n_observations = [len(prices) for prices in results["Answers"]]
+    else:
+        n_observations = results["Obs."].tolist()
+    aggregates = pd.DataFrame([aggregate_prices(prices, n) for prices, n in zip(results["Answers"], n_observations)])
+    # Original answers of TU are kept as stringified list, like in the results
+    results = pd.read_csv(f'{directory}/{filename}').drop(columns="Answers")
+    results["Obs."] = n_observations
+    for column in ARRAY_COLUMNS:
+        aggregates[column] = [f"{array.tolist()}" for array in aggregates[column]]
+    aggregates[SOURCE_COLUMN] = get_source_hash(experiment, directory)
+    return pd.concat([results, aggregates], axis=1)
+
+
+def get_aggregate_path(experiment, directory=OUTPUT_DIRECTORY):
+    return f'{directory}/{experiment}_aggregates.csv'
+
+
+def is_stale(aggregates, source_hash):
+    # Tables from before the hash was stored count as stale as well
+    if source_hash is None:
+        return False
+    return SOURCE_COLUMN not in aggregates or (aggregates[SOURCE_COLUMN] != source_hash).any()
+
+
+def load_aggregates(experiment, directory=OUTPUT_DIRECTORY):
+    """
+    Load the precomputed aggregates of an experiment, rebuilt from the results if they changed since the build.
+
+    Args:
+        experiment (str): Experiment family, "TU", "TU2" or "TU3"
+        directory (str): Directory of the aggregate tables
+
+    Returns:
+        aggregates (pd.DataFrame): One row per cell, with float arrays in the "Values", "Counts", "Shares" and
+                                   "Original" columns
+    """
+    # Round trip parsing, so the statistics are exactly the ones that were computed
+    path = get_aggregate_path(experiment, directory)
+    source_hash = get_source_hash(experiment, directory)
+    aggregates = pd.read_csv(path, float_precision='round_trip') if os.path.exists(path) else None
+    if aggregates is None or is_stale(aggregates, source_hash):
+        text = build_aggregates(experiment, directory).to_csv(index=False)
+        try:
+            with open(path, 'w') as f:
+                f.write(text)
+        except OSError:
+            # Read-only deployment, the rebuilt table is only used by this process
+            pass
+        aggregates = pd.read_csv(io.StringIO(text), float_precision='round_trip')
+    aggregates = aggregates.drop(columns=SOURCE_COLUMN, errors='ignore')
+    for column in ARRAY_COLUMNS + ("Original",):
+        if column in aggregates:
+            aggregates[column] = ragged([parse_list(value) for value in aggregates[column]])
+    return aggregates
+
+
+if __name__ == '__main__':
+    for experiment in AGGREGATE_SOURCES:
+        aggregates = build_aggregates(experiment)
+        aggregates.to_csv(get_aggregate_path(experiment), index=False)
+        print(f"Wrote the aggregates of {len(aggregates)} cells to {get_aggregate_path(experiment)}")
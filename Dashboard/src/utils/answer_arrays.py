@@ -0,0 +1,74 @@
+# Preparsed answers of the stored experiment results.
+# The results CSVs store the answers of every cell as a stringified Python list, e.g. "['$5', '$5', ...]". They are
+# parsed once when the results are loaded, so the plot callbacks get float arrays instead of running literal_eval on
+# every dropdown change.
+
+# Import required libraries
+from ast import literal_eval
+import numpy as np
+import pandas as pd
+from utils.answer_parser import parse_numeric_answers
+
+
+def parse_prices(answers, dollar_sign=True):
+    """
+    Convert the answers of a willingness to pay experiment to prices.
+
+    Args:
+        answers (list): Answers of the model, e.g. ['$5', '$10', 'I would not sell it']
+        dollar_sign (bool): Only count answers with a currency like "$5" as valid (TU, TU2), otherwise answers like
+                            "5" as well (TU3), see parse_numeric_answers
+
+    Returns:
+        prices (np.ndarray): Float array of the valid prices, in the order of the answers
+    """
+    values, valid = parse_numeric_answers(answers, currency=dollar_sign)
+    return values[valid]
+
+
+def parse_list(value):
+    # Stringified list of numbers, e.g. the original answer percentages "[64.37, 18.39, 17.24]"
+    return np.asarray(literal_eval(value), dtype=float)
+
+
+def to_prices(value, dollar_sign=True):
+    # Accept both preparsed arrays and the stringified lists of the live experiments
+    if isinstance(value, np.ndarray):
+        return value
+    return parse_prices(literal_eval(value), dollar_sign)
+
+
+def to_array(value):
+    if isinstance(value, np.ndarray):
+        return value
+    return parse_list(value)
+
+
+def ragged(arrays):
+    # Store the arrays of all cells in one contiguous buffer, every cell gets a read-only view of its slice
+    offsets = np.cumsum([0] + [len(array) for array in arrays])
+    values = np.concatenate(arrays) if arrays else np.empty(0)
+    values.flags.writeable = False
+    column = np.empty(len(arrays), dtype=object)
+    for i, (start, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+        column[i] = values[start:end]
+    return column
+
+
+def load_results(path, dollar_sign=None):
+    """
+    Load a results CSV with the answer columns parsed into float arrays.
+
+    Args:
+        path (str): Path of the results CSV
+        dollar_sign (bool): Parsing of the "Answers" column, see parse_prices. None if the answers are not parsed
+
+    Returns:
+        results (pd.DataFrame): Results, with float arrays in the "Answers" (valid prices) and "Original" columns
+    """
+    results = pd.read_csv(path)
+    if dollar_sign is not None and "Answers" in results:
+        results["Answers"] = ragged([parse_prices(literal_eval(answers), dollar_sign) for answers in results["Answers"]])
+    if "Original" in results:
+        results["Original"] = ragged([parse_list(original) for original in results["Original"]])
+    return results
@@ -0,0 +1,61 @@
+# Shared parser of the numeric answers of the language models.
+# The models answer the willingness to pay questions with strings like "$5", "$1,234.50.", "USD 12", "12 dollars" or a
+# range like "$10-$15". All of them are matched by one precompiled regular expression. The answers of an experiment
+# repeat a lot, so every distinct answer is parsed once and the results are spread back to all answers.
+
+# Import required libraries
+import re
+import numpy as np
+import pandas as pd
+
+
+# Amount with optional thousands separators and decimals, e.g. "1,234.50", "12" or ".5"
+NUMBER = r"\d[\d,]*(?:\.\d+)?|\.\d+"
+CURRENCY_PREFIX = r"\$|US\$|USD\s*\$?"
+CURRENCY_SUFFIX = r"dollars?|USD"
+
+# Whole answer: amount or range of amounts, currency before or after, trailing period and whitespace are ignored
+NUMERIC_ANSWER = re.compile(
+    rf"\s*(?P<prefix>{CURRENCY_PREFIX})?\s*(?P<low>{NUMBER})"
+    rf"(?:\s*(?:-|–|to)\s*(?:{CURRENCY_PREFIX})?\s*(?P<high>{NUMBER}))?"
+    rf"\s*(?P<suffix>{CURRENCY_SUFFIX})?\s*\.?\s*",
+    re.IGNORECASE,
+)
+
+
+def parse_numeric_answer(answer, currency=True):
+    # Amount of a single answer, the midpoint for ranges and NaN if the answer is not valid
+    # Most answers are plain dollar amounts like "$5" or "$1,234.50", they do not need the regular expression
+    if answer[:1] == "$":
+        amount = answer[1:].replace(",", "")
+        if amount.replace(".", "", 1).isdecimal():
+            return float(amount)
+    match = NUMERIC_ANSWER.fullmatch(answer)
+    if match is None or (currency and match["prefix"] is None and match["suffix"] is None):
+        return np.nan
+    value = float(match["low"].replace(",", ""))
+    if match["high"] is not None:
+        value = (value + float(match["high"].replace(",", ""))) / 2
+    return value
+
+
+def parse_numeric_answers(answers, currency=True):
+    """
+    Convert the answers of the models to numbers.
+
+    Args:
+        answers (list, np.ndarray or pd.Series): Answers of the model, e.g. ['$5', 'USD 12', '12 dollars', 'I would not sell it']
+        currency (bool): Only count answers with a currency ("$", "USD" or "dollars") as valid (TU, TU2), otherwise
+                         plain numbers are valid as well (TU3)
+
+    Returns:
+        values (np.ndarray): Float array with the amount of every answer, the midpoint for ranges and NaN if invalid
+        valid (np.ndarray): Boolean mask of the valid answers
+    """
+    codes, uniques = pd.factorize(np.asarray(answers, dtype=object))
+    # Parse the distinct answers only, missing answers have the code -1 and get the NaN appended at the end
+    unique_values = np.empty(len(uniques) + 1)
+    unique_values[:-1] = [parse_numeric_answer(str(answer), currency) for answer in uniques.tolist()]
+    unique_values[-1] = np.nan
+    values = unique_values[codes]
+    return values, ~np.isnan(values)
@@ -0,0 +1,115 @@
+# Single pass tally of the answer option labels given by the language models.
+# The models answer the answer option experiments with the label of an option, but not always in the same form, e.g.
+# "A", "A.", "(A)" or "a". Every distinct answer is normalized and classified once, and all answers are counted in one
+# pass, instead of scanning the answers once per label.
+#
+# How tolerant the normalization is can be configured:
+#   "exact": only the bare labels are counted, e.g. "A"
+#   "strip": surrounding punctuation and the case are ignored, e.g. "A.", " A:", "(a)"
+#   "extract": additionally the first label that stands on its own in the answer, e.g. "B" in "I would choose B"
+
+# Import required libraries
+import re
+from collections import Counter
+
+
+NORMALIZATIONS = ("exact", "strip", "extract")
+DEFAULT_NORMALIZATION = "strip"
+
+# Characters around a label that are ignored, e.g. in "A.", "(A)", " A:" or "**A**"
+LABEL_PUNCTUATION = " \t\n\r.,:;!?()[]{}*\"'"
+
+# Reasons why an answer is not counted
+FAILURE_EMPTY = "empty"
+FAILURE_UNKNOWN_LABEL = "unknown label"
+FAILURE_NO_LABEL = "no label"
+
+
+def normalize_label(answer):
+    # Upper case label without the surrounding punctuation, e.g. "(a)" -> "A"
+    if answer is None:
+        return ""
+    return str(answer).strip(LABEL_PUNCTUATION).upper()
+
+
+def make_label_pattern(labels):
+    # Upper case label that is not part of a word, e.g. "B" in "Option B." but not in "Because"
+    return re.compile(rf"(?<![A-Za-z])({'|'.join(map(re.escape, labels))})(?![A-Za-z])")
+
+
+def normalize_answer(answer, labels, normalization=DEFAULT_NORMALIZATION, pattern=None):
+    """
+    Map an answer to an answer option label.
+
+    Args:
+        answer (str): Answer of the model, e.g. " A:" or "I would choose B"
+        labels (list): Labels of the answer options, e.g. ['A', 'B', 'C']
+        normalization (str): "exact", "strip" or "extract", see NORMALIZATIONS
+        pattern (re.Pattern): Compiled make_label_pattern(labels), built on every call if not given
+
+    Returns:
+        label (str): Label of the answer, or the normalized answer if it is not one of the labels
+    """
+    if normalization not in NORMALIZATIONS:
+        raise ValueError(f"Unknown normalization {normalization!r}, expected one of {NORMALIZATIONS}")
+    if normalization == "exact":
+        return "" if answer is None else str(answer)
+    label = normalize_label(answer)
+    if normalization == "extract" and labels and label not in labels and answer is not None:
+        # The case is kept, so the article "a" is not taken for the label "A"
+        match = (pattern or make_label_pattern(labels)).search(str(answer))
+        if match is not None:
+            return match[1]
+    return label
+
+
+def classify_failure(label):
+    # Reason why a normalized answer is not one of the answer option labels
+    if not label:
+        return FAILURE_EMPTY
+    # A single letter that is not one of the options, e.g. "D" with three options
+    if len(label) == 1 and label.isalpha():
+        return FAILURE_UNKNOWN_LABEL
+    return FAILURE_NO_LABEL
+
+
+def tally_answers(answers, labels, normalization=DEFAULT_NORMALIZATION):
+    """
+    Count how often every answer option label was given.
+
+    Args:
+        answers (list): Answers of the model, e.g. ['A', 'B.', '(a)', 'I would choose']
+        labels (list): Labels of the answer options, e.g. ['A', 'B', 'C']
+        normalization (str): "exact", "strip" or "extract", see NORMALIZATIONS
+
+    Returns:
+        tally (dict): Number of valid answers, the counts and shares of every label (NaN if there are no valid answers),
+                      the number of invalid answers per failure reason and the number of valid answers that were
+                      rescued by the normalization, i.e. that are not exactly a label
+    """
+    counts = dict.fromkeys(labels, 0)
+    failures = Counter()
+    rescued = 0
+    pattern = make_label_pattern(labels) if normalization == "extract" and labels else None
+    # Answers repeat a lot, so every distinct answer is normalized once
+    for answer, count in Counter(answers).items():
+        label = normalize_answer(answer, counts, normalization, pattern)
+        if label in counts:
+            counts[label] += count
+            if answer != label:
+                rescued += count
+        else:
+            failures[classify_failure(label)] += count
+    valid = sum(counts.values())
+    return {
+        "Valid": valid,
+        "Rescued": rescued,
+        "Counts": counts,
+        "Shares": {label: count / valid if valid else float('nan') for label, count in counts.items()},
+        "Failures": dict(failures),
+    }
+
+
+def format_failures(failures):
+    # Breakdown of the invalid answers for the results table, e.g. "no label: 3, empty: 1"
+    return ", ".join(f"{reason}: {count}" for reason, count in sorted(failures.items(), key=lambda item: -item[1]))
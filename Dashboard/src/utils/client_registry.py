@@ -0,0 +1,141 @@
+# Per-process registry of the OpenAI and Replicate clients.
+# Every client keeps a pool of HTTP connections (keep-alive and TLS sessions), so the clients are reused per API key
+# by the experiments, the live recreation page and the chatbot instead of building a new one for every click.
+# The background jobs run in processes forked from the web server. The connections of a pool cannot be shared between
+# processes, so a forked process drops the inherited clients and builds its own.
+
+# Import required libraries
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from openai import OpenAI
+from replicate.client import Client
+
+
+DEFAULT_MAX_CLIENTS = 32
+DEFAULT_IDLE_TIMEOUT = 15 * 60  # 15 minutes
+
+
+def hash_api_key(api_key):
+    # Only a hash of an API key is kept, e.g. as dictionary key or in file names
+    return hashlib.sha256(str(api_key).encode('utf-8')).hexdigest()
+
+
+class ClientRegistry:
+
+    """Thread-safe LRU registry of API clients per (provider, API key), bounded in size and with idle eviction.
+
+    Clients are held while they are used (see hold), evicted clients are only closed once nobody holds them anymore.
+    """
+
+    def __init__(self, max_clients=DEFAULT_MAX_CLIENTS, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        # (provider, hashed API key) -> (client, time of last use), least recently used first
+        self.clients = OrderedDict()
+        # id(client) -> number of callers that currently use the client
+        self.holders = {}
+        # id(client) -> client that was evicted while it was held, it is closed with its last release
+        self.retired = {}
+        # Process that created the clients
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(provider, api_key):
+        return provider, hash_api_key(api_key)
+
+    @staticmethod
+    def create_client(provider, api_key):
+        if provider == 'openai':
+            return OpenAI(api_key=api_key)
+        elif provider == 'replicate':
+            return Client(api_token=api_key)
+        raise ValueError(f'Unknown provider "{provider}"')
+
+    @staticmethod
+    def close_client(client):
+        if hasattr(client, 'close'):
+            client.close()
+
+    def acquire(self, provider, api_key):
+        """
+        Get the client of the provider and API key and hold it until it is released.
+
+        Returns:
+            client (OpenAI or replicate.client.Client): Pooled client, must be passed to release after use
+        """
+        key = self.make_key(provider, api_key)
+        now = time.monotonic()
+        with self.lock:
+            self.check_process()
+            self.evict_idle(now)
+            if key in self.clients:
+                client = self.clients[key][0]
+                self.clients.move_to_end(key)
+            else:
+                client = self.create_client(provider, api_key)
+                # Evict the least recently used clients that exceed the size cap
+                while len(self.clients) >= self.max_clients:
+                    self.retire(self.clients.popitem(last=False)[1][0])
+            self.clients[key] = (client, now)
+            self.holders[id(client)] = self.holders.get(id(client), 0) + 1
+        return client
+
+    def release(self, client):
+        with self.lock:
+            # Clients of the parent process were dropped after the fork, they are not counted anymore
+            if id(client) not in self.holders:
+                return
+            self.holders[id(client)] -= 1
+            if self.holders[id(client)] == 0:
+                del self.holders[id(client)]
+                # Close an evicted client once its last user is finished
+                if id(client) in self.retired:
+                    self.close_client(self.retired.pop(id(client)))
+
+    @contextmanager
+    def hold(self, provider, api_key):
+        # Client of the provider and API key that is not closed while the block runs
+        client = self.acquire(provider, api_key)
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def retire(self, client):
+        # An evicted client is closed right away if nobody holds it, otherwise with its last release
+        if self.holders.get(id(client)):
+            self.retired[id(client)] = client
+        else:
+            self.close_client(client)
+
+    def check_process(self):
+        # The inherited clients still belong to the parent process, so they are dropped without closing their pools
+        if self.pid != os.getpid():
+            self.clients = OrderedDict()
+            self.holders = {}
+            self.retired = {}
+            self.pid = os.getpid()
+
+    def evict_idle(self, now):
+        # Evict the clients that were not used for idle_timeout seconds, the oldest ones are at the front
+        while self.clients:
+            key, (client, last_used) = next(iter(self.clients.items()))
+            if now - last_used < self.idle_timeout:
+                break
+            del self.clients[key]
+            self.retire(client)
+
+    def clear(self):
+        with self.lock:
+            for client, last_used in self.clients.values():
+                self.retire(client)
+            self.clients.clear()
+
+
+# Client registry of this process, shared by the experiments, the live recreation page and the chatbot
+client_registry = ClientRegistry()
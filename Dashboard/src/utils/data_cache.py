@@ -0,0 +1,60 @@
+# Process-wide cache of the CSV files in data/Output.
+# The callbacks of the experiment pages read the same result files on every change of a control. The cache reads and
+# parses every file once and only reads it again if the file changed on disk (modification time or size), so file I/O
+# and parsing are off the interactive path while updated results still show up without restarting the app.
+
+# Import required libraries
+import os
+import threading
+import pandas as pd
+
+
+def make_read_only(df):
+    # Numeric columns are shared between all callers, so writing to them raises instead of changing the cached frame.
+    # Object columns stay writeable, as pandas can not compare read-only object arrays.
+    for block in df._mgr.blocks:
+        if block.values.dtype != object:
+            block.values.flags.writeable = False
+    return df
+
+
+class DataCache:
+
+    """Thread-safe cache of parsed CSV files, invalidated when a file changes on disk."""
+
+    def __init__(self):
+        # (path, read_csv arguments) -> ((modification time, size), frame)
+        self.frames = {}
+        self.lock = threading.Lock()
+
+    def read_csv(self, path, **kwargs):
+        """
+        Return the parsed CSV file, read from disk only if it is not cached or changed since it was read.
+
+        Args:
+            path (str): Path of the CSV file, e.g. 'data/Output/Loss_aversion_experiment_with_llama.csv'
+            kwargs: Arguments of pd.read_csv, e.g. index_col=0
+
+        Returns:
+            df (pd.DataFrame): Shallow copy of the cached frame, the values of its numeric columns are read-only
+        """
+        key = (os.path.abspath(path), tuple(sorted(kwargs.items())))
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            cached = self.frames.get(key)
+        if cached is None or cached[0] != version:
+            df = make_read_only(pd.read_csv(path, **kwargs))
+            with self.lock:
+                self.frames[key] = (version, df)
+            cached = (version, df)
+        # Columns that a caller adds or replaces only change its own copy
+        return cached[1].copy(deep=False)
+
+    def clear(self):
+        with self.lock:
+            self.frames.clear()
+
+
+# Process-wide data cache shared by the experiment pages
+data_cache = DataCache()
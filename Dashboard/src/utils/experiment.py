@@ -1,23 +1,44 @@
 # Import required libraries 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 import random
 import time
-from openai import OpenAI
-from replicate.client import Client
+import uuid
+
+# Local imports
+from utils.answer_parser import parse_numeric_answers
+from utils.answer_tally import tally_answers, format_failures, normalize_answer, normalize_label, DEFAULT_NORMALIZATION
+from utils.client_registry import client_registry, hash_api_key
+from utils.rate_limiter import rate_limiter, estimate_tokens
+from utils.response_cache import response_cache
+from utils.run_journal import RunJournal, make_run_id
 
 class Experiment:
     
     """Class to run an experiment with OpenAI's GPT-3.5 and GPT-4 models and Replicate's Llama-2-70b model."""
     
     # Constants
-    GPT_3_5_DELAY = 60/3500
-    GPT_4_DELAY = 60/500
-    LLAMA_DELAY = 1/50
+    LLAMA_MODEL_VERSION = 'meta/llama-2-70b-chat:02e509c789964a7ea8736978a43525956ef40397be9033abf9fd2badfe68c9e3'
     ANSWER_OPTION_LABELS = ['A', 'B', 'C', 'D', 'E', 'F']
+    # Maximum number of in-flight requests per provider when running concurrently
+    DEFAULT_CONCURRENCY = {'openai': 8, 'replicate': 4}
+    # Number of completions requested at once with OpenAI's n parameter
+    SAMPLES_PER_REQUEST = 20
+    # Minimum number of samples per cell before early stopping is considered
+    MIN_SAMPLES = 10
+    # z-value of the 95% confidence interval of the answer shares
+    CI_Z = 1.96
+    # Number of most likely first tokens that are requested from OpenAI with the logprobs option
+    TOP_LOGPROBS = 5
+    # Minimum number of seconds between two calls of the batch callback, the dashboard polls once per second
+    BATCH_CALLBACK_INTERVAL = 1
     
     def __init__(self, api_keys, experiment_type, prompts, models, iterations, temperature, num_options, 
-                 answers, instruction_checklist, instructions, shuffle_option=False):
+                 answers, instruction_checklist, instructions, shuffle_option=False, concurrency=None,
+                 samples_per_request=1, run_id=None, ci_width=None, early_stopping=False, min_samples=MIN_SAMPLES,
+                 normalization=DEFAULT_NORMALIZATION, logprobs=False, reuse_responses=False):
         self.api_keys = api_keys
         self.experiment_type = experiment_type
         self.prompts = prompts
@@ -39,12 +60,190 @@ class Experiment:
         self.model_answers = None
         self.experiment_prompts = []
         self.low_answers_share_warning = False
+        # None runs the requests one after another, True uses DEFAULT_CONCURRENCY,
+        # an int or a dict ({'openai': 8, 'replicate': 4}) sets the in-flight requests per provider
+        self.concurrency = concurrency
+        # Replicate does not support multiple completions per request, so Llama always uses single calls
+        self.samples_per_request = samples_per_request
+        # Answers of an interrupted run are replayed from the cache when it is resumed, set to None to always query the models
+        self.response_cache = response_cache
+        # Also replay the answers of earlier runs of the same user (API keys) at temperatures above 0
+        self.reuse_responses = reuse_responses
+        # Hashed API keys of the user, and the scope of the cached answers of this run (kept when the run is resumed)
+        self.user_scope = hash_api_key(sorted((api_keys or {}).items()))
+        self.cache_scope = None
+        # Finished cells are checkpointed under the run id, by default it is derived from the configuration
+        self.run_id = run_id
+        self.journal = None
+        # Optional function that is called with (finished cells, total cells) after every cell
+        self.progress_callback = None
+        # Optional function that is called without arguments after a batch of a running cell, at most every
+        # BATCH_CALLBACK_INTERVAL seconds, e.g. to publish the results of the running cells (see get_running_results)
+        self.batch_callback = None
+        self.last_batch_callback = 0
+        # Answers of the cells that are still sampled, {(model, scenario index): answers so far}
+        self.running_cells = {}
+        # With early stopping, sampling a cell stops once min_samples valid answers have the same label or price.
+        # Answer option cells also stop once the confidence interval of every answer share is narrower than ci_width,
+        # a ci_width switches early stopping on. Without early stopping all iterations are used.
+        self.ci_width = ci_width
+        self.early_stopping = early_stopping or ci_width is not None
+        self.min_samples = min_samples
+        # API calls and samples that were not requested because of early stopping
+        self.calls_saved = 0
+        self.samples_saved = 0
+        # How tolerant the answer option labels are matched before counting, see utils.answer_tally
+        self.normalization = normalization
+        # Replace answers of the GPT models that are not a label by the most likely label among the first tokens
+        self.logprobs = logprobs
+        # Answers that were counted because of the normalization or the logprobs instead of being discarded,
+        # counted from the answers of the finished cells, so replayed cells are included. The answers rescued by the
+        # logprobs are flagged next to the answers (in the cache and the journal), the answers themselves are unchanged.
+        self.rescued_answers = 0
+        self.logprob_rescues = 0
+        # Pooled clients of the registry that are held while the experiment runs
+        self.held_clients = []
         
     def run(self):
         
-        # Set API keys
+        # Set API keys, the pooled clients are held until the run is finished, so they are not closed while in use
         self.set_api_keys()
+        try:
+            self.run_cells()
+        finally:
+            self.release_clients()
+            
+            
+    def run_cells(self):
+        
+        # Open the journal, an unfinished run with the same run id is continued
+        if self.run_id is None:
+            # Answers completed with the logprobs are journaled under their own id, and every user (API keys) gets their own
+            # journal, so concurrent runs of the same experiment by different users do not share it
+            self.run_id = make_run_id(self.experiment_type, self.prompts, self.answers, self.models, self.iterations,
+                                      self.temperature, self.num_options, self.instruction_checklist,
+                                      self.instructions, self.shuffle_options, *(['logprobs'] if self.logprobs else []),
+                                      scope=self.user_scope)
+        self.journal = RunJournal(self.run_id)
+        setup, finished_cells = self.journal.load()
+        
+        if setup is None:
+            self.prepare_prompts()
+            # Every new run draws its own samples, only a resumed run replays the cached answers of the same run
+            self.cache_scope = uuid.uuid4().hex
+            self.journal.write_setup({
+                'experiment_prompts': self.experiment_prompts,
+                'instructions': self.instructions,
+                'answer_label_mapping': getattr(self, 'answer_label_mapping', None),
+                'cache_scope': self.cache_scope,
+            })
+        else:
+            # Reuse the prompts of the interrupted run, as shuffled answer options would differ otherwise
+            self.experiment_prompts = setup['experiment_prompts']
+            self.instructions = setup['instructions']
+            self.answer_label_mapping = setup['answer_label_mapping']
+            self.cache_scope = setup.get('cache_scope') or uuid.uuid4().hex
+            
+        if self.experiment_type == 'numeric':
+            self.max_tokens_openai = 5
+            self.max_tokens_llama = 5
+        
+        # Rows of the finished cells, filled while the experiment runs
+        self.results_list = []
+        
+        # One cell per model, prompt, and instruction
+        cells = [(model, i, prompt, instruction) for model in self.models
+                 for i, (prompt, instruction) in enumerate(zip(self.experiment_prompts, self.instructions))]
+        self.total_cells = len(cells)
+        
+        # Replay the cells that were finished by an interrupted run
+        for model, i, prompt, instruction in cells:
+            if (model, i) in finished_cells:
+                self.finish_cell(model, i, *finished_cells[(model, i)], record=False)
+        pending_cells = [cell for cell in cells if (cell[0], cell[1]) not in finished_cells]
+
+        if self.concurrency:
+            asyncio.run(self.run_cells_async(pending_cells))
+        else:
+            for model, i, prompt, instruction in pending_cells:
+                answers, rescued = self.run_cell(model, i, prompt, instruction)
+                self.finish_cell(model, i, answers, rescued)
+        
+        # Cells finish in any order when running concurrently, so the results are sorted by model and scenario
+        order = {(model, i): k for k, (model, i, prompt, instruction) in enumerate(cells)}
+        self.results_list.sort(key=lambda row: order[(row['Model'], row['Scenario'] - 1)])
+        self.raw_model_answers_dict = self.sort_answers_dict(self.raw_model_answers_dict)
+        self.model_answers_dict = self.sort_answers_dict(self.model_answers_dict)
+            
+        self.results_df = pd.DataFrame(self.results_list)
+        self.journal.finish()
+        
+        
+    def report_batch(self, model, i, answers):
+        # Keep the answers so far of the running cell and report them if the last report is long enough ago
+        self.running_cells[(model, i)] = list(answers)
+        now = time.monotonic()
+        if self.batch_callback is not None and now - self.last_batch_callback >= Experiment.BATCH_CALLBACK_INTERVAL:
+            self.last_batch_callback = now
+            self.batch_callback()
+            
+            
+    def get_running_results(self):
+        """
+        Results of the cells that are still sampled, based on the answers so far.
+        
+        Returns:
+            rows (list): One row per running cell with the same columns as the rows of the finished cells
+            prices (dict): Prices so far of the running cells as {model: {scenario index: prices}}, empty for answer option experiments
+        """
+        rows = []
+        prices = {}
+        for (model, i), answers in list(self.running_cells.items()):
+            row = {
+                'Model': model,
+                'Scenario': i+1,
+                'Temperature': self.temperature,
+                'Iterations': len(answers),
+            }
+            # Same counts as for the finished cells, without changing the results or the warnings of the experiment
+            if self.experiment_type == 'answer_options':
+                tally = tally_answers(answers, self.answer_option_labels, self.normalization)
+                row['Correct Answers'] = tally["Valid"]
+                row['Invalid Answers'] = format_failures(tally["Failures"])
+                row.update(self.get_share_columns(tally["Shares"], i))
+            elif self.experiment_type == 'numeric':
+                values, valid = parse_numeric_answers(answers)
+                cell_prices = values[valid].tolist()
+                prices.setdefault(model, {})[i] = cell_prices
+                row['Correct Answers'] = len(cell_prices)
+                row.update(self.get_price_statistics(cell_prices))
+            rows.append(row)
+        return rows, prices
+        
+        
+    def finish_cell(self, model, i, answers, rescued, record=True):
+        self.running_cells.pop((model, i), None)
+        self.model_answers = answers
+        # Flags of the answers that were rescued by the logprobs
+        self.model_rescued = rescued
         
+        # Checkpoint the answers of the finished cell
+        if record:
+            self.journal.record_cell(model, i, answers, rescued)
+        
+        self.results_list.append(self.process_cell(model, i))
+        
+        # Report the progress
+        if self.progress_callback is not None:
+            self.progress_callback(len(self.results_list), self.total_cells)
+            
+            
+    def sort_answers_dict(self, answers_dict):
+        # Order the answers of {model: {scenario index: answers}} like the selected models and the scenarios
+        return {model: dict(sorted(answers_dict[model].items())) for model in self.models if model in answers_dict}
+        
+        
+    def prepare_prompts(self):
         # Check experiment type
         if self.experiment_type == 'answer_options':
             if self.shuffle_options:
@@ -53,92 +252,284 @@ class Experiment:
             
         elif self.experiment_type == 'numeric':
             self.experiment_prompts = self.prompts
-            self.max_tokens_openai = 5
-            self.max_tokens_llama = 5
 
         # Process instructions
         self.process_instructions()
         
-        results_list = []
-
-        # Iterate through models, prompts, and instructions
-        for model in self.models:
-            for i, (prompt, instruction) in enumerate(zip(self.experiment_prompts, self.instructions)):
-                if model == 'llama-2-70b':
-                    self.model_answers = self.run_experiment_with_llama(model, prompt, instruction)
-                else:
-                    self.model_answers = self.run_experiment_with_openai(model, prompt, instruction)
-                
-                # Store answers of corresponding model and scenario in a dictionary
-                if model not in self.raw_model_answers_dict.keys():
-                    self.raw_model_answers_dict[model] = {i: self.model_answers}
-                else:
-                    self.raw_model_answers_dict[model][i] = self.model_answers
-                
-                # Create a dictionary to store results for DataFrame
-                result_dict = {
-                    'Model': model,
-                    'Scenario': i+1,
-                    'Temperature': self.temperature,
-                    'Iterations': self.iterations,
-                }
+        
+    def process_cell(self, model, i):
+        # Store answers of corresponding model and scenario in a dictionary
+        if model not in self.raw_model_answers_dict.keys():
+            self.raw_model_answers_dict[model] = {i: self.model_answers}
+        else:
+            self.raw_model_answers_dict[model][i] = self.model_answers
+        
+        # Create a dictionary to store results for DataFrame
+        result_dict = {
+            'Model': model,
+            'Scenario': i+1,
+            'Temperature': self.temperature,
+            # Fewer than the requested iterations if the cell was stopped early
+            'Iterations': len(self.model_answers),
+        }
+        
+        # Count answers depending on experiment type
+        if self.experiment_type == 'answer_options':
+            # Check if the answers were shuffled
+            if not self.shuffle_options:
+                result_dict = self.count_answers(result_dict)
+            elif self.shuffle_options:
+                result_dict = self.count_answers_with_shuffle(result_dict, i)
                 
-                # Count answers depending on experiment type
-                if self.experiment_type == 'answer_options':
-                    # Check if the answers were shuffled
-                    if not self.shuffle_options:
-                        result_dict = self.count_answers(result_dict)
-                    elif self.shuffle_options:
-                        result_dict = self.count_answers_with_shuffle(result_dict, i)
-                        
-                elif self.experiment_type == 'numeric':
-                    result_dict = self.count_answers_numeric(result_dict, model, i)
-                    
-                results_list.append(result_dict)
+        elif self.experiment_type == 'numeric':
+            result_dict = self.count_answers_numeric(result_dict, model, i)
             
-        self.results_df = pd.DataFrame(results_list)
+        return result_dict
         
         
     def set_api_keys(self):
-        self.client = OpenAI(api_key=self.api_keys['openai'])
-        self.replicate = Client(api_token=self.api_keys['replicate'])
+        # Clients that were already assigned (e.g. stub clients for testing) are kept,
+        # otherwise the pooled clients of the API keys are reused across runs
+        if self.client is None:
+            self.client = client_registry.acquire('openai', self.api_keys['openai'])
+            self.held_clients.append('client')
+        if self.replicate is None:
+            self.replicate = client_registry.acquire('replicate', self.api_keys['replicate'])
+            self.held_clients.append('replicate')
+            
+            
+    def release_clients(self):
+        # The released clients may be closed by the registry, so the next run acquires them again
+        for attribute in self.held_clients:
+            client_registry.release(getattr(self, attribute))
+            setattr(self, attribute, None)
+        self.held_clients = []
+            
+            
+    def get_provider(self, model):
+        return 'replicate' if model == 'llama-2-70b' else 'openai'
+    
+    
+    def estimate_tokens(self, model, prompt, instruction, batch_size=1):
+        # The prompt is billed once per request, the completion once per sample
+        max_tokens = self.max_tokens_llama if model == 'llama-2-70b' else self.max_tokens_openai
+        return estimate_tokens(prompt, instruction, max_tokens=max_tokens * batch_size)
+    
+    
+    def get_batches(self, model):
+        # Split the iterations into (first sample index, batch size) chunks of at most samples_per_request samples
+        # At temperature 0 the cache replays one stored sample, so the whole cell is fetched as one batch
+        if self.temperature == 0 and self.response_cache is not None:
+            return [(0, self.iterations)]
+        batch_size = 1 if model == 'llama-2-70b' else max(1, self.samples_per_request)
+        # With early stopping, the first batch only requests the minimum number of samples before checking the stopping rule
+        first = min(batch_size, self.min_samples, self.iterations) if self.early_stopping else 0
+        batches = [(0, first)] if first > 0 else []
+        return batches + [(start, min(batch_size, self.iterations - start)) for start in range(first, self.iterations, batch_size)]
+        
+        
+    def get_concurrency(self, provider):
+        if isinstance(self.concurrency, dict):
+            return self.concurrency.get(provider, Experiment.DEFAULT_CONCURRENCY[provider])
+        elif self.concurrency is True:
+            return Experiment.DEFAULT_CONCURRENCY[provider]
+        else:
+            return int(self.concurrency)
                 
                 
-    def run_experiment_with_openai(self, model, prompt, instruction):
+    def use_logprobs(self, model):
+        # Only OpenAI returns logprobs, and only answer option experiments have labels to look for
+        return self.logprobs and self.experiment_type == 'answer_options' and model != 'llama-2-70b'
+    
+    
+    def rescue_with_logprobs(self, answer, choice):
+        # Keep answers that are a label, otherwise take the most likely first token that is a label
+        # Returns the answer and whether it was rescued
+        if normalize_answer(answer, self.answer_option_labels, self.normalization) in self.answer_option_labels:
+            return answer, False
+        if choice.logprobs is None or not choice.logprobs.content:
+            return answer, False
+        candidates = sorted(choice.logprobs.content[0].top_logprobs, key=lambda candidate: -candidate.logprob)
+        for candidate in candidates:
+            label = normalize_label(candidate.token)
+            if label in self.answer_option_labels:
+                return label, True
+        return answer, False
+    
+    
+    def get_openai_answers(self, model, prompt, instruction, batch_size=1):
+        response = self.openai_api_call(model, prompt, instruction, n=batch_size, logprobs=self.use_logprobs(model))
+        
+        # Extract one answer per returned choice, and whether it was rescued by the logprobs
+        answers = [choice.message.content.strip() for choice in response.choices]
+        if not self.use_logprobs(model):
+            return answers, [False] * len(answers)
+        rescues = [self.rescue_with_logprobs(answer, choice) for answer, choice in zip(answers, response.choices)]
+        return [answer for answer, rescued in rescues], [rescued for answer, rescued in rescues]
+    
+    
+    def get_llama_answer(self, model, prompt, instruction):
+        response = self.replicate_api_call(Experiment.LLAMA_MODEL_VERSION, prompt, instruction)
+        
+        # Concatenate the streamed output to one answer
+        answer = ''
+        for item in response:
+            answer += item
+        return answer.strip()
+    
+    
+    def fetch_answers(self, model, prompt, instruction, batch_size):
+        # Wait until the rate limit of the model and API key allows the next API call
+        rate_limiter.acquire(model, self.estimate_tokens(model, prompt, instruction, batch_size),
+                             api_key=self.api_keys.get(self.get_provider(model)))
+        
+        # Returns the answers and whether they were rescued by the logprobs
+        if model == 'llama-2-70b':
+            return [self.get_llama_answer(model, prompt, instruction)], [False]
+        else:
+            return self.get_openai_answers(model, prompt, instruction, batch_size)
+        
+        
+    def get_answers(self, model, prompt, instruction, start, batch_size):
+        if self.response_cache is None:
+            return self.fetch_answers(model, prompt, instruction, batch_size)
+        
+        # Only the samples that are not cached yet are requested from the model
+        max_tokens = self.max_tokens_llama if model == 'llama-2-70b' else self.max_tokens_openai
+        fetch = lambda count: self.fetch_answers(model, prompt, instruction, count)
+        return self.response_cache.get_flagged_answers(model, prompt, instruction, self.temperature, max_tokens, fetch,
+                                                       batch_size, start=start, batch_size=batch_size,
+                                                       logprobs=self.use_logprobs(model), scope=self.get_cache_scope())
+    
+    
+    def get_cache_scope(self):
+        # Answers at temperature 0 are deterministic, so they are replayed for all runs of the user, like all answers
+        # if reusing earlier answers is switched on. Otherwise only the answers of this run are replayed.
+        if self.temperature == 0 or self.reuse_responses:
+            return self.user_scope
+        return self.cache_scope
+                
+                
+    def get_share_ci_width(self, count, n):
+        # Width of the Wilson score interval of the share count / n
+        z = Experiment.CI_Z
+        return 2 * z * np.sqrt(count * (n - count) / n + z**2 / 4) / (n + z**2)
+    
+    
+    def should_stop(self, answers):
+        # Early stopping is disabled or there are not enough samples yet
+        if not self.early_stopping or len(answers) < self.min_samples:
+            return False
+        
+        # Numeric answers have no shares, they only stop once min_samples valid prices are all identical
+        if self.experiment_type == 'numeric':
+            values, valid = parse_numeric_answers(answers)
+            prices = values[valid]
+            return len(prices) >= self.min_samples and bool((prices == prices[0]).all())
+        
+        # Invalid answers are not counted, so the stopping rules only look at the valid labels
+        tally = tally_answers(answers, self.answer_option_labels, self.normalization)
+        if tally["Valid"] < self.min_samples:
+            return False
+        
+        # Zero variance: all valid answers so far have the same label
+        if max(tally["Counts"].values()) == tally["Valid"]:
+            return True
+        
+        # Only a ci_width enables the confidence interval rule
+        if self.ci_width is None:
+            return False
+        return all(self.get_share_ci_width(count, tally["Valid"]) <= self.ci_width
+                   for count in tally["Counts"].values())
+    
+    
+    def record_saved(self, skipped_batches):
+        # Every skipped batch is one API call that was not sent
+        self.calls_saved += len(skipped_batches)
+        self.samples_saved += sum(batch_size for start, batch_size in skipped_batches)
+                
+                
+    def run_cell(self, model, i, prompt, instruction):
+        # Same for all models, the API calls of the providers only differ in fetch_answers
         answers = []
-        for i in range(self.iterations):
-            response = self.openai_api_call(model, prompt, instruction)
-
-            # Store the answer in the list
-            answer = response.choices[0].message.content
-            answers.append(answer.strip())
+        rescued = []
+        batches = self.get_batches(model)
+        for k, (start, batch_size) in enumerate(batches):
+            # Store the answers in the list
+            batch_answers, batch_rescued = self.get_answers(model, prompt, instruction, start, batch_size)
+            answers.extend(batch_answers)
+            rescued.extend(batch_rescued)
+            self.report_batch(model, i, answers)
             
-            # Add delay before the next API call
-            if model == 'gpt-3.5-turbo-1106':
-                time.sleep(Experiment.GPT_3_5_DELAY)
-            else:
-                time.sleep(Experiment.GPT_4_DELAY)
+            # Stop sampling once the answer shares are precise enough
+            if self.should_stop(answers):
+                self.record_saved(batches[k + 1:])
+                break
 
-        return answers
+        return answers, rescued
     
     
-    def run_experiment_with_llama(self, model, prompt, instruction):
-        model = 'meta/llama-2-70b-chat:02e509c789964a7ea8736978a43525956ef40397be9033abf9fd2badfe68c9e3'
+    def interleave_cells(self, cells):
+        # Alternate between the models, so that every provider's pool gets work from the first scenario on
+        model_order = {model: k for k, model in enumerate(self.models)}
+        return sorted(cells, key=lambda cell: (cell[1], model_order[cell[0]]))
+    
+    
+    async def run_cells_async(self, cells):
+        # Every provider gets its own bounded worker pool, so GPT and Llama are sampled at the same time
+        # and the runtime is close to the slowest provider instead of the sum of all providers
+        executors = {provider: ThreadPoolExecutor(max_workers=self.get_concurrency(provider), thread_name_prefix=provider)
+                     for provider in Experiment.DEFAULT_CONCURRENCY}
+        
+        async def run_and_finish_cell(model, i, prompt, instruction):
+            answers, rescued = await self.run_cell_async(model, i, prompt, instruction, executors[self.get_provider(model)])
+            self.finish_cell(model, i, answers, rescued)
+        
+        try:
+            await asyncio.gather(*(run_and_finish_cell(*cell) for cell in self.interleave_cells(cells)))
+        finally:
+            # Drop the queued requests if a cell failed, the finished cells are already checkpointed
+            for executor in executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+    
+    
+    async def run_cell_async(self, model, i, prompt, instruction, executor):
+        loop = asyncio.get_running_loop()
+        
+        async def fetch_batch(start, batch_size):
+            # The clients and the cache are synchronous, so every batch is run in a worker thread of the provider's pool,
+            # which also bounds the number of requests that are in flight at the same time
+            return await loop.run_in_executor(executor, self.get_answers, model, prompt, instruction, start, batch_size)
+        
+        # Without early stopping all batches are sent at once, otherwise in waves of about min_samples samples
+        # (at most the concurrency limit), so that the stopping rule is checked after every wave
+        batches = self.get_batches(model)
+        if not self.early_stopping or not batches:
+            wave_size = max(1, len(batches))
+        else:
+            wave_size = min(self.get_concurrency(self.get_provider(model)), -(-self.min_samples // batches[0][1]))
+        
         answers = []
-        for i in range(self.iterations):
-            response = self.replicate_api_call(model, prompt, instruction)
-
-            # Store the answer in the list
-            answer = ''
-            for item in response:
-                answer += item
-
-            answers.append(answer.strip())
+        rescued = []
+        for k in range(0, len(batches), wave_size):
+            wave = [None] * len(batches[k:k + wave_size])
             
-            # Add delay before the next API call
-            time.sleep(Experiment.LLAMA_DELAY)
-
-        return answers
+            async def fetch_wave_batch(j, start, batch_size):
+                wave[j] = await fetch_batch(start, batch_size)
+                # Report the answers so far after every batch, not only once the whole wave is finished
+                self.report_batch(model, i, answers + [answer for batch in wave if batch is not None for answer in batch[0]])
+            
+            # Answers are kept in the order of the iterations
+            await asyncio.gather(*(fetch_wave_batch(j, start, batch_size)
+                                   for j, (start, batch_size) in enumerate(batches[k:k + wave_size])))
+            for batch_answers, batch_rescued in wave:
+                answers.extend(batch_answers)
+                rescued.extend(batch_rescued)
+            
+            if self.should_stop(answers):
+                self.record_saved(batches[k + wave_size:])
+                break
+        return answers, rescued
     
     
     def create_prompts(self):
@@ -169,89 +560,85 @@ class Experiment:
             self.instructions = ["" for _ in range(len(self.prompts))]
             
             
-    def count_answers(self, result_dict):
-        # Count of "correct" answers
-        len_correct = sum(1 for ans in self.model_answers if ans in self.answer_option_labels)
+    def tally_model_answers(self, result_dict):
+        # Count the answer option labels in one pass, variants like "A.", "(A)" or "a" are counted as "A"
+        tally = tally_answers(self.model_answers, self.answer_option_labels, self.normalization)
+        self.rescued_answers += tally["Rescued"]
+        self.logprob_rescues += sum(self.model_rescued)
         
-        result_dict['Correct Answers'] = len_correct
+        # Count of "correct" answers and why the other answers were not counted
+        result_dict['Correct Answers'] = tally["Valid"]
+        result_dict['Invalid Answers'] = format_failures(tally["Failures"])
         
         # Check if the share of correct answers is less than 50%
-        if (len_correct / self.iterations) < 0.5:
+        if (tally["Valid"] / len(self.model_answers)) < 0.5:
             self.low_answers_share_warning = True
-        
-        # Check if len_correct is non-zero before performing further calculations
-        if len_correct > 0:
-            # Counting results
-            for label in self.answer_option_labels:
-                label_share = self.model_answers.count(label) / len_correct
-                result_dict['Share of ' + label] = round(label_share, 2)
-        else:
-            # Set NaN values for share of labels when len_correct is 0
-            for label in self.answer_option_labels:
-                result_dict['Share of ' + label] = float('nan')
+            
+        # Shares are NaN if there are no correct answers
+        return tally["Shares"]
+    
+    
+    def get_share_columns(self, shares, i=None):
+        # Shares of the answers, the labels of the answers differ between the shuffles
+        if self.shuffle_options:
+            return {f'Share of "{ans}"': round(shares[label], 2) for ans, label in self.answer_label_mapping[i].items()}
+        return {'Share of ' + label: round(shares[label], 2) for label in self.answer_option_labels}
+    
+    
+    def count_answers(self, result_dict):
+        shares = self.tally_model_answers(result_dict)
+        result_dict.update(self.get_share_columns(shares))
                 
         return result_dict
     
     
     def count_answers_with_shuffle(self, result_dict, i):
-        # Count of "correct" answers
-        len_correct = sum(1 for ans in self.model_answers if ans in self.answer_option_labels)
-        
-        result_dict['Correct Answers'] = len_correct
-        
-        # Check if the share of correct answers is less than 50%
-        if (len_correct / self.iterations) < 0.5:
-            self.low_answers_share_warning = True
-        
-        # Check if len_correct is non-zero before performing further calculations
-        if len_correct > 0:
-            for ans in self.answer_label_mapping[i].keys():
-                label_share = self.model_answers.count(self.answer_label_mapping[i][ans]) / len_correct
-                result_dict[f'Share of "{ans}"'] = round(label_share, 2)
-            
-        else: 
-            for ans in self.answer_label_mapping[i].keys():
-                result_dict[f'Share of "{ans}"'] = float('nan')  
+        shares = self.tally_model_answers(result_dict)
+        result_dict.update(self.get_share_columns(shares, i))
                 
         return result_dict
                 
                 
     def count_answers_numeric(self, result_dict, model, i):
         
-        # Filter out valid prices
-        valid_prices = [item for item in self.model_answers if item.startswith("$")]
+        # Convert the answers with a currency to prices, e.g. "$1,234.50." or "12 dollars"
+        values, valid = parse_numeric_answers(self.model_answers)
+        prices = values[valid].tolist()
         
         # Check if the share of valid prices is less than 50%
-        if (len(valid_prices) / self.iterations) < 0.5:
+        if (len(prices) / len(self.model_answers)) < 0.5:
             self.low_answers_share_warning = True
         
-        # Remove commas and dollar signs, convert to float
-        prices = [item.replace(',', '').rstrip('.') for item in valid_prices]
-        prices = [float(item.replace('$', '')) for item in prices if item != '$']
-        
         # Store answers of corresponding model and scenario in a dictionary
         if model not in self.model_answers_dict.keys():
             self.model_answers_dict[model] = {i: prices}
         else:
             self.model_answers_dict[model][i] = prices
         
-        result_dict['Correct Answers'] = len(valid_prices)
+        result_dict['Correct Answers'] = len(prices)
+        result_dict.update(self.get_price_statistics(prices))
+        
+        return result_dict
+    
+    
+    def get_price_statistics(self, prices):
+        statistics = {}
         
         # Calculate the mean, median, and quartiles
-        result_dict['Average'] = round(np.mean(prices), 2)
+        statistics['Average'] = round(np.mean(prices), 2)
         
         if len(prices) > 1:
-            result_dict['25th Percentile'] = round(np.percentile(prices, 25), 2)
+            statistics['25th Percentile'] = round(np.percentile(prices, 25), 2)
         
-        result_dict['Median'] = round(np.median(prices), 2)
+        statistics['Median'] = round(np.median(prices), 2)
         
         if len(prices) > 1:
-            result_dict['75th Percentile'] = round(np.percentile(prices, 75), 2)
+            statistics['75th Percentile'] = round(np.percentile(prices, 75), 2)
         
-        return result_dict
+        return statistics
         
             
-    def openai_api_call(self, model, prompt, instruction):
+    def openai_api_call(self, model, prompt, instruction, n=1, logprobs=False):
         response = self.client.chat.completions.create(
                 model=model,  
                 messages=[
@@ -260,7 +647,10 @@ class Experiment:
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=self.max_tokens_openai,
-                temperature=self.temperature
+                temperature=self.temperature,
+                n=n,
+                # Probabilities of the most likely first tokens, only sent if requested
+                **({'logprobs': True, 'top_logprobs': Experiment.TOP_LOGPROBS} if logprobs else {})
             )
         
         return response
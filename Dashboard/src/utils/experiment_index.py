@@ -0,0 +1,85 @@
+# Lookup index of the experiment ids.
+# The dropdowns of the live recreation page select an experiment by its parameters (e.g. scenario, model and priming),
+# the index maps these parameters to the experiment id and back. It is built once from the dictionaries of the prompt
+# store, so a new experiment family only needs an entry in INDEX_PARAMETERS instead of a new if/elif chain.
+
+# Import required libraries
+import threading
+from utils.prompt_store import prompt_store
+
+
+# Parameters that identify an experiment of every family, named after the dictionaries in the prompt store
+INDEX_PARAMETERS = {
+    'PT': ('scenario', 'model', 'priming'),
+    'PT2': ('scenario', 'configuration', 'model'),
+    'DE': ('scenario', 'priming', 'reorder', 'model'),
+    'TU': ('initial_costs', 'orientation_prices', 'buyers', 'model'),
+    'TU2': ('places', 'income', 'model'),
+    'TU3': ('initial_costs', 'orientation_price', 'buyer', 'model'),
+}
+
+
+def normalize_model(model):
+    # The dropdowns use short model names, e.g. "llama-2-70b" for "meta/llama-2-70b-chat:<version>"
+    if model.startswith('meta/'):
+        return model[len('meta/'):].split(':')[0].removesuffix('-chat')
+    return model
+
+
+class ExperimentIndex:
+
+    """Thread-safe, lazily built mapping between the parameters and the ids of the experiments."""
+
+    def __init__(self, store=prompt_store, parameters=INDEX_PARAMETERS):
+        self.store = store
+        self.parameters = parameters
+        # Experiment family -> {parameter tuple: experiment id}
+        self.ids = {}
+        # Experiment id -> {parameter name: value}
+        self.configurations = {}
+        self.lock = threading.Lock()
+
+    def build(self, experiment):
+        if experiment not in self.ids:
+            names = self.parameters[experiment]
+            dictionaries = [self.store.get(experiment, name) for name in names]
+            ids = {}
+            configurations = {}
+            for experiment_id in self.store.get(experiment, 'experiment_prompts'):
+                values = tuple(normalize_model(dictionary[experiment_id]) if name == 'model' else dictionary[experiment_id]
+                               for name, dictionary in zip(names, dictionaries))
+                if values in ids:
+                    raise ValueError(f'Experiments {ids[values]} and {experiment_id} have the same parameters {values}')
+                ids[values] = experiment_id
+                configurations[experiment_id] = dict(zip(names, values))
+            with self.lock:
+                self.configurations.update(configurations)
+                self.ids[experiment] = ids
+        return self.ids[experiment]
+
+    def get_id(self, experiment, *values):
+        """
+        Return the id of the experiment with the given parameters, e.g. experiment_index.get_id("PT", 1, "gpt-3.5-turbo", 0).
+
+        Args:
+            experiment (str): Experiment family, e.g. "PT", "PT2", "DE", "TU", "TU2" or "TU3"
+            values: Values of the parameters in the order of INDEX_PARAMETERS[experiment]
+
+        Returns:
+            experiment_id (str): Id of the experiment, None if no experiment has these parameters
+        """
+        return self.build(experiment).get(values)
+
+    def get_configuration(self, experiment_id):
+        # Parameters of an experiment id, e.g. {"scenario": 1, "model": "gpt-3.5-turbo", "priming": 0} for "PT_1_1"
+        self.build(experiment_id.split('_')[0])
+        return self.configurations[experiment_id]
+
+    def clear(self):
+        with self.lock:
+            self.ids.clear()
+            self.configurations.clear()
+
+
+# Process-wide experiment index shared by the prompt callbacks of the live recreation page
+experiment_index = ExperimentIndex()
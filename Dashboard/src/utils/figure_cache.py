@@ -0,0 +1,93 @@
+# Process-wide cache of the figures of the static experiment pages.
+# The pages plot the stored results for a small, finite set of parameter combinations, so the same figures are built
+# again and again. The cache keeps the serialized figure of every (plot function, parameters) combination, repeated
+# views are served from the JSON without building the figure with pandas and plotly again.
+#
+# Every combination can be rendered at startup by setting the environment variable FIGURE_CACHE_WARM_UP=1.
+
+# Import required libraries
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+DEFAULT_MAX_FIGURES = 2048
+WARM_UP = os.environ.get('FIGURE_CACHE_WARM_UP', '0') == '1'
+
+
+class FigureCache:
+
+    """Thread-safe LRU cache of serialized figures per (plot function, parameters), bounded in size."""
+
+    def __init__(self, max_figures=DEFAULT_MAX_FIGURES):
+        self.max_figures = max_figures
+        # (plot function, parameters, versions of the input files) -> figure JSON, least recently used first
+        self.figures = OrderedDict()
+        # (plot function, parameter combinations, input files) rendered by warm_up
+        self.warm_ups = []
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(plot_function, params, files):
+        # Figures of input files that changed on disk are not served again
+        stats = [os.stat(path) for path in files]
+        versions = tuple((stat.st_mtime_ns, stat.st_size) for stat in stats)
+        return f'{plot_function.__module__}.{plot_function.__qualname__}', params, versions
+
+    def get(self, plot_function, *params, files=()):
+        """
+        Return the figure of plot_function(*params), built only if it is not cached.
+
+        Args:
+            plot_function (function): Function that returns a plotly figure for hashable parameters
+            params: Parameters of the plot function, e.g. the values of the dropdowns
+            files (tuple): Paths of the input files of the plot function that may change while the app is running
+
+        Returns:
+            figure (dict): Figure as dictionary, a new copy on every call
+        """
+        key = self.make_key(plot_function, params, files)
+        with self.lock:
+            figure_json = self.figures.get(key)
+            if figure_json is not None:
+                self.figures.move_to_end(key)
+        if figure_json is None:
+            figure_json = plot_function(*params).to_json()
+            with self.lock:
+                self.figures[key] = figure_json
+                # Drop the least recently used figures that exceed the size cap
+                while len(self.figures) > self.max_figures:
+                    self.figures.popitem(last=False)
+        return json.loads(figure_json)
+
+    def register_warm_up(self, plot_function, combinations, files=()):
+        # Parameter combinations of a plot function that are rendered by warm_up
+        with self.lock:
+            self.warm_ups.append((plot_function, list(combinations), tuple(files)))
+
+    def warm_up(self):
+        # Render the registered combinations, failures are left for the callbacks to raise
+        rendered = 0
+        for plot_function, combinations, files in list(self.warm_ups):
+            for params in combinations:
+                try:
+                    self.get(plot_function, *params, files=files)
+                    rendered += 1
+                except Exception:
+                    continue
+        return rendered
+
+    def start_warm_up(self):
+        # Render in the background, so the app starts serving requests immediately
+        thread = threading.Thread(target=self.warm_up, daemon=True)
+        thread.start()
+        return thread
+
+    def clear(self):
+        with self.lock:
+            self.figures.clear()
+
+
+# Process-wide figure cache shared by the experiment pages
+figure_cache = FigureCache()
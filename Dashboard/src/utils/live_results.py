@@ -0,0 +1,29 @@
+# Partial results of running live experiments.
+# The background jobs publish the rows of the finished cells and of the cells that are still sampled here, the
+# dashboard polls them while the job is running, so results appear before the whole experiment is finished.
+
+# Import required libraries
+import os
+import time
+import diskcache
+from utils.paths import DATA_DIRECTORY
+
+
+# Shared between the worker processes of the background jobs and the web server
+live_results = diskcache.Cache(os.path.join(DATA_DIRECTORY, 'LiveResults'))
+
+# Partial results are only needed while the job is running
+LIVE_RESULTS_EXPIRE = 60 * 60
+
+
+def publish_partial_results(job_id, rows, answers=None, running=None):
+    # The rows of the running cells follow the rows of the finished cells and are replaced with every update
+    live_results.set(job_id, {'rows': list(rows), 'running': list(running or []), 'answers': answers,
+                              'published': time.time()}, expire=LIVE_RESULTS_EXPIRE)
+
+
+def get_partial_results(job_id):
+    # Returns None if the job has not published any results yet
+    if job_id is None:
+        return None
+    return live_results.get(job_id)
@@ -0,0 +1,11 @@
+# Paths of the data directories of the dashboard.
+# They are resolved relative to the package, so the caches and journals end up in the same place no matter from which
+# working directory the app, a background job or a script is started.
+
+# Import required libraries
+import os
+
+
+# Dashboard/src
+SOURCE_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIRECTORY = os.path.join(SOURCE_DIRECTORY, 'data')
@@ -1,4 +1,5 @@
 # Import required libraries 
+import numpy as np
 import plotly.graph_objects as go
 
 
@@ -39,18 +40,112 @@ def plot_results(df, x_axis, groupby, iterations, temperature):
 
 
 
-def plot_results_numeric(df):
+# Boxes of more answers than this are sent as precomputed quartiles instead of every single answer
+MAX_RAW_POINTS = 10_000
+
+
+def get_long_format(df):
+    
+    # Flatten the answers of {model: {scenario index: answers}} into one value array with a model and scenario key per value
+    cells = [(column, i + 1, answers) for column in df.columns for i, answers in enumerate(df[column])
+             if isinstance(answers, (list, tuple, np.ndarray))]
+    lengths = [len(answers) for _, _, answers in cells]
+    values = np.concatenate([np.asarray(answers, dtype=float) for _, _, answers in cells]) if cells else np.empty(0)
+    models = np.repeat([model for model, _, _ in cells], lengths)
+    scenarios = np.repeat([scenario for _, scenario, _ in cells], lengths)
+    return values, models, scenarios
+
+
+
+def get_box_statistics(values):
     
-    # Create traces for each cell
+    # Quartiles like plotly computes them (linear interpolation), the fences are the most extreme answers within 1.5 IQR
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    lowerfence = values[values >= q1 - 1.5 * iqr].min()
+    upperfence = values[values <= q3 + 1.5 * iqr].max()
+    return q1, median, q3, lowerfence, upperfence
+
+
+
+def plot_boxes(values, models, scenarios, quartiles=False):
+    
+    # One box trace per model, its boxes are grouped by scenario
     traces = []
-    for column in df.columns:
-        for i in range(len(df)):
-            traces.append(go.Box(y=df[column][i], name=f'Scenario {i+1}, {column}'))
+    for model in dict.fromkeys(models):
+        in_model = models == model
+        if not quartiles:
+            traces.append(go.Box(x=[f'Scenario {scenario}' for scenario in scenarios[in_model]], y=values[in_model], name=model))
+            continue
+        
+        # Send five numbers per box instead of every answer
+        model_scenarios = list(dict.fromkeys(scenarios[in_model]))
+        statistics = np.array([get_box_statistics(values[in_model & (scenarios == scenario)]) for scenario in model_scenarios])
+        traces.append(go.Box(
+            x=[f'Scenario {scenario}' for scenario in model_scenarios],
+            q1=statistics[:, 0],
+            median=statistics[:, 1],
+            q3=statistics[:, 2],
+            lowerfence=statistics[:, 3],
+            upperfence=statistics[:, 4],
+            name=model,
+        ))
+    return traces
+
+
+
+def plot_results_numeric(df, quartiles=None):
+    
+    # Long format of all answers, quartiles are precomputed for large experiments unless requested otherwise
+    values, models, scenarios = get_long_format(df)
+    if quartiles is None:
+        quartiles = len(values) > MAX_RAW_POINTS
 
     # Create layout
-    layout = go.Layout(title='Boxplots for each Model and Scenario')
+    layout = go.Layout(title='Boxplots for each Model and Scenario', boxmode='group', xaxis=dict(title='Scenario'))
 
     # Create figure
-    fig = go.Figure(data=traces, layout=layout)
+    fig = go.Figure(data=plot_boxes(values, models, scenarios, quartiles), layout=layout)
     
     return fig
+
+
+
+def get_cell_labels(df):
+    return [f"{model}, Scenario {scenario}" for model, scenario in zip(df['Model'], df['Scenario'])]
+
+
+
+def plot_partial_results(df):
+    
+    # Extract answer options columns
+    answer_options = [col for col in df.columns if col.startswith('Share of ')]
+    
+    # Create a bar plot with one group of bars per finished or running cell
+    fig = go.Figure()
+    
+    for option in answer_options:
+        fig.add_trace(go.Bar(
+            x=get_cell_labels(df),
+            y=df[option],
+            name=option,
+            hovertemplate=f"{option}: %{{y:.2f}}<extra></extra>"
+        ))
+        
+    fig.update_layout(
+        barmode='group',
+        xaxis=dict(title='Model, Scenario'),
+        yaxis=dict(title='Share', range=[0, 1.1]),
+        title=dict(text="Share of Answers so far (the experiment is still running)"),
+        bargap=0.3
+    )
+    
+    return fig
+
+
+
+def get_cell_boxes(rows, answers):
+    
+    # Create one box per finished or running cell, answers are stored as {model: {scenario index: prices}}
+    return [go.Box(y=answers[row['Model']][row['Scenario'] - 1], name=f"Scenario {row['Scenario']}, {row['Model']}")
+            for row in rows]
@@ -8,11 +8,12 @@
 
 # Import necessary libraries
 import plotly.graph_objects as go
-from ast import literal_eval
 import pandas as pd
 import numpy as np
 import re
 from collections import Counter 
+from utils.answer_arrays import parse_prices, to_array, to_prices
+from utils.aggregates import aggregate_prices
 
 
 ### Prospect Theory ###
@@ -29,11 +30,11 @@ def PT_plot_results(df):
     # Get number of observations per temperature value
     n_observations = df.loc["Obs."].iloc[0]
     # Get original answer probabilities
-    og_answers = df.loc["Original"].apply(literal_eval).iloc[0]
+    og_answers = to_array(df.loc["Original"].iloc[0])
     # Get number of original answers
     n_original = df.loc["Original_count"].iloc[0]
 
-    fig = go.Figure(data=[
+    traces = [
         go.Bar(
             name = "Model answers",
             x = ["A", "B", "C"],
@@ -50,9 +51,9 @@ def PT_plot_results(df):
             hovertemplate = "Percentage: %{y:.2f}%<br>Number of observations: %{customdata}<extra></extra>",
             marker_color = "rgb(26, 118, 255)"
         )
-    ])
+    ]
 
-    fig.update_layout(
+    layout = go.Layout(
     barmode = 'group',
     xaxis = dict(
         title = "Answer options",  
@@ -77,6 +78,9 @@ def PT_plot_results(df):
     ),
     bargap = 0.3  # Gap between temperature values
 )
+    # The layout is passed to the constructor, updating the layout of a figure that already has traces is
+    # several times slower. The other plot functions do the same
+    fig = go.Figure(data = traces, layout = layout)
     return fig
 
 
@@ -212,11 +216,11 @@ def DE_plot_results(df):
     # Get number of observations per temperature value
     n_observations = df.loc["Obs."].iloc[0]
     # Get original answer probabilities
-    og_answers = df.loc["Original"].apply(literal_eval).iloc[0]
+    og_answers = to_array(df.loc["Original"].iloc[0])
     # Get number of original answers
     n_original = df.loc["Original_count"].iloc[0]
 
-    fig = go.Figure(data=[
+    traces = [
         go.Bar(
             name = "Model answers",
             x = ["A", "B", "C"],
@@ -233,9 +237,9 @@ def DE_plot_results(df):
             hovertemplate = "Percentage: %{y:.2f}%<br>Number of observations: %{customdata}<extra></extra>",
             marker_color = "rgb(26, 118, 255)"
         )
-    ])
+    ]
 
-    fig.update_layout(
+    layout = go.Layout(
     barmode = 'group',
     xaxis = dict(
         title = "Answer options",  
@@ -260,17 +264,56 @@ def DE_plot_results(df):
     ),
     bargap = 0.3  # Gap between temperature values
 )
+    fig = go.Figure(data = traces, layout = layout)
     return fig
 
 
 ### Transaction Utility ###
-# Function to extract dollar amounts from answers
+# Function to extract dollar amounts from answers, only answers with a currency like "$5" are valid
 def extract_dollar_amounts(answers):
-    # Only return values that start with "$"
-    valid_prices = [item for item in answers if item.startswith("$") and item[1:].replace(',', '').replace('.', '').isdigit()] # check if everything after $ is a digit, exlcuding commas
-    # Delete the "$" from the beginning of each price
-    prices = [item.replace('$', '') for item in valid_prices]
-    return prices
+    return parse_prices(answers, dollar_sign=True).tolist()
+
+# Function to get the distribution of the stated prices from a transposed results row
+def get_price_aggregates(df, dollar_sign=True):
+    # Stored results come with precomputed aggregates (see utils.aggregates), live results with the answers
+    if "Counts" in df.index:
+        return {row: df.loc[row].iloc[0] for row in ["Valid", "Mean", "Median", "Q1", "Q3", "Values", "Counts", "Shares"]}
+    prices = to_prices(df.loc["Answers"].iloc[0], dollar_sign)
+    return aggregate_prices(prices, df.loc["Obs."].iloc[0])
+
+# Maximum number of histogram bins, so the size of the figure does not depend on the answers
+MAX_BINS = 100
+
+# Function to bin the stated prices on the server, only the bar heights are sent to the browser
+def get_price_histogram(aggregates, bins="fd"):
+    # bins: "fd" for Freedman-Diaconis edges or a fixed bin width in dollars
+    values, counts = aggregates["Values"], aggregates["Counts"]
+    if len(values) == 0:
+        return np.array([0.0, 1.0]), np.zeros(1)
+    if bins == "fd":
+        width = 2 * (aggregates["Q3"] - aggregates["Q1"]) / counts.sum() ** (1 / 3)
+    else:
+        width = float(bins)
+    low, high = values.min(), values.max()
+    # Identical answers have no spread, very spread answers are capped at MAX_BINS bins
+    if not width > 0:
+        width = 1.0
+    width = max(width, (high - low) / MAX_BINS)
+    # Whole dollar amounts get whole dollar bins centered on the amounts
+    if np.all(values == np.round(values)):
+        width = np.ceil(width)
+        low -= 0.5
+    edges = low + width * np.arange(int((high - low) // width) + 2)
+    # The aggregates hold every distinct price once, weighted by how often it was given
+    frequencies, edges = np.histogram(values, bins=edges, weights=counts)
+    return edges, frequencies
+
+# Function to get the bars of the binned prices, empty bins are left out
+def get_histogram_bars(aggregates, bins="fd"):
+    edges, frequencies = get_price_histogram(aggregates, bins)
+    filled = frequencies > 0
+    left, right = edges[:-1][filled], edges[1:][filled]
+    return (left + right) / 2, frequencies[filled], right - left, np.column_stack([left, right])
 
 # Function to plot results of first experiment 
 def TU_plot_results(df):
@@ -279,15 +322,13 @@ def TU_plot_results(df):
     # Transpose for plotting
     df = df.transpose()
     # Get original and model answers
-    og_answers = df.loc["Original"].apply(literal_eval).iloc[0]
-    # Apply literal_eval to convert string to list
-    answers = df.loc["Answers"].apply(literal_eval).iloc[0]
+    og_answers = to_array(df.loc["Original"].iloc[0])
+    # Get distribution of stated WTP
+    aggregates = get_price_aggregates(df)
     # Get number of observations 
     n_observations = df.loc["Obs."].iloc[0] 
     # Get number of original answers
     n_original = df.loc["Original_count"].iloc[0]
-    # Get stated WTP
-    prices = extract_dollar_amounts(answers)
     # Get temperature value 
     temperature = df.loc["Temperature"].iloc[0]
     # Get model name
@@ -296,17 +337,17 @@ def TU_plot_results(df):
         model = "llama-2-70b"
 
     # Compute percentage of $0:
-    percent_0 = (prices.count("0")/n_observations)*100
+    percent_0 = (aggregates["Counts"][aggregates["Values"] == 0].sum()/n_observations)*100
     # Compute percentage of $5:
-    percent_5 = (prices.count("5")/n_observations)*100
+    percent_5 = (aggregates["Counts"][aggregates["Values"] == 5].sum()/n_observations)*100
     # Compute percentage of $10:
-    percent_10 = (prices.count("10")/n_observations)*100
+    percent_10 = (aggregates["Counts"][aggregates["Values"] == 10].sum()/n_observations)*100
     # Compute percentage of $15:
-    percent_15 = (prices.count("15")/n_observations)*100
+    percent_15 = (aggregates["Counts"][aggregates["Values"] == 15].sum()/n_observations)*100
     # Compute percentage of other answers:
     percent_other = 100-percent_0-percent_5-percent_10-percent_15
 
-    fig = go.Figure(data = [
+    traces = [
         go.Bar(
             name = "Model answers",
             x = ["$0", "$5", "$10", "$15", "Other"],
@@ -323,10 +364,10 @@ def TU_plot_results(df):
             hovertemplate = "Percentage: %{y:.2f}%<br>Number of total observations: %{customdata}<extra></extra>",
             marker_color = "rgb(26, 118, 255)"
         )
-    ])
+    ]
 
     # Style figure and add labels 
-    fig.update_layout(
+    layout = go.Layout(
     barmode = "group",
      xaxis = dict(
             title = "Price",
@@ -354,11 +395,12 @@ def TU_plot_results(df):
     width = 1000,
     margin=dict(t=60)
     )
+    fig = go.Figure(data = traces, layout = layout)
     
     return fig 
 
 # Function to plot results of second experiment
-def TU2_plot_results(df):
+def TU2_plot_results(df, bins="fd", raw_points=False):
 
     # Transpose for plotting
     df = df.transpose()
@@ -382,30 +424,38 @@ def TU2_plot_results(df):
     income = df.loc["Income"].iloc[0]
     if income == "0":
         income = "No information"
-    # Apply literal_eval to work with list of strings
-    answers = df.loc["Answers"].apply(literal_eval).iloc[0]
-    # Get stated WTP
-    prices = extract_dollar_amounts(answers)
-    sorted_prices = sorted(prices, key=lambda x: float(x))
-    numeric_prices = [float(price) for price in prices]
+    # Get distribution of stated WTP
+    aggregates = get_price_aggregates(df)
+    # Every distinct price repeated by its count are the sorted prices
+    sorted_prices = np.repeat(aggregates["Values"], aggregates["Counts"].astype(int))
     # Get mean and median
-    mean = np.round(np.mean(numeric_prices),2).astype(str)
-    median = np.round(np.median(numeric_prices),2).astype(str)
+    mean = np.round(aggregates["Mean"],2).astype(str)
+    median = np.round(aggregates["Median"],2).astype(str)
     # Get number of unique answers
-    num_unique_answers = len(set(prices))
+    num_unique_answers = len(aggregates["Values"])
    
 
-    fig = go.Figure(data = [
-    go.Histogram(x = sorted_prices,
+    # Every answer is only sent if requested, otherwise the bins are computed on the server
+    if raw_points:
+        trace = go.Histogram(x = sorted_prices,
                     customdata = [n_observations] * num_unique_answers,
                     hovertemplate = "Price asked: $%{x} <br>Frequency: %{y}<br>Total answers: %{customdata}<br>Mean: $" + mean + "<br>Median: $" + median +"<extra></extra>",
                     marker_color = "rgb(55, 83, 109)",
                     name = f"Place: {place}<br>Income: {income}<br>Mean: ${mean}<br>Median: ${median}",
-),
-    ])
+)
+    else:
+        centers, frequencies, widths, ranges = get_histogram_bars(aggregates, bins)
+        trace = go.Bar(x = centers,
+                    y = frequencies,
+                    width = widths,
+                    customdata = ranges,
+                    hovertemplate = "Price asked: $%{customdata[0]:.2f} - $%{customdata[1]:.2f}<br>Frequency: %{y}<br>Total answers: " + str(n_observations) + "<br>Mean: $" + mean + "<br>Median: $" + median +"<extra></extra>",
+                    marker_color = "rgb(55, 83, 109)",
+                    name = f"Place: {place}<br>Income: {income}<br>Mean: ${mean}<br>Median: ${median}",
+)
 
     # Layout
-    fig.update_layout(
+    layout = go.Layout(
         xaxis=dict(
             title="Price asked ($)",
             titlefont_size=18,
@@ -434,13 +484,14 @@ def TU2_plot_results(df):
         width=1000,
         margin=dict(t=60),
     )
+    fig = go.Figure(data = [trace], layout = layout)
     
 
     # Show the plot
     return fig
 
 # Function to plot results of third experiment
-def TU3_plot_results(df):
+def TU3_plot_results(df, bins="fd", raw_points=False):
 
     # Transpose for plotting
     df = df.transpose()
@@ -453,13 +504,13 @@ def TU3_plot_results(df):
     temperature = df.loc["Temperature"].iloc[0]
     # Get number of observations 
     n_observations = df.loc["Obs."].iloc[0]
-    # Extract model answers
-    answers = df.loc["Answers"].apply(literal_eval).iloc[0]
-    sorted_answers = sorted(answers, key=lambda x: float(x))
-    numeric_answers = [float(answer) for answer in answers]
+    # Get distribution of model answers
+    aggregates = get_price_aggregates(df, dollar_sign=False)
+    # Every distinct price repeated by its count are the sorted answers
+    sorted_answers = np.repeat(aggregates["Values"], aggregates["Counts"].astype(int))
 
     # Get number of unique answers
-    num_unique_answers = len(set(answers))
+    num_unique_answers = len(aggregates["Values"])
     # Get actual ticker price
     actual_price = df.loc["Actual_price"].iloc[0]
     # Get current market price
@@ -468,22 +519,31 @@ def TU3_plot_results(df):
     initial_cost = df.loc["Initial_cost"].iloc[0]
     # Get buyer 
     buyer = df.loc["Buyer"].iloc[0].capitalize()
-    # Compute mean
-    mean = np.round(np.mean(numeric_answers),2).astype(str)
-    median = np.round(np.median(numeric_answers),2).astype(str)
+    # Get mean and median
+    mean = np.round(aggregates["Mean"],2).astype(str)
+    median = np.round(aggregates["Median"],2).astype(str)
    
 
-    fig = go.Figure(data = [
-    go.Histogram(x = sorted_answers,
+    # Every answer is only sent if requested, otherwise the bins are computed on the server
+    if raw_points:
+        trace = go.Histogram(x = sorted_answers,
                     customdata = [n_observations] * num_unique_answers,
                     hovertemplate = "Price asked: $%{x} <br>Frequency: %{y}<br>Total answers: %{customdata}<br><extra></extra>",
 
                     marker_color = "rgb(55, 83, 109)",
-                    name = f"Actual price: ${actual_price}<br>Initial costs: ${initial_cost}<br>Current price: ${current_price}<br>Buyer: {buyer}<br>Mean: ${mean}<br>Median: ${median}"),
-    ])
+                    name = f"Actual price: ${actual_price}<br>Initial costs: ${initial_cost}<br>Current price: ${current_price}<br>Buyer: {buyer}<br>Mean: ${mean}<br>Median: ${median}")
+    else:
+        centers, frequencies, widths, ranges = get_histogram_bars(aggregates, bins)
+        trace = go.Bar(x = centers,
+                    y = frequencies,
+                    width = widths,
+                    customdata = ranges,
+                    hovertemplate = "Price asked: $%{customdata[0]:.2f} - $%{customdata[1]:.2f}<br>Frequency: %{y}<br>Total answers: " + str(n_observations) + "<br><extra></extra>",
+                    marker_color = "rgb(55, 83, 109)",
+                    name = f"Actual price: ${actual_price}<br>Initial costs: ${initial_cost}<br>Current price: ${current_price}<br>Buyer: {buyer}<br>Mean: ${mean}<br>Median: ${median}")
 
     # Layout
-    fig.update_layout(
+    layout = go.Layout(
         xaxis=dict(
             title="Price asked ($)",
             titlefont_size=18,
@@ -512,6 +572,7 @@ def TU3_plot_results(df):
         width=1000,
         margin=dict(t=60),
     )
+    fig = go.Figure(data = [trace], layout = layout)
     
 
     # Show the plot
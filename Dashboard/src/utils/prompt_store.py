@@ -0,0 +1,207 @@
+# Columnar store of the prompts and configurations of the experiments.
+# All dictionaries of the experiment families (e.g. "PT" or "TU3") are stored in one Arrow IPC file with one row per
+# experiment id. The file is memory-mapped on first access, so the columns are read zero-copy and the pages are shared
+# between the worker processes through the page cache instead of every worker unpickling its own copy. Only the
+# experiment ids are converted to Python objects, a value is converted when it is looked up.
+#
+# The store is created once from the pickles in data/Input by running (from Dashboard/src):
+#   python -m utils.prompt_store
+
+# Import required libraries
+import json
+import os
+import pickle
+import threading
+from collections.abc import Mapping
+import numpy as np
+import pyarrow as pa
+from utils.paths import DATA_DIRECTORY
+
+
+INPUT_DIRECTORY = os.path.join(DATA_DIRECTORY, 'Input')
+STORE_PATH = os.path.join(INPUT_DIRECTORY, 'prompt_store.arrow')
+
+# Names of the dictionaries in the *_dictionaries.pkl files, in the order in which they were pickled
+DICTIONARY_NAMES = {
+    'PT': ('experiment_prompts', 'prompt_ids', 'model', 'scenario', 'priming', 'results', 'answercount'),
+    'PT2': ('experiment_prompts', 'prices', 'results', 'model', 'prompt_ids', 'scenario', 'configuration'),
+    'DE': ('experiment_prompts', 'prompt_ids', 'model', 'og_results', 'answercount', 'scenario', 'priming', 'reorder'),
+    'TU': ('experiment_prompts', 'model', 'prompt_ids', 'initial_costs', 'orientation_prices', 'buyers', 'results',
+           'answercount', 'configurations', 'experiment_ids'),
+    'TU2': ('experiment_prompts', 'model', 'prompt_ids', 'places', 'income', 'configuration'),
+    'TU3': ('experiment_prompts', 'model', 'prompt_ids', 'actual_price', 'initial_costs', 'orientation_price',
+            'configuration', 'buyer'),
+}
+
+# Files with the prompt templates of every experiment family
+PROMPT_FILES = {
+    'PT': ('PT_prompts.pkl',),
+    'PT2': ('PT2_prompts_1.pkl', 'PT2_prompts_2.pkl', 'PT2_prompts_3.pkl', 'PT2_prompts_4.pkl'),
+    'DE': ('DE_prompts.pkl',),
+    'TU': ('TU_prompts.pkl',),
+    'TU2': ('TU2_prompts.pkl',),
+    'TU3': ('TU3_prompts.pkl',),
+}
+
+
+class PromptStore:
+
+    """Thread-safe, memory-mapped store of the experiment dictionaries, indexed by experiment id."""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self.table = None
+        # Experiment family -> (first row, number of rows), the rows of a family are stored next to each other
+        self.families = None
+        # Experiment family -> {experiment id: row within the family}
+        self.rows = {}
+        # Memoized {experiment id: value} views per (family, name)
+        self.dictionaries = {}
+        self.lock = threading.Lock()
+
+    def open(self):
+        # Double-checked, so that only the first access waits for the lock
+        if self.table is None:
+            with self.lock:
+                if self.table is None:
+                    source = pa.memory_map(self.path, 'r')
+                    table = pa.ipc.open_file(source).read_all()
+                    families = {}
+                    for row, experiment in enumerate(table.column('experiment').to_pylist()):
+                        first, count = families.get(experiment, (row, 0))
+                        families[experiment] = (first, count + 1)
+                    self.families = families
+                    self.table = table
+        return self.table
+
+    def get(self, experiment, name):
+        """
+        Return one dictionary of an experiment family, e.g. prompt_store.get("PT", "experiment_prompts")["PT_1_1"].
+
+        Args:
+            experiment (str): Experiment family, e.g. "PT", "PT2", "DE", "TU", "TU2" or "TU3"
+            name (str): Name of the dictionary, see DICTIONARY_NAMES
+
+        Returns:
+            dictionary (ColumnView): Read-only mapping of the family's experiment ids to their values
+        """
+        key = (experiment, name)
+        if key not in self.dictionaries:
+            table = self.open()
+            first, count = self.families[experiment]
+            if experiment not in self.rows:
+                ids = table.column('experiment_id').slice(first, count).to_pylist()
+                with self.lock:
+                    self.rows[experiment] = {experiment_id: row for row, experiment_id in enumerate(ids)}
+            field = table.schema.field(f'{experiment}.{name}')
+            view = ColumnView(table.column(field.name).slice(first, count), self.rows[experiment], field)
+            with self.lock:
+                self.dictionaries[key] = view
+        return self.dictionaries[key]
+
+    def get_dictionaries(self, experiment):
+        return {name: self.get(experiment, name) for name in DICTIONARY_NAMES[experiment]}
+
+    def get_prompts(self, experiment):
+        # Prompt templates of the family, one list per file in PROMPT_FILES
+        table = self.open()
+        return json.loads(table.schema.metadata[b'prompt_templates'])[experiment]
+
+    def clear(self):
+        with self.lock:
+            self.table = None
+            self.families = None
+            self.rows.clear()
+            self.dictionaries.clear()
+
+
+class ColumnView(Mapping):
+
+    """Read-only {experiment id: value} view of a memory-mapped column, a value is converted when it is looked up."""
+
+    def __init__(self, column, rows, field):
+        self.column = column
+        self.rows = rows
+        self.field = field
+
+    def __getitem__(self, experiment_id):
+        return restore_value(self.column[self.rows[experiment_id]].as_py(), self.field)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def restore_value(value, field):
+    # Restore the Python types of the pickles that Arrow stores differently
+    python_type = (field.metadata or {}).get(b'python_type')
+    if value is None or python_type is None:
+        return value
+    if python_type == b'ndarray':
+        return np.array(value)
+    if python_type == b'int_or_float':
+        return int(value) if float(value).is_integer() else value
+    return value
+
+
+def convert_pickles(directory=INPUT_DIRECTORY, path=STORE_PATH):
+    """
+    One-time conversion of the pickled dictionaries and prompt templates to the Arrow store.
+
+    Args:
+        directory (str): Directory with the *_dictionaries.pkl and *_prompts*.pkl files
+        path (str): Path of the Arrow IPC file that is written
+    """
+    def load_pickle(filename):
+        with open(os.path.join(directory, filename), 'rb') as f:
+            return pickle.load(f)
+
+    # One row per experiment id, the rows of a family are stored next to each other
+    families = {experiment: dict(zip(names, load_pickle(f'{experiment}_dictionaries.pkl')))
+                for experiment, names in DICTIONARY_NAMES.items()}
+    rows = [(experiment, experiment_id) for experiment, dictionaries in families.items()
+            for experiment_id in dictionaries['experiment_prompts']]
+
+    columns = {
+        'experiment': pa.array([experiment for experiment, experiment_id in rows], pa.string()),
+        'experiment_id': pa.array([experiment_id for experiment, experiment_id in rows], pa.string()),
+    }
+    fields = [pa.field('experiment', pa.string()), pa.field('experiment_id', pa.string())]
+
+    # Columns are named "<family>.<name>", as the same name has different types in different families
+    for experiment, dictionaries in families.items():
+        for name, dictionary in dictionaries.items():
+            values = [dictionary[experiment_id] if family == experiment else None for family, experiment_id in rows]
+            present = [value for value in values if value is not None]
+            metadata = None
+            if any(isinstance(value, np.ndarray) for value in present):
+                values = [value.tolist() if isinstance(value, np.ndarray) else value for value in values]
+                metadata = {'python_type': 'ndarray'}
+            elif {type(value) for value in present} == {int, float}:
+                metadata = {'python_type': 'int_or_float'}
+            column = pa.array(values)
+            columns[f'{experiment}.{name}'] = column
+            fields.append(pa.field(f'{experiment}.{name}', column.type, metadata=metadata))
+
+    # The few prompt templates are stored as JSON in the schema metadata
+    prompt_templates = {experiment: [load_pickle(filename) for filename in filenames]
+                        for experiment, filenames in PROMPT_FILES.items()}
+    schema = pa.schema(fields, metadata={'prompt_templates': json.dumps(prompt_templates)})
+    table = pa.Table.from_arrays(list(columns.values()), schema=schema)
+
+    # Uncompressed, so that the file can be memory-mapped and read zero-copy
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, schema) as writer:
+            writer.write_table(table)
+    return table
+
+
+# Process-wide prompt store shared by the experiment pages and the live recreation page
+prompt_store = PromptStore()
+
+
+if __name__ == '__main__':
+    table = convert_pickles()
+    print(f"Wrote {table.num_rows} experiments with {table.num_columns} columns to {STORE_PATH}")
@@ -0,0 +1,156 @@
+# Shared rate limiter for the API calls to OpenAI and Replicate.
+# The quotas of OpenAI and Replicate apply per API key, so every (provider, API key, model) gets one token bucket for
+# requests per minute and one for tokens per minute, so that the throughput matches the actual quota instead of
+# sleeping a fixed time after every call. The buckets are stored in a disk cache, so the web server and the worker
+# processes of the background jobs draw from the same buckets.
+
+# Import required libraries
+import asyncio
+import os
+import threading
+import time
+import diskcache
+from utils.client_registry import hash_api_key
+from utils.paths import DATA_DIRECTORY
+
+
+# Quotas per model as (requests per minute, tokens per minute). None means there is no token limit.
+DEFAULT_LIMITS = {
+    ('openai', 'gpt-3.5-turbo'): (3500, 160000),
+    ('openai', 'gpt-4-1106-preview'): (500, 150000),
+    ('replicate', 'llama-2-70b'): (3000, None),
+}
+
+# Fallback quotas for models that are not listed above
+DEFAULT_PROVIDER_LIMITS = {
+    'openai': (500, 150000),
+    'replicate': (3000, None),
+}
+
+# Levels of the buckets, shared between the processes
+DEFAULT_STATE_DIRECTORY = os.path.join(DATA_DIRECTORY, 'RateLimits')
+
+
+def get_provider_and_model(model):
+    # Replicate models are addressed by their full version string, e.g. 'meta/llama-2-70b-chat:02e5...'
+    if model.startswith('llama-2-70b') or model.startswith('meta/llama-2-70b'):
+        return 'replicate', 'llama-2-70b'
+    return 'openai', model
+
+
+def estimate_tokens(*texts, max_tokens=0):
+    # Rough token estimate based on the word count, consistent with the cost estimates of the dashboard
+    words = sum(len(text.split()) for text in texts if text)
+    return words + max_tokens
+
+
+class TokenBucket:
+
+    """Token bucket that holds up to `capacity` units and refills `capacity` units per minute."""
+
+    def __init__(self, capacity, level=None, last_refill=None):
+        self.capacity = capacity
+        self.rate = capacity / 60
+        # A new bucket is full, a stored one is restored (and capped if the quota was lowered since)
+        self.level = capacity if level is None else min(level, capacity)
+        # Wall clock time, as the buckets are shared between processes
+        self.last_refill = time.time() if last_refill is None else last_refill
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + max(0, now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def wait_time(self, amount):
+        # Requests larger than the whole bucket only have to wait for a full bucket
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    def get_state(self):
+        return self.level, self.last_refill
+
+
+class RateLimiter:
+
+    """Process- and thread-safe collection of request and token buckets per (provider, API key, model)."""
+
+    def __init__(self, limits=None, provider_limits=None, directory=DEFAULT_STATE_DIRECTORY):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.provider_limits = dict(DEFAULT_PROVIDER_LIMITS if provider_limits is None else provider_limits)
+        self.directory = directory
+        # Disk cache with the levels of the buckets, opened by every process itself
+        self.state = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def set_limits(self, model, requests_per_minute, tokens_per_minute=None):
+        # The stored levels are capped to the new quota when the buckets are loaded
+        with self.lock:
+            self.limits[get_provider_and_model(model)] = (requests_per_minute, tokens_per_minute)
+
+    def get_state(self):
+        # Worker processes do not reuse the connection of the process they were forked from
+        if self.state is None or self.pid != os.getpid():
+            self.state = diskcache.Cache(self.directory)
+            self.pid = os.getpid()
+        return self.state
+
+    def load_buckets(self, state, provider, model, key):
+        requests_per_minute, tokens_per_minute = self.limits.get((provider, model), self.provider_limits[provider])
+        request_state, token_state = state.get(key, (None, None))
+        request_bucket = TokenBucket(requests_per_minute, *(request_state or ()))
+        token_bucket = TokenBucket(tokens_per_minute, *(token_state or ())) if tokens_per_minute else None
+        return request_bucket, token_bucket
+
+    def reserve(self, model, tokens, api_key=None):
+        """
+        Take one request and `tokens` tokens from the buckets of the model and API key if both are available.
+
+        Returns:
+            wait (float): 0 if the request may be sent now, otherwise the number of seconds to wait before trying again
+        """
+        provider, model = get_provider_and_model(model)
+        key = (provider, hash_api_key(api_key), model)
+        with self.lock:
+            state = self.get_state()
+            # Read, update and write the levels in one transaction, so no other process takes the same capacity
+            with state.transact():
+                request_bucket, token_bucket = self.load_buckets(state, provider, model, key)
+                now = time.time()
+                request_bucket.refill(now)
+                wait = request_bucket.wait_time(1)
+                if token_bucket is not None:
+                    token_bucket.refill(now)
+                    wait = max(wait, token_bucket.wait_time(tokens))
+
+                # Only consume if both buckets have enough capacity, so that no quota is lost while waiting
+                if wait == 0:
+                    request_bucket.consume(1)
+                    if token_bucket is not None:
+                        token_bucket.consume(tokens)
+                    state.set(key, (request_bucket.get_state(), token_bucket.get_state() if token_bucket else None))
+            return wait
+
+    def acquire(self, model, tokens=1, api_key=None):
+        # Block the calling thread until the request may be sent
+        while True:
+            wait = self.reserve(model, tokens, api_key)
+            if wait == 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self, model, tokens=1, api_key=None):
+        # Same as acquire, but yields to the event loop while waiting
+        while True:
+            wait = self.reserve(model, tokens, api_key)
+            if wait == 0:
+                return
+            await asyncio.sleep(wait)
+
+
+# Rate limiter shared by the experiments, the live recreation page and the chatbot of all processes
+rate_limiter = RateLimiter()
@@ -0,0 +1,181 @@
+# Persistent cache for the answers of the language models.
+# Every answer is stored in a local SQLite database under a key built from
+# (scope, model, prompt, instruction, temperature, max_tokens, sample index), so resuming a partially failed run only
+# requests the samples that are not stored yet. The scope decides who replays the answers: a single run (samples at
+# temperature > 0 must be drawn anew by every run) or a user (deterministic answers at temperature 0, or when reusing
+# the answers of earlier runs is switched on).
+
+# Import required libraries
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from utils.experiment_index import normalize_model
+from utils.paths import DATA_DIRECTORY
+
+
+DEFAULT_CACHE_PATH = os.environ.get('RESPONSE_CACHE_PATH', os.path.join(DATA_DIRECTORY, 'Cache', 'responses.sqlite'))
+DEFAULT_MAX_ENTRIES = 200000
+DEFAULT_TTL = 30 * 24 * 60 * 60  # 30 days
+
+
+class ResponseCache:
+
+    """SQLite-backed answer cache with per-entry TTL and LRU eviction once max_entries is exceeded."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.connection = None
+        # Process that opened the connection
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        # The database is only created once the cache is used for the first time. Every process opens its own
+        # connection, the background jobs run in processes forked from the web server and must not use its connection.
+        if self.connection is None or self.pid != os.getpid():
+            self.pid = os.getpid()
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                       key TEXT PRIMARY KEY,
+                       answer TEXT NOT NULL,
+                       expires REAL,
+                       last_access REAL NOT NULL,
+                       rescued INTEGER NOT NULL DEFAULT 0
+                   )""")
+            # Caches created before the answers were flagged get the column, their answers are not flagged
+            columns = [row[1] for row in self.connection.execute("PRAGMA table_info(responses)")]
+            if 'rescued' not in columns:
+                self.connection.execute("ALTER TABLE responses ADD COLUMN rescued INTEGER NOT NULL DEFAULT 0")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+            self.connection.commit()
+        return self.connection
+
+    @staticmethod
+    def make_key(model, prompt, instruction, temperature, max_tokens, sample_index, logprobs=False, scope=None):
+        # Temperature 0 is deterministic, so all samples share the answer stored for index 0
+        if temperature == 0:
+            sample_index = 0
+        # Llama is keyed by its short name, whether it was addressed by the short name or by its Replicate version
+        model = normalize_model(model)
+        # Answers completed with the logprobs are stored separately, the keys of the other answers are unchanged
+        settings = [model, prompt, instruction, float(temperature), max_tokens, sample_index] + (['logprobs'] if logprobs else [])
+        # Answers are only replayed within their scope, e.g. a run or the hashed API keys of a user
+        if scope is not None:
+            settings = [scope] + settings
+        payload = json.dumps(settings)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        # Returns {key: (answer, rescued)} of the keys that are stored and not expired
+        if not keys:
+            return {}
+        now = time.time()
+        with self.lock:
+            connection = self.connect()
+            placeholders = ','.join('?' * len(keys))
+            rows = connection.execute(
+                f"SELECT key, answer, rescued, expires FROM responses WHERE key IN ({placeholders})", list(keys)).fetchall()
+            found = {key: (answer, bool(rescued)) for key, answer, rescued, expires in rows if expires is None or expires > now}
+            expired = [key for key, answer, rescued, expires in rows if key not in found]
+
+            # Drop expired entries and mark the found ones as recently used
+            if expired:
+                connection.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in expired])
+            if found:
+                connection.executemany("UPDATE responses SET last_access = ? WHERE key = ?", [(now, key) for key in found])
+            connection.commit()
+        return found
+
+    def set_many(self, entries, ttl=None):
+        # entries: {key: (answer, rescued)}
+        if not entries:
+            return
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires = now + ttl if ttl else None
+        with self.lock:
+            connection = self.connect()
+            connection.executemany(
+                "INSERT OR REPLACE INTO responses (key, answer, rescued, expires, last_access) VALUES (?, ?, ?, ?, ?)",
+                [(key, answer, int(rescued), expires, now) for key, (answer, rescued) in entries.items()])
+            self.evict(connection)
+            connection.commit()
+
+    def evict(self, connection):
+        # Remove the least recently used entries that exceed the size cap
+        excess = connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if excess > 0:
+            connection.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)", (excess,))
+
+    def clear(self):
+        with self.lock:
+            connection = self.connect()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+
+    def get_answers(self, model, prompt, instruction, temperature, max_tokens, fetch, count, start=0, batch_size=1, ttl=None,
+                    scope=None):
+        """
+        Return the answers for the sample indices start, ..., start + count - 1.
+
+        Args:
+            fetch (callable): Function that takes a number of samples k and returns k new answers from the model
+            count (int): Number of answers to be returned
+            start (int): Sample index of the first answer
+            batch_size (int): Maximum number of samples that are requested with one call of fetch
+            scope (str): Only answers stored under the same scope are replayed, e.g. the id of a run or the hashed API keys of a user
+
+        Returns:
+            answers (list): Cached answers, completed by new answers for the missing sample indices
+        """
+        fetch_unflagged = lambda k: (fetch(k), [False] * k)
+        answers, rescued = self.get_flagged_answers(model, prompt, instruction, temperature, max_tokens, fetch_unflagged,
+                                                    count, start, batch_size, ttl, scope=scope)
+        return answers
+
+    def get_flagged_answers(self, model, prompt, instruction, temperature, max_tokens, fetch, count, start=0, batch_size=1,
+                            ttl=None, logprobs=False, scope=None):
+        """
+        Same as get_answers, with a flag per answer that is stored next to it, e.g. whether the answer was rescued.
+
+        Args:
+            fetch (callable): Function that takes a number of samples k and returns k new answers and their k flags
+            logprobs (bool): Whether fetch completes the answers with the logprobs of the first token
+
+        Returns:
+            answers (list): Cached answers, completed by new answers for the missing sample indices
+            rescued (list): Flag of every answer
+        """
+        # For temperature 0 a single stored sample is replayed for every index
+        indices = [0] if temperature == 0 else list(range(start, start + count))
+        keys = [self.make_key(model, prompt, instruction, temperature, max_tokens, i, logprobs, scope) for i in indices]
+        answers = self.get_many(keys)
+        missing = [key for key in keys if key not in answers]
+
+        # Request the missing samples batch by batch and store each batch right away
+        for i in range(0, len(missing), batch_size):
+            batch_keys = missing[i:i + batch_size]
+            new_answers = dict(zip(batch_keys, zip(*fetch(len(batch_keys)))))
+            self.set_many(new_answers, ttl=ttl)
+            answers.update(new_answers)
+
+        if temperature == 0:
+            entries = [answers[keys[0]]] * count
+        else:
+            entries = [answers[key] for key in keys]
+        return [answer for answer, rescued in entries], [rescued for answer, rescued in entries]
+
+
+# Process-wide response cache shared by the live experiment pages
+response_cache = ResponseCache()
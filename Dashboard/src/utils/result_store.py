@@ -0,0 +1,33 @@
+# Server-side store of the results of the live experiments.
+# The results stay on the server and the dcc.Store components only hold a short handle, so the payload sent to the
+# browser and back with every related callback and download does not grow with the number of iterations.
+
+# Import required libraries
+import os
+import uuid
+import diskcache
+from utils.paths import DATA_DIRECTORY
+
+
+# Shared between the worker processes of the background jobs and the web server, the least recently used results are
+# evicted if the store exceeds its size limit
+RESULT_STORE_SIZE_LIMIT = 512 * 1024 ** 2  # 512 MB
+result_store = diskcache.Cache(os.path.join(DATA_DIRECTORY, 'Results'), size_limit=RESULT_STORE_SIZE_LIMIT,
+                               eviction_policy='least-recently-used')
+
+# Results are kept for a day, after that they have to be created again by running the experiment
+RESULT_EXPIRE = 24 * 60 * 60
+
+
+def put_result(result):
+    # Returns the handle that is stored in the dcc.Store instead of the result
+    handle = uuid.uuid4().hex
+    result_store.set(handle, result, expire=RESULT_EXPIRE)
+    return handle
+
+
+def get_result(handle):
+    # Returns None if there is no handle or the result expired or was evicted
+    if handle is None:
+        return None
+    return result_store.get(handle)
@@ -0,0 +1,43 @@
+# Indexed tables of the stored experiment results.
+# The pages select one cell of the results per dropdown change. Instead of filtering the whole frame with boolean masks
+# over all parameter columns on every interaction, the row of every parameter combination is looked up in a dictionary
+# that is built once when the page is imported.
+
+
+class ResultTable:
+
+    """Results of an experiment family, indexed by the values of the parameter columns."""
+
+    def __init__(self, results, columns):
+        self.results = results
+        self.columns = tuple(columns)
+        # Parameter tuple -> position of the row, the first row is kept if a combination occurs more than once
+        self.rows = {}
+        for position, values in enumerate(zip(*(results[column].tolist() for column in self.columns))):
+            self.rows.setdefault(values, position)
+
+    def get(self, *values):
+        """
+        Return the row of the given parameter combination.
+
+        Args:
+            values: Values of the parameter columns, in the order of self.columns
+
+        Returns:
+            df (pd.DataFrame): Frame with the one row of the results, as expected by the plot functions
+        """
+        return self.results.iloc[[self.rows[values]]]
+
+    def get_value(self, column, *values):
+        # Single value of the row, e.g. the experiment id to look up the prompt
+        return self.results[column].iat[self.rows[values]]
+
+    def keys(self):
+        # All parameter combinations of the results
+        return self.rows.keys()
+
+    def __contains__(self, values):
+        return values in self.rows
+
+    def __len__(self):
+        return len(self.rows)
@@ -0,0 +1,80 @@
+# Journal to checkpoint experiment runs.
+# Every finished (model, scenario) cell is appended to a JSON lines file named after the run id,
+# so that a failed or interrupted run can continue from the last finished cell.
+
+# Import required libraries
+import hashlib
+import json
+import os
+from utils.paths import DATA_DIRECTORY
+
+
+DEFAULT_JOURNAL_DIRECTORY = os.environ.get('RUN_JOURNAL_DIRECTORY', os.path.join(DATA_DIRECTORY, 'Runs'))
+
+
+def make_run_id(*configuration, scope=None):
+    # Runs with the same configuration get the same id, so running them again resumes the unfinished run.
+    # The scope (e.g. a hash of the user's API keys) keeps the journals of different users apart, who would otherwise
+    # replay and delete each other's journal when they start the same experiment.
+    payload = json.dumps([scope, configuration], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class RunJournal:
+
+    """Append-only journal of the setup and the finished cells of one experiment run."""
+
+    def __init__(self, run_id, directory=DEFAULT_JOURNAL_DIRECTORY):
+        self.run_id = run_id
+        self.path = os.path.join(directory, f'{run_id}.jsonl')
+
+    def load(self):
+        """
+        Read the journal of an earlier, unfinished run.
+
+        Returns:
+            setup (dict): Setup of the run (prompts, instructions, ...), None if the run has not been started yet
+            cells (dict): Answers of the finished cells and whether they were rescued, as (answers, rescued) keyed by
+                          (model, scenario index)
+        """
+        setup = None
+        cells = {}
+        if not os.path.exists(self.path):
+            return setup, cells
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be incomplete if the process was killed while writing
+                    break
+                if entry['type'] == 'setup':
+                    setup = entry['setup']
+                elif entry['type'] == 'cell':
+                    answers = entry['answers']
+                    cells[(entry['model'], entry['scenario'])] = (answers, entry.get('rescued') or [False] * len(answers))
+        return setup, cells
+
+    def append(self, entry):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry) + '\n')
+            # Make sure the checkpoint survives a crash of the process
+            f.flush()
+            os.fsync(f.fileno())
+
+    def write_setup(self, setup):
+        self.append({'type': 'setup', 'setup': setup})
+
+    def record_cell(self, model, scenario, answers, rescued=None):
+        # The flags of the rescued answers are kept next to the answers, so the answers stay unchanged
+        entry = {'type': 'cell', 'model': model, 'scenario': scenario, 'answers': answers}
+        if rescued is not None and any(rescued):
+            entry['rescued'] = rescued
+        self.append(entry)
+
+    def finish(self):
+        # A finished run does not need to be resumed, so its journal is removed
+        if os.path.exists(self.path):
+            os.remove(self.path)